@@ -0,0 +1,78 @@
+"""
+Benchmark for :func:`vsaiortc.rtp.compute_audio_level_dbov`.
+
+Compares the current implementation, with and without NumPy, with the
+previous one which unpacked every sample in Python.
+
+Usage: python scripts/bench_audio_level.py [--number N]
+"""
+
+import argparse
+import math
+import struct
+import timeit
+from unittest.mock import patch
+
+from av import AudioFrame
+
+from vsaiortc import rtp
+
+
+def legacy_compute_audio_level_dbov(frame: AudioFrame) -> int:
+    MAX_SAMPLE_VALUE = 32767
+    MAX_AUDIO_LEVEL = 0
+    MIN_AUDIO_LEVEL = -127
+    rms = 0.0
+    buf = bytes(frame.planes[0])
+    s = struct.Struct("h")
+    for unpacked in s.iter_unpack(buf):
+        sample = unpacked[0]
+        rms += sample * sample
+    rms = math.sqrt(rms / (frame.samples * MAX_SAMPLE_VALUE * MAX_SAMPLE_VALUE))
+    if rms > 0:
+        db = 20 * math.log10(rms)
+        db = max(db, MIN_AUDIO_LEVEL)
+        db = min(db, MAX_AUDIO_LEVEL)
+    else:
+        db = MIN_AUDIO_LEVEL
+    return round(db)
+
+
+def make_frame(layout: str, samples: int) -> AudioFrame:
+    frame = AudioFrame(format="s16", layout=layout, samples=samples)
+    channels = len(frame.layout.channels)
+    frame.planes[0].update(
+        b"".join(
+            struct.pack("h", int(16384 * math.sin(2 * math.pi * n / samples)))
+            for n in range(samples * channels)
+        )
+    )
+    frame.sample_rate = 48000
+    return frame
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Audio level benchmark")
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    def fallback(frame: AudioFrame) -> int:
+        with patch.object(rtp, "numpy", None):
+            return rtp.compute_audio_level_dbov(frame)
+
+    cases = [
+        ("legacy", legacy_compute_audio_level_dbov),
+        ("numpy", rtp.compute_audio_level_dbov),
+        ("no numpy", fallback),
+    ]
+    for layout in ["mono", "stereo"]:
+        frame = make_frame(layout, 960)  # 20ms @ 48kHz
+        for name, func in cases:
+            elapsed = min(
+                timeit.repeat(lambda: func(frame), number=args.number, repeat=3)
+            )
+            print(f"{layout:<8} {name:<10} {1e6 * elapsed / args.number:8.1f} us/frame")
+
+
+if __name__ == "__main__":
+    main()
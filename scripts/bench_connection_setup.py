@@ -0,0 +1,93 @@
+"""
+Benchmark for the setup and teardown of :class:`vsaiortc.RTCPeerConnection`.
+
+Two connections negotiate a number of audio transceivers over the loopback
+interface. The time from applying the answer until both connections are
+connected, and the time taken to close them, are measured with and without
+BUNDLE. Without BUNDLE each transceiver has its own ICE and DTLS transports.
+
+Usage: python scripts/bench_connection_setup.py [--repeat N] [--transceivers N ...]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from vsaiortc import (
+    RTCBundlePolicy,
+    RTCConfiguration,
+    RTCPeerConnection,
+    RTCSessionDescription,
+)
+
+
+def strip_bundle(
+    description: RTCSessionDescription, bundle: bool
+) -> RTCSessionDescription:
+    if bundle:
+        return description
+
+    # pretend the peer is not bundle-aware
+    return RTCSessionDescription(
+        sdp="".join(
+            line
+            for line in description.sdp.splitlines(keepends=True)
+            if not line.startswith("a=group:BUNDLE")
+        ),
+        type=description.type,
+    )
+
+
+async def wait_connected(pc: RTCPeerConnection) -> None:
+    while pc.connectionState != "connected":
+        await asyncio.sleep(0.001)
+
+
+async def run(bundle: bool, transceivers: int) -> tuple[float, float]:
+    configuration = RTCConfiguration(
+        iceServers=[], bundlePolicy=RTCBundlePolicy.MAX_COMPAT
+    )
+    pc1 = RTCPeerConnection(configuration)
+    pc2 = RTCPeerConnection(configuration)
+    for i in range(transceivers):
+        pc1.addTransceiver("audio")
+
+    await pc1.setLocalDescription(await pc1.createOffer())
+    await pc2.setRemoteDescription(strip_bundle(pc1.localDescription, bundle))
+    await pc2.setLocalDescription(await pc2.createAnswer())
+    answer = strip_bundle(pc2.localDescription, bundle)
+
+    start = time.perf_counter()
+    await pc1.setRemoteDescription(answer)
+    await asyncio.gather(wait_connected(pc1), wait_connected(pc2))
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    await asyncio.gather(pc1.close(), pc2.close())
+    teardown = time.perf_counter() - start
+    return setup, teardown
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Connection setup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--transceivers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    for transceivers in args.transceivers:
+        for bundle in [True, False]:
+            results = [
+                asyncio.run(run(bundle, transceivers)) for i in range(args.repeat)
+            ]
+            setup = statistics.median(r[0] for r in results)
+            teardown = statistics.median(r[1] for r in results)
+            mode = "bundle" if bundle else "no bundle"
+            print(
+                f"{transceivers:2d} transceivers {mode:<9} "
+                f"setup {1000 * setup:7.1f} ms teardown {1000 * teardown:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
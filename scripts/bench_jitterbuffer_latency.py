@@ -0,0 +1,105 @@
+"""
+Latency benchmark for :class:`vsaiortc.jitterbuffer.JitterBuffer`.
+
+Simulates a VP8 stream and measures how long each frame waits in the jitter
+buffer after its last packet arrived. Frames are completed either when the
+next frame arrives (legacy) or as soon as the packet with the marker bit
+arrives.
+
+Usage: python scripts/bench_jitterbuffer_latency.py [--fps N] [--frames N]
+"""
+
+import argparse
+import random
+import statistics
+
+from vsaiortc.codecs import depayload_with_boundaries
+from vsaiortc.codecs.vpx import VpxPayloadDescriptor
+from vsaiortc.jitterbuffer import JitterBuffer
+from vsaiortc.rtcrtpparameters import RTCRtpCodecParameters
+from vsaiortc.rtp import RtpPacket
+
+VP8_CODEC = RTCRtpCodecParameters(
+    mimeType="video/VP8", clockRate=90000, payloadType=100
+)
+
+
+def make_packets(
+    frames: int, fps: int, seed: int
+) -> list[tuple[float, int, RtpPacket]]:
+    """
+    Build the packets of the stream with their arrival times in seconds,
+    along with the index of the frame they belong to.
+    """
+    rng = random.Random(seed)
+    packets = []
+    sequence_number = 0
+    for index in range(frames):
+        send_time = index / fps
+        count = rng.randint(1, 8)
+        for i in range(count):
+            descriptor = VpxPayloadDescriptor(
+                partition_start=int(i == 0), partition_id=0, picture_id=index
+            )
+            packet = RtpPacket(
+                payload_type=VP8_CODEC.payloadType,
+                marker=int(i == count - 1),
+                sequence_number=sequence_number & 0xFFFF,
+                timestamp=index * 90000 // fps,
+                payload=bytes(descriptor) + bytes(1000),
+            )
+            # packets of a frame are paced over a few milliseconds
+            arrival = send_time + 0.001 * i + rng.uniform(0, 0.002)
+            packets.append((arrival, index, packet))
+            sequence_number += 1
+    packets.sort(key=lambda x: x[0])
+    return packets
+
+
+def run(packets: list[tuple[float, int, RtpPacket]], use_marker: bool) -> list[float]:
+    jbuffer = JitterBuffer(capacity=128, is_video=True)
+    last_arrival: dict[int, float] = {}
+    timestamps: dict[int, int] = {}
+    delays = []
+    for arrival, index, packet in packets:
+        last_arrival[index] = arrival
+        timestamps[packet.timestamp] = index
+
+        data, frame_start, fragment_end = depayload_with_boundaries(
+            VP8_CODEC, packet.payload
+        )
+        packet.depayloaded = data
+        if use_marker:
+            _, frame = jbuffer.add(
+                packet,
+                frame_start=frame_start,
+                frame_end=bool(packet.marker) and fragment_end,
+            )
+        else:
+            _, frame = jbuffer.add(packet, frame_start=None, frame_end=False)
+
+        if frame is not None:
+            delays.append(arrival - last_arrival[timestamps[frame.timestamp]])
+    return delays
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Jitter buffer latency benchmark")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    packets = make_packets(args.frames, args.fps, args.seed)
+    for name, use_marker in [("next frame", False), ("marker bit", True)]:
+        delays = sorted(run(packets, use_marker))
+        print(
+            f"{name:<12} {len(delays):5d} frames  "
+            f"mean {1000 * statistics.mean(delays):6.2f} ms  "
+            f"p95 {1000 * delays[int(0.95 * len(delays))]:6.2f} ms  "
+            f"max {1000 * delays[-1]:6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark for :meth:`vsaiortc.rtp.RtpPacket.parse`.
+
+Compares the current parser with the previous one, which copied the header,
+extension block and payload out of the datagram and eagerly decoded every
+header extension.
+
+Usage: python scripts/bench_rtp_parse.py [--number N]
+"""
+
+import argparse
+import timeit
+from struct import unpack, unpack_from
+
+from vsaiortc import rtp
+from vsaiortc.rtcrtpparameters import RTCRtpHeaderExtensionParameters, RTCRtpParameters
+
+
+def legacy_parse(data: bytes, extensions_map: rtp.HeaderExtensionsMap) -> rtp.RtpPacket:
+    v_p_x_cc, m_pt, sequence_number, timestamp, ssrc = unpack("!BBHLL", data[0:12])
+    padding = (v_p_x_cc >> 5) & 1
+    extension = (v_p_x_cc >> 4) & 1
+    cc = v_p_x_cc & 0x0F
+
+    packet = rtp.RtpPacket(
+        marker=(m_pt >> 7),
+        payload_type=(m_pt & 0x7F),
+        sequence_number=sequence_number,
+        timestamp=timestamp,
+        ssrc=ssrc,
+    )
+
+    pos = rtp.RTP_HEADER_LENGTH
+    for i in range(0, cc):
+        packet.csrc.append(unpack_from("!L", data, pos)[0])
+        pos += 4
+
+    if extension:
+        extension_profile, extension_length = unpack_from("!HH", data, pos)
+        extension_length *= 4
+        pos += 4
+        extension_value = data[pos : pos + extension_length]
+        pos += extension_length
+        packet.extensions = extensions_map.get(extension_profile, extension_value)
+
+    if padding:
+        padding_len = data[-1]
+        packet.padding_size = padding_len
+        packet.payload = data[pos:-padding_len]
+    else:
+        packet.payload = data[pos:]
+
+    return packet
+
+
+def make_packet(extensions_map: rtp.HeaderExtensionsMap) -> bytes:
+    packet = rtp.RtpPacket(
+        payload_type=96, sequence_number=1234, timestamp=5678, ssrc=0x12345678
+    )
+    packet.payload = bytes(1200)
+    packet.extensions.mid = "0"
+    packet.extensions.abs_send_time = 0x123456
+    return packet.serialize(extensions_map)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RTP parsing benchmark")
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    extensions_map = rtp.HeaderExtensionsMap()
+    extensions_map.configure(
+        RTCRtpParameters(
+            headerExtensions=[
+                RTCRtpHeaderExtensionParameters(
+                    id=1, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                ),
+                RTCRtpHeaderExtensionParameters(
+                    id=3,
+                    uri="http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time",
+                ),
+            ]
+        )
+    )
+    data = make_packet(extensions_map)
+
+    cases = [
+        ("legacy parse", lambda: legacy_parse(data, extensions_map)),
+        ("parse", lambda: rtp.RtpPacket.parse(data, extensions_map)),
+        (
+            "parse + read extensions",
+            lambda: rtp.RtpPacket.parse(data, extensions_map).extensions,
+        ),
+    ]
+    for name, func in cases:
+        elapsed = min(timeit.repeat(func, number=args.number, repeat=3))
+        print(f"{name:<24} {1e9 * elapsed / args.number:8.0f} ns/packet")
+
+
+if __name__ == "__main__":
+    main()
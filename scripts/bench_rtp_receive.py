@@ -0,0 +1,156 @@
+"""
+Benchmark for the RTP receive path of :class:`vsaiortc.RTCDtlsTransport`.
+
+SRTP packets are sent over the loopback interface to a connected transport,
+from a separate thread. The CPU time spent by the event loop thread gives the
+number of packets received per second on a single core, when datagrams are
+handed to the transport as soon as they arrive ("callback") and when they are
+queued and awaited one by one ("await").
+
+Usage: python scripts/bench_rtp_receive.py [--packets N] [--burst N]
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+from collections.abc import Coroutine
+from typing import Any
+
+from vsaiortc.rtcdtlstransport import RTCCertificate, RTCDtlsTransport
+from vsaiortc.rtcicetransport import RTCIceGatherer, RTCIceTransport
+from vsaiortc.rtcrtpparameters import (
+    RTCRtpCodecParameters,
+    RTCRtpDecodingParameters,
+    RTCRtpReceiveParameters,
+)
+from vsaiortc.rtp import AnyRtcpPacket, RtpPacket
+
+SSRC = 1234
+
+
+class CountingReceiver:
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.done = asyncio.Event()
+        self.received = 0
+
+    def _handle_disconnect(self) -> None:
+        self.done.set()
+
+    async def _handle_rtcp_packet(self, packet: AnyRtcpPacket) -> None:
+        pass
+
+    async def _handle_rtp_packet(self, packet: RtpPacket, arrival_time_ms: int) -> None:
+        for coroutine in self._receive_rtp_packet(packet, arrival_time_ms):
+            await coroutine
+
+    def _receive_rtp_packet(
+        self, packet: RtpPacket, arrival_time_ms: int
+    ) -> list[Coroutine[Any, Any, None]]:
+        self.received += 1
+        if self.received == self.count:
+            self.done.set()
+        return []
+
+
+async def connect() -> tuple[RTCDtlsTransport, RTCDtlsTransport]:
+    gatherer1, gatherer2 = RTCIceGatherer(), RTCIceGatherer()
+    ice1 = RTCIceTransport(gatherer1)
+    ice2 = RTCIceTransport(gatherer2, receiveBatching=True)
+    await asyncio.gather(gatherer1.gather(), gatherer2.gather())
+    for candidate in gatherer2.getLocalCandidates():
+        await ice1.addRemoteCandidate(candidate)
+    for candidate in gatherer1.getLocalCandidates():
+        await ice2.addRemoteCandidate(candidate)
+    await asyncio.gather(
+        ice1.start(gatherer2.getLocalParameters()),
+        ice2.start(gatherer1.getLocalParameters()),
+    )
+
+    dtls1 = RTCDtlsTransport(ice1, [RTCCertificate.generateCertificate()])
+    dtls2 = RTCDtlsTransport(ice2, [RTCCertificate.generateCertificate()])
+    await asyncio.gather(
+        dtls1.start(dtls2.getLocalParameters()),
+        dtls2.start(dtls1.getLocalParameters()),
+    )
+    return dtls1, dtls2
+
+
+def send(packets: list[bytes], addr: tuple[str, int], burst: int) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for start in range(0, len(packets), burst):
+            for data in packets[start : start + burst]:
+                sock.sendto(data, addr)
+            # give the receiver a chance to keep up
+            time.sleep(0.0005)
+    finally:
+        sock.close()
+
+
+async def run(mode: str, count: int, burst: int) -> tuple[int, float]:
+    dtls1, dtls2 = await connect()
+    receiver = CountingReceiver(count)
+    dtls2._register_rtp_receiver(
+        receiver,
+        RTCRtpReceiveParameters(
+            codecs=[
+                RTCRtpCodecParameters(
+                    mimeType="video/VP8", clockRate=90000, payloadType=100
+                )
+            ],
+            encodings=[RTCRtpDecodingParameters(ssrc=SSRC, payloadType=100)],
+        ),
+    )
+    if mode == "await":
+        dtls2.transport._set_datagram_handler(None)
+
+    packets = []
+    for i in range(count):
+        packet = RtpPacket(
+            payload_type=100,
+            sequence_number=i & 0xFFFF,
+            timestamp=i * 3000,
+            ssrc=SSRC,
+            payload=bytes(1100),
+        )
+        packets.append(dtls1._tx_srtp.protect(packet.serialize()))
+
+    pair = dtls2.transport._connection._nominated[1]
+    addr = pair.local_candidate.host, pair.local_candidate.port
+
+    sender = threading.Thread(target=send, args=(packets, addr, burst))
+    start = time.thread_time()
+    sender.start()
+    try:
+        await asyncio.wait_for(receiver.done.wait(), timeout=10)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.thread_time() - start
+    sender.join()
+
+    await dtls1.stop()
+    await dtls2.stop()
+    await dtls1.transport.stop()
+    await dtls2.transport.stop()
+    return receiver.received, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="RTP receive benchmark")
+    parser.add_argument("--packets", type=int, default=50000)
+    parser.add_argument("--burst", type=int, default=16)
+    args = parser.parse_args()
+
+    for mode in ["await", "callback"]:
+        received, elapsed = asyncio.run(run(mode, args.packets, args.burst))
+        print(
+            f"{mode:<10} {received:7d} packets {elapsed:6.2f} s CPU "
+            f"{received / elapsed:9.0f} packets/s/core"
+        )
+
+
+if __name__ == "__main__":
+    main()
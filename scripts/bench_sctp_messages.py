@@ -0,0 +1,115 @@
+"""
+Benchmark for small messages sent over :class:`vsaiortc.RTCSctpTransport`.
+
+Two SCTP transports are connected over the loopback interface, and a data
+channel sends a number of small messages in bursts. The time until all of
+them are received gives the number of messages per second, along with the
+number of SCTP packets the sender needed.
+
+Usage: python scripts/bench_sctp_messages.py [--messages N] [--size N] [--burst N]
+"""
+
+import argparse
+import asyncio
+import time
+
+from vsaiortc.rtcdatachannel import RTCDataChannel, RTCDataChannelParameters
+from vsaiortc.rtcdtlstransport import RTCCertificate, RTCDtlsTransport
+from vsaiortc.rtcicetransport import RTCIceGatherer, RTCIceTransport
+from vsaiortc.rtcsctptransport import RTCSctpTransport
+
+
+async def connect() -> tuple[RTCDtlsTransport, RTCDtlsTransport]:
+    gatherer1, gatherer2 = RTCIceGatherer(), RTCIceGatherer()
+    ice1, ice2 = RTCIceTransport(gatherer1), RTCIceTransport(gatherer2)
+    await asyncio.gather(gatherer1.gather(), gatherer2.gather())
+    for candidate in gatherer2.getLocalCandidates():
+        await ice1.addRemoteCandidate(candidate)
+    for candidate in gatherer1.getLocalCandidates():
+        await ice2.addRemoteCandidate(candidate)
+    await asyncio.gather(
+        ice1.start(gatherer2.getLocalParameters()),
+        ice2.start(gatherer1.getLocalParameters()),
+    )
+
+    dtls1 = RTCDtlsTransport(ice1, [RTCCertificate.generateCertificate()])
+    dtls2 = RTCDtlsTransport(ice2, [RTCCertificate.generateCertificate()])
+    await asyncio.gather(
+        dtls1.start(dtls2.getLocalParameters()),
+        dtls2.start(dtls1.getLocalParameters()),
+    )
+    return dtls1, dtls2
+
+
+async def run(count: int, size: int, burst: int) -> tuple[int, int, float]:
+    dtls1, dtls2 = await connect()
+    sctp1 = RTCSctpTransport(dtls1)
+    sctp2 = RTCSctpTransport(dtls2)
+    await sctp1.start(sctp2.getCapabilities(), sctp2.port)
+    await sctp2.start(sctp1.getCapabilities(), sctp1.port)
+
+    done = asyncio.Event()
+    received = 0
+
+    @sctp2.on("datachannel")
+    def on_datachannel(channel: RTCDataChannel) -> None:
+        @channel.on("message")
+        def on_message(message: bytes) -> None:
+            nonlocal received
+            received += 1
+            if received == count:
+                done.set()
+
+    channel = RTCDataChannel(sctp1, RTCDataChannelParameters(label="bench"))
+    while channel.readyState != "open":
+        await asyncio.sleep(0.01)
+
+    # count the packets sent from now on
+    packets = 0
+    send_data = dtls1._send_data
+
+    async def counting_send_data(data: bytes) -> None:
+        nonlocal packets
+        packets += 1
+        await send_data(data)
+
+    dtls1._send_data = counting_send_data  # type: ignore[method-assign]
+
+    message = bytes(size)
+    start = time.perf_counter()
+    for sent in range(0, count, burst):
+        for i in range(min(burst, count - sent)):
+            channel.send(message)
+        while channel.bufferedAmount > 0:
+            await asyncio.sleep(0)
+    try:
+        await asyncio.wait_for(done.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - start
+
+    await sctp1.stop()
+    await sctp2.stop()
+    await dtls1.stop()
+    await dtls2.stop()
+    await dtls1.transport.stop()
+    await dtls2.transport.stop()
+    return received, packets, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SCTP small messages benchmark")
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--size", type=int, default=32)
+    parser.add_argument("--burst", type=int, default=64)
+    args = parser.parse_args()
+
+    received, packets, elapsed = asyncio.run(run(args.messages, args.size, args.burst))
+    print(
+        f"{received:7d} messages of {args.size} bytes in {packets:7d} packets "
+        f"{elapsed:6.2f} s {received / elapsed:9.0f} messages/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
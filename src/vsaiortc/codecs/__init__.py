@@ -13,9 +13,21 @@ from .base import Decoder, Encoder
 from .g711 import PcmaDecoder, PcmaEncoder, PcmuDecoder, PcmuEncoder
 from .g722 import G722Decoder as G722Decoder
 from .g722 import G722Encoder
-from .h264 import H264Decoder, H264Encoder, h264_depayload
+from .h264 import (
+    H264Decoder,
+    H264Encoder,
+    h264_depayload,
+    h264_depayload_with_boundaries,
+    h264_is_keyframe,
+)
 from .opus import OpusDecoder, OpusEncoder
-from .vpx import Vp8Decoder, Vp8Encoder, vp8_depayload
+from .vpx import (
+    Vp8Decoder,
+    Vp8Encoder,
+    vp8_depayload,
+    vp8_depayload_with_boundaries,
+    vp8_is_keyframe,
+)
 
 # The clockrate for G.722 is 8kHz even though the sampling rate is 16kHz.
 # See https://datatracker.ietf.org/doc/html/rfc3551
@@ -59,6 +71,16 @@ HEADER_EXTENSIONS: dict[str, list[RTCRtpHeaderExtensionParameters]] = {
         RTCRtpHeaderExtensionParameters(
             id=3, uri="http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time"
         ),
+        RTCRtpHeaderExtensionParameters(
+            id=4,
+            uri="http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01",
+        ),
+        RTCRtpHeaderExtensionParameters(
+            id=5, uri="urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+        ),
+        RTCRtpHeaderExtensionParameters(
+            id=6, uri="urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id"
+        ),
     ],
 }
 
@@ -81,6 +103,7 @@ def init_codecs() -> None:
                     RTCRtcpFeedback(type="nack"),
                     RTCRtcpFeedback(type="nack", parameter="pli"),
                     RTCRtcpFeedback(type="goog-remb"),
+                    RTCRtcpFeedback(type="transport-cc"),
                 ],
                 parameters=parameters or {},
             ),
@@ -114,6 +137,23 @@ def depayload(codec: RTCRtpCodecParameters, payload: bytes) -> bytes:
         return payload
 
 
+def depayload_with_boundaries(
+    codec: RTCRtpCodecParameters, payload: bytes
+) -> tuple[bytes, Optional[bool], bool]:
+    """
+    Depayload an RTP payload, and look at the codec-specific frame boundaries.
+
+    Returns the depayloaded data, whether the packet starts a frame (`None`
+    if the codec does not tell) and whether the packet can end a frame.
+    """
+    if codec.name == "VP8":
+        return vp8_depayload_with_boundaries(payload)
+    elif codec.name == "H264":
+        return h264_depayload_with_boundaries(payload)
+    else:
+        return payload, None, True
+
+
 def get_capabilities(kind: str) -> RTCRtpCapabilities:
     if kind not in CODECS:
         raise ValueError(f"cannot get capabilities for unknown media {kind}")
@@ -150,9 +190,8 @@ def get_decoder(codec: RTCRtpCodecParameters) -> Decoder:
     mimeType = codec.mimeType.lower()
 
     if mimeType == "audio/opus":
-        if "ptime" not in codec.parameters:
-            codec.parameters["ptime"] = 20
-        return OpusDecoder(int(codec.parameters["ptime"]) / 1000, codec.clockRate)
+        ptime = codec.parameters.get("ptime", 20)
+        return OpusDecoder(int(ptime) / 1000, codec.clockRate)
     elif mimeType == "audio/pcma":
         return PcmaDecoder()
     elif mimeType == "audio/pcmu":
@@ -184,6 +223,20 @@ def get_encoder(codec: RTCRtpCodecParameters) -> Encoder:
         raise ValueError(f"No encoder found for MIME type `{mimeType}`")
 
 
+def is_keyframe(codec: RTCRtpCodecParameters, data: bytes) -> bool:
+    """
+    Tell whether depayloaded data can be decoded without previous frames.
+
+    Audio frames are always independent.
+    """
+    if codec.name == "VP8":
+        return vp8_is_keyframe(data)
+    elif codec.name == "H264":
+        return h264_is_keyframe(data)
+    else:
+        return True
+
+
 def is_rtx(codec: Union[RTCRtpCodecCapability, RTCRtpCodecParameters]) -> bool:
     return codec.name.lower() == "rtx"
 
@@ -24,6 +24,7 @@ MAX_BITRATE = 3000000  # 3 Mbps
 MAX_FRAME_RATE = 30
 PACKET_MAX = 1300
 
+NAL_TYPE_IDR = 5
 NAL_TYPE_FU_A = 28
 NAL_TYPE_STAP_A = 24
 
@@ -43,8 +44,9 @@ def pairwise(iterable: Sequence[T]) -> Iterator[tuple[T, T]]:
 
 
 class H264PayloadDescriptor:
-    def __init__(self, first_fragment: bool) -> None:
+    def __init__(self, first_fragment: bool, last_fragment: bool = True) -> None:
         self.first_fragment = first_fragment
+        self.last_fragment = last_fragment
 
     def __repr__(self) -> str:
         return f"H264PayloadDescriptor(FF={self.first_fragment})"
@@ -68,6 +70,7 @@ class H264PayloadDescriptor:
             # fragmentation unit
             original_nal_type = data[pos] & 0x1F
             first_fragment = bool(data[pos] & 0x80)
+            last_fragment = bool(data[pos] & 0x40)
             pos += 1
 
             if first_fragment:
@@ -76,7 +79,7 @@ class H264PayloadDescriptor:
                 output += original_nal_header
             output += data[pos:]
 
-            obj = cls(first_fragment=first_fragment)
+            obj = cls(first_fragment=first_fragment, last_fragment=last_fragment)
         elif nal_type == NAL_TYPE_STAP_A:
             # single time aggregation packet
             offsets = []
@@ -317,3 +320,28 @@ class H264Encoder(Encoder):
 def h264_depayload(payload: bytes) -> bytes:
     descriptor, data = H264PayloadDescriptor.parse(payload)
     return data
+
+
+def h264_is_keyframe(data: bytes) -> bool:
+    """
+    Tell whether a depayloaded H.264 access unit contains an IDR picture.
+    """
+    return any(
+        nal and nal[0] & 0x1F == NAL_TYPE_IDR
+        for nal in H264Encoder._split_bitstream(data)
+    )
+
+
+def h264_depayload_with_boundaries(
+    payload: bytes,
+) -> tuple[bytes, Optional[bool], bool]:
+    """
+    Depayload an H.264 packet, telling whether it may start a frame and
+    whether it ends a NAL unit.
+
+    A frame can contain several NAL units, so a packet starting a NAL unit
+    does not necessarily start a frame.
+    """
+    descriptor, data = H264PayloadDescriptor.parse(payload)
+    frame_start = None if descriptor.first_fragment else False
+    return data, frame_start, descriptor.last_fragment
@@ -1,7 +1,9 @@
+import bisect
 import fractions
+import time
 from typing import Optional, cast
 
-from av import AudioFrame, AudioResampler, CodecContext
+from av import AudioCodecContext, AudioFrame, AudioResampler, CodecContext
 from av.frame import Frame
 from av.packet import Packet
 
@@ -13,6 +15,20 @@ SAMPLE_RATE = 48000
 SAMPLES_PER_FRAME = 960
 TIME_BASE = fractions.Fraction(1, SAMPLE_RATE)
 
+# the longest gap which is concealed, in frames
+MAX_CONCEALED_FRAMES = 5
+
+# the expected packet loss percentage from which in-band FEC is enabled
+FEC_MIN_PACKET_LOSS = 1
+
+# the expected packet loss percentages the encoder is configured with, the
+# reported packet loss is rounded up to one of them
+PACKET_LOSS_BUCKETS = (0, 5, 10, 20, 40, 100)
+
+# reconfiguring the encoder resets its state, so it is done at most this
+# often, in seconds
+RECONFIGURE_MIN_INTERVAL = 10.0
+
 
 class OpusDecoder(Decoder):
     def __init__(
@@ -32,6 +48,12 @@ class OpusDecoder(Decoder):
         self.codec.layout = "stereo"
         self.codec.sample_rate = self.sample_rate
 
+        # packet loss concealment
+        self.concealed_samples = 0
+        self._next_timestamp: Optional[int] = None
+        self._samples = 0
+        self._toc: Optional[int] = None
+
     def _build_ptime(self, audio_ptime: float) -> float:
         # round ptime to multiple of 20ms (old logic preserved)
         if (audio_ptime / 10) % 2 == 0:
@@ -40,21 +62,48 @@ class OpusDecoder(Decoder):
             return audio_ptime + 10
 
     def decode(self, encoded_frame: JitterFrame) -> list[Frame]:
-        packet = Packet(encoded_frame.data)
-        packet.pts = encoded_frame.timestamp
+        frames = self._conceal(encoded_frame.timestamp)
+        frames += self._decode(encoded_frame.data, encoded_frame.timestamp)
+        if encoded_frame.data:
+            self._toc = encoded_frame.data[0]
+        if frames:
+            self._samples = frames[-1].samples
+            self._next_timestamp = encoded_frame.timestamp + self._samples
+        return cast(list[Frame], frames)
+
+    def _conceal(self, timestamp: int) -> list[AudioFrame]:
+        """
+        Synthesize the audio of the frames missing before `timestamp`.
+
+        A packet holding just the table-of-contents byte of the previous
+        packet makes libopus run its packet loss concealment for one frame.
+        """
+        if self._next_timestamp is None or self._toc is None or not self._samples:
+            return []
+
+        missing = min(
+            (timestamp - self._next_timestamp) // self._samples, MAX_CONCEALED_FRAMES
+        )
+        frames = []
+        for i in range(missing):
+            frames += self._decode(
+                bytes([self._toc & 0xFC]), self._next_timestamp + i * self._samples
+            )
+        self.concealed_samples += sum(frame.samples for frame in frames)
+        return frames
+
+    def _decode(self, data: bytes, timestamp: int) -> list[AudioFrame]:
+        packet = Packet(data)
+        packet.pts = timestamp
         packet.time_base = self.time_base
-        return cast(list[Frame], self.codec.decode(packet))
+        return self.codec.decode(packet)
 
 
 class OpusEncoder(Encoder):
     def __init__(self) -> None:
-        self.codec = CodecContext.create("libopus", "w")
-        self.codec.bit_rate = 96000
-        self.codec.format = "s16"
-        self.codec.layout = "stereo"
-        self.codec.options = {"application": "voip"}
-        self.codec.sample_rate = SAMPLE_RATE
-        self.codec.time_base = TIME_BASE
+        self.__packet_loss = 0
+        self.__reconfigure_time: Optional[float] = None
+        self.codec = self._create_codec(self.__packet_loss)
 
         # Create our own resampler to control the frame size.
         self.resampler = AudioResampler(
@@ -73,6 +122,20 @@ class OpusEncoder(Encoder):
         assert frame.format.name == "s16"
         assert frame.layout.name in ["mono", "stereo"]
 
+        # We only reconfigure the encoder if the expected packet loss moves to
+        # another bucket, and not more often than every few seconds.
+        packet_loss = PACKET_LOSS_BUCKETS[
+            bisect.bisect_left(PACKET_LOSS_BUCKETS, self.packet_loss)
+        ]
+        if packet_loss != self.codec_packet_loss:
+            now = time.monotonic()
+            if (
+                self.__reconfigure_time is None
+                or now - self.__reconfigure_time >= RECONFIGURE_MIN_INTERVAL
+            ):
+                self.codec = self._create_codec(packet_loss)
+                self.__reconfigure_time = now
+
         packets = []
         for frame in self.resampler.resample(frame):
             packets += self.codec.encode(frame)
@@ -88,3 +151,31 @@ class OpusEncoder(Encoder):
     def pack(self, packet: Packet) -> tuple[list[bytes], int]:
         timestamp = convert_timebase(packet.pts, packet.time_base, TIME_BASE)
         return [bytes(packet)], timestamp
+
+    @property
+    def packet_loss(self) -> int:
+        """
+        Expected packet loss percentage, as reported by the receiver.
+
+        In-band forward error correction is enabled when packets are lost.
+        """
+        return self.__packet_loss
+
+    @packet_loss.setter
+    def packet_loss(self, packet_loss: int) -> None:
+        self.__packet_loss = max(0, min(packet_loss, 100))
+
+    def _create_codec(self, packet_loss: int) -> AudioCodecContext:
+        codec = CodecContext.create("libopus", "w")
+        codec.bit_rate = 96000
+        codec.format = "s16"
+        codec.layout = "stereo"
+        codec.options = {
+            "application": "voip",
+            "fec": "1" if packet_loss >= FEC_MIN_PACKET_LOSS else "0",
+            "packet_loss": str(packet_loss),
+        }
+        codec.sample_rate = SAMPLE_RATE
+        codec.time_base = TIME_BASE
+        self.codec_packet_loss = packet_loss
+        return codec
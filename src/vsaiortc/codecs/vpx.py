@@ -284,3 +284,22 @@ class Vp8Encoder(Encoder):
 def vp8_depayload(payload: bytes) -> bytes:
     descriptor, data = VpxPayloadDescriptor.parse(payload)
     return data
+
+
+def vp8_is_keyframe(data: bytes) -> bool:
+    """
+    Tell whether a depayloaded VP8 frame is a key frame.
+
+    The frame tag starts with an inverse key frame flag.
+    """
+    return bool(data) and not data[0] & 0x01
+
+
+def vp8_depayload_with_boundaries(payload: bytes) -> tuple[bytes, Optional[bool], bool]:
+    """
+    Depayload a VP8 packet, telling whether it starts a frame.
+
+    The first packet of a frame starts partition 0.
+    """
+    descriptor, data = VpxPayloadDescriptor.parse(payload)
+    return data, bool(descriptor.partition_start) and descriptor.partition_id == 0, True
@@ -14,6 +14,7 @@ from av.frame import Frame
 from av.packet import Packet
 from av.video.stream import VideoStream
 
+from ..handoff import HandoffQueue
 from ..mediastreams import AUDIO_PTIME, MediaStreamError, MediaStreamTrack
 
 logger = logging.getLogger(__name__)
@@ -87,7 +88,6 @@ class MediaBlackhole:
 
 
 def player_worker_decode(
-    loop: asyncio.AbstractEventLoop,
     container: av.container.InputContainer,
     streams: list[_AudioOrVideoStream],
     audio_track: "PlayerStreamTrack",
@@ -122,9 +122,9 @@ def player_worker_decode(
                 container.seek(0)
                 continue
             if audio_track:
-                asyncio.run_coroutine_threadsafe(audio_track._queue.put(None), loop)
+                audio_track._queue.close()
             if video_track:
-                asyncio.run_coroutine_threadsafe(video_track._queue.put(None), loop)
+                video_track._queue.close()
             break
 
         # read up to 1 second ahead
@@ -141,7 +141,7 @@ def player_worker_decode(
                 audio_samples += frame.samples
 
                 frame_time = frame.time
-                asyncio.run_coroutine_threadsafe(audio_track._queue.put(frame), loop)
+                audio_track._queue.put(frame)
         elif isinstance(frame, VideoFrame) and video_track:
             if frame.pts is None:  # pragma: no cover
                 logger.warning(
@@ -155,11 +155,10 @@ def player_worker_decode(
             frame.pts -= video_first_pts
 
             frame_time = frame.time
-            asyncio.run_coroutine_threadsafe(video_track._queue.put(frame), loop)
+            video_track._queue.put(frame)
 
 
 def player_worker_demux(
-    loop: asyncio.AbstractEventLoop,
     container: av.container.InputContainer,
     streams: list[_AudioOrVideoStream],
     audio_track: "PlayerStreamTrack",
@@ -185,9 +184,9 @@ def player_worker_demux(
                 container.seek(0)
                 continue
             if audio_track:
-                asyncio.run_coroutine_threadsafe(audio_track._queue.put(None), loop)
+                audio_track._queue.close()
             if video_track:
-                asyncio.run_coroutine_threadsafe(video_track._queue.put(None), loop)
+                video_track._queue.close()
             break
 
         # read up to 1 second ahead
@@ -218,7 +217,7 @@ def player_worker_demux(
             and packet.time_base is not None
         ):
             frame_time = int(packet.pts * packet.time_base)
-            asyncio.run_coroutine_threadsafe(track._queue.put(packet), loop)
+            track._queue.put(packet)
 
 
 class PlayerStreamTrack(MediaStreamTrack):
@@ -226,7 +225,7 @@ class PlayerStreamTrack(MediaStreamTrack):
         super().__init__()
         self.kind = kind
         self._player: Optional[MediaPlayer] = player
-        self._queue: asyncio.Queue[Union[Frame, Packet]] = asyncio.Queue()
+        self._queue: HandoffQueue[Union[Frame, Packet]] = HandoffQueue()
         self._start: Optional[float] = None
 
     async def recv(self) -> Union[Frame, Packet]:
@@ -372,7 +371,6 @@ class MediaPlayer:
                 name="media-player",
                 target=player_worker_decode if self.__decode else player_worker_demux,
                 args=(
-                    asyncio.get_event_loop(),
                     self.__container,
                     self.__streams,
                     self.__audio,
@@ -0,0 +1,209 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from ..rtcconfiguration import RTCConfiguration
+from ..rtcpeerconnection import RTCPeerConnection
+
+logger = logging.getLogger(__name__)
+
+# how long to wait before retrying when a connection could not be prepared
+RETRY_DELAY = 1.0
+
+# upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class LatencyHistogram:
+    """
+    Counts durations in fixed buckets.
+
+    :attr:`counts` has one entry per bucket of :data:`LATENCY_BUCKETS`, plus
+    a last one for longer durations.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    @property
+    def mean(self) -> Optional[float]:
+        """
+        The mean duration in seconds, or `None` if nothing was measured.
+        """
+        return self.total / self.count if self.count else None
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        self.total += duration
+
+
+class RTCPeerConnectionPool:
+    """
+    Keeps :class:`~vsaiortc.RTCPeerConnection` instances ready for use, with
+    the ICE candidates of their first transports already gathered.
+
+    Creating a connection and gathering its candidates takes place in the
+    background, so that :meth:`acquire` can hand out a connection straight
+    away. Connections which stay in the pool for longer than `ttl` are closed
+    and replaced, as their candidates may no longer be valid.
+
+    .. code-block:: python
+
+        pool = RTCPeerConnectionPool(size=8)
+        await pool.start()
+
+        pc = pool.acquire()
+
+    :param size: The number of connections kept ready.
+    :param configuration: The :class:`~vsaiortc.RTCConfiguration` of the
+                          connections.
+    :param ttl: How long a connection can stay in the pool, in seconds.
+    :param transports: The number of transports prepared for each connection,
+                       more than one is only useful if media is not bundled.
+    """
+
+    def __init__(
+        self,
+        size: int = 4,
+        configuration: Optional[RTCConfiguration] = None,
+        ttl: float = 60.0,
+        transports: int = 1,
+    ) -> None:
+        self.configuration = configuration
+        self.size = size
+        self.transports = transports
+        self.ttl = ttl
+
+        self.__closing: set[asyncio.Future[None]] = set()
+        self.__idle: deque[tuple[RTCPeerConnection, float]] = deque()
+        self.__task: Optional[asyncio.Future[None]] = None
+        self.__wakeup: Optional[asyncio.Event] = None
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.acquire_latency = LatencyHistogram()
+        self.warmup_latency = LatencyHistogram()
+
+    @property
+    def hit_rate(self) -> Optional[float]:
+        """
+        The share of :meth:`acquire` calls which were served from the pool, or
+        `None` if no connection was acquired.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+    @property
+    def idle(self) -> int:
+        """
+        The number of connections ready to be acquired.
+        """
+        return len(self.__idle)
+
+    def acquire(self) -> RTCPeerConnection:
+        """
+        Return a connection from the pool, or a new one if the pool is empty.
+
+        The caller owns the connection and is responsible for closing it.
+        """
+        start = time.monotonic()
+        pc = None
+        while self.__idle:
+            pc, created = self.__idle.popleft()
+            if start - created < self.ttl:
+                break
+            self.__recycle(pc)
+            pc = None
+
+        if pc is None:
+            self.misses += 1
+            pc = RTCPeerConnection(self.configuration)
+        else:
+            self.hits += 1
+        self.acquire_latency.add(time.monotonic() - start)
+        if self.__wakeup is not None:
+            self.__wakeup.set()
+        return pc
+
+    async def start(self) -> None:
+        """
+        Start filling the pool in the background.
+        """
+        if self.__task is None:
+            self.__wakeup = asyncio.Event()
+            self.__task = asyncio.ensure_future(self.__run(self.__wakeup))
+
+    async def stop(self) -> None:
+        """
+        Stop filling the pool and close the connections it holds, waiting for
+        the expired connections which are still closing.
+        """
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+            self.__wakeup = None
+
+        while self.__idle:
+            pc, _ = self.__idle.popleft()
+            await pc.close()
+        if self.__closing:
+            await asyncio.gather(*self.__closing)
+
+    def __recycle(self, pc: RTCPeerConnection) -> None:
+        self.recycled += 1
+        task = asyncio.ensure_future(pc.close())
+        self.__closing.add(task)
+        task.add_done_callback(self.__closing.discard)
+
+    async def __run(self, wakeup: asyncio.Event) -> None:
+        while True:
+            # replace expired connections
+            now = time.monotonic()
+            while self.__idle and now - self.__idle[0][1] >= self.ttl:
+                self.__recycle(self.__idle.popleft()[0])
+
+            # fill the pool
+            missing = self.size - len(self.__idle)
+            if missing > 0:
+                results = await asyncio.gather(*(self.__warm() for i in range(missing)))
+                if not all(results):
+                    await asyncio.sleep(RETRY_DELAY)
+                continue
+
+            # wait for a connection to be acquired or to expire
+            wakeup.clear()
+            handle = None
+            if self.__idle:
+                handle = asyncio.get_running_loop().call_later(
+                    self.__idle[0][1] + self.ttl - now, wakeup.set
+                )
+            try:
+                await wakeup.wait()
+            finally:
+                if handle is not None:
+                    handle.cancel()
+
+    async def __warm(self) -> bool:
+        start = time.monotonic()
+        pc = RTCPeerConnection(self.configuration)
+        try:
+            await pc._prewarm(self.transports)
+        except Exception:
+            logger.exception("RTCPeerConnectionPool failed to prepare connection")
+            await pc.close()
+            return False
+        self.warmup_latency.add(time.monotonic() - start)
+        self.__idle.append((pc, time.monotonic()))
+        return True
@@ -0,0 +1,151 @@
+import errno
+import logging
+import socket
+import struct
+import sys
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+# UDP generic segmentation offload, see udp(7)
+UDP_SEGMENT = 103
+UDP_MAX_SEGMENTS = 64
+UDP_MAX_GSO_SIZE = 65000
+
+# the largest datagram which can be read from a socket
+UDP_MAX_DATAGRAM_SIZE = 65535
+
+# errors which mean the kernel or the NIC does not support segmentation
+GSO_UNSUPPORTED_ERRORS = frozenset(
+    [errno.EINVAL, errno.EIO, errno.ENOPROTOOPT, errno.EOPNOTSUPP]
+)
+
+GSO_SUPPORTED = sys.platform == "linux" and hasattr(socket.socket, "sendmsg")
+
+
+def _gso_runs(packets: list[bytes]) -> list[tuple[int, int]]:
+    """
+    Split `packets` into runs which can be sent with a single GSO send.
+
+    All the packets in a run have the same size, except for the last one
+    which may be shorter.
+    """
+    runs = []
+    start = 0
+    count = len(packets)
+    while start < count:
+        segment_size = len(packets[start])
+        end = start + 1
+        total = segment_size
+        while (
+            end < count
+            and end - start < UDP_MAX_SEGMENTS
+            and total + len(packets[end]) <= UDP_MAX_GSO_SIZE
+        ):
+            size = len(packets[end])
+            if size > segment_size:
+                break
+            total += size
+            end += 1
+            if size < segment_size:
+                break
+        runs.append((start, end))
+        start = end
+    return runs
+
+
+class DatagramSender:
+    """
+    Sends batches of datagrams to `addr` over an asyncio datagram `transport`.
+
+    On Linux, runs of equally sized packets are handed to the kernel in a
+    single `sendmsg` call using UDP generic segmentation offload, on a
+    duplicate of the transport's socket which :meth:`close` releases. If the
+    kernel rejects segmentation it is turned off for this sender only.
+    Otherwise, or if the socket is not directly available, each packet is sent
+    with :meth:`asyncio.DatagramTransport.sendto`.
+    """
+
+    def __init__(self, transport: Any, addr: tuple[str, int]) -> None:
+        self.addr = addr
+        self.gso_enabled = False
+        self.transport = transport
+        self._sock: Optional[socket.socket] = None
+
+        if GSO_SUPPORTED:
+            sock = transport.get_extra_info("socket")
+            if sock is not None:
+                self._sock = sock.dup()
+                self.gso_enabled = True
+
+    def close(self) -> None:
+        """
+        Release the duplicate socket.
+        """
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        self.gso_enabled = False
+
+    def send(self, packets: list[bytes]) -> None:
+        """
+        Send several datagrams.
+        """
+        # writing to the socket directly would overtake data asyncio has buffered
+        if (
+            not self.gso_enabled
+            or len(packets) < 2
+            or self.transport.get_write_buffer_size()
+        ):
+            for data in packets:
+                self.transport.sendto(data, self.addr)
+            return
+
+        for start, end in _gso_runs(packets):
+            if end - start > 1 and self.gso_enabled:
+                try:
+                    self._sendmsg_gso(packets[start:end])
+                    continue
+                except (BlockingIOError, InterruptedError):
+                    # let asyncio buffer the remaining packets
+                    for data in packets[start:]:
+                        self.transport.sendto(data, self.addr)
+                    return
+                except OSError as exc:
+                    if exc.errno in GSO_UNSUPPORTED_ERRORS:
+                        logger.debug(
+                            "UDP segmentation offload is not available: %s", exc
+                        )
+                        self.close()
+
+            for data in packets[start:end]:
+                self.transport.sendto(data, self.addr)
+
+    def _sendmsg_gso(self, packets: list[bytes]) -> None:
+        assert self._sock is not None
+        self._sock.sendmsg(
+            [b"".join(packets)],
+            [(socket.SOL_UDP, UDP_SEGMENT, struct.pack("=H", len(packets[0])))],
+            0,
+            self.addr,
+        )
+
+
+def receive_datagrams(sock: socket.socket, max_count: int) -> list[tuple[bytes, Any]]:
+    """
+    Read up to `max_count` datagrams which are already waiting on the
+    non-blocking socket `sock`.
+
+    Python does not expose `recvmmsg`, so the datagrams are read one by one,
+    but all of them are handled within a single event loop callback instead
+    of waking up the event loop for each one. Reading stops as soon as the
+    socket has no more datagrams or an error occurs, errors are left for
+    asyncio to report on the next readiness event.
+    """
+    datagrams: list[tuple[bytes, Any]] = []
+    while len(datagrams) < max_count:
+        try:
+            datagrams.append(sock.recvfrom(UDP_MAX_DATAGRAM_SIZE))
+        except OSError:
+            break
+    return datagrams
@@ -0,0 +1,229 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+from .codecs import get_decoder
+from .codecs.base import Decoder
+from .jitterbuffer import JitterFrame
+from .rtcrtpparameters import RTCRtpCodecParameters
+
+if TYPE_CHECKING:
+    from .rtcrtpreceiver import RemoteStreamTrack
+
+logger = logging.getLogger(__name__)
+
+DecoderTask = Optional[tuple[RTCRtpCodecParameters, JitterFrame]]
+
+
+class DecoderStream:
+    """
+    The encoded frames of one :class:`RTCRtpReceiver` waiting to be decoded.
+
+    Frames are decoded in the order in which they are submitted. While a stream
+    has frames in flight it is pinned to a single worker of the scheduler.
+    """
+
+    def __init__(
+        self,
+        scheduler: "DecoderScheduler",
+        track: "RemoteStreamTrack",
+    ) -> None:
+        self._closed = False
+        self._codec_name: Optional[str] = None
+        self._decoder: Optional[Decoder] = None
+        self._scheduler = scheduler
+        self._tasks: deque[DecoderTask] = deque()
+        self._track = track
+        self._worker: Optional[DecoderWorker] = None
+
+        # stats
+        self.frames_decoded = 0
+        self.total_decode_time = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of encoded frames waiting to be decoded.
+        """
+        with self._scheduler._lock:
+            return sum(1 for task in self._tasks if task is not None)
+
+    def put(self, codec: RTCRtpCodecParameters, encoded_frame: JitterFrame) -> None:
+        """
+        Submit an encoded frame for decoding.
+        """
+        self._scheduler._submit(self, (codec, encoded_frame))
+
+    def close(self) -> None:
+        """
+        Stop the stream once the frames already submitted are decoded.
+
+        This in turn ends the track.
+        """
+        self._scheduler._submit(self, None)
+
+    def _run(self, task: DecoderTask) -> None:
+        """
+        Decode a single frame, this runs in a worker thread.
+        """
+        if task is None:
+            # inform the track that is has ended
+            self._decoder = None
+            self._track._queue.close()
+            return
+        codec, encoded_frame = task
+
+        if codec.name != self._codec_name:
+            self._decoder = get_decoder(codec)
+            self._codec_name = codec.name
+
+        start = time.perf_counter()
+        frames = self._decoder.decode(encoded_frame)
+        self.total_decode_time += time.perf_counter() - start
+
+        for frame in frames:
+            # pass the decoded frame to the track
+            self.frames_decoded += 1
+            self._track._put_frame(frame)
+
+
+class DecoderWorker:
+    """
+    A thread of a :class:`DecoderScheduler`.
+
+    The streams pinned to the worker take turns, one frame at a time.
+    """
+
+    def __init__(self, scheduler: "DecoderScheduler", index: int) -> None:
+        self.pending = 0
+        self.ready: deque[DecoderStream] = deque()
+
+        self._condition = threading.Condition(scheduler._lock)
+        self._scheduler = scheduler
+        self._thread = threading.Thread(
+            target=self._run, name=f"decoder-{index}", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        lock = self._scheduler._lock
+        while True:
+            with lock:
+                while not self.ready:
+                    self._condition.wait()
+                stream = self.ready.popleft()
+                task = stream._tasks.popleft()
+                self.pending -= 1
+
+            try:
+                stream._run(task)
+            except Exception:
+                logger.exception("DecoderScheduler failed to decode frame")
+
+            with lock:
+                if stream._tasks:
+                    # go to the back of the line, to be fair to other streams
+                    self.ready.append(stream)
+                else:
+                    stream._worker = None
+
+
+class DecoderScheduler:
+    """
+    Decodes the frames of many :class:`RTCRtpReceiver` instances using a fixed
+    number of threads.
+
+    Each receiver submits its frames to a :class:`DecoderStream`. A stream is
+    assigned to the least busy worker when it has frames to decode, and stays
+    on that worker until they are all decoded, so frames are decoded in order.
+    The streams of a worker are served in turn, one frame at a time.
+
+    By default all receivers share a process-wide scheduler, see
+    :func:`get_decoder_scheduler`.
+
+    :param workers: The number of decoding threads. If `None`, one thread per
+                    CPU is used.
+    """
+
+    def __init__(self, workers: Optional[int] = None) -> None:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("A decoder scheduler needs at least one worker")
+
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._workers: list[DecoderWorker] = []
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of encoded frames waiting to be decoded, for all streams.
+        """
+        with self._lock:
+            return sum(worker.pending for worker in self._workers)
+
+    def open_stream(self, track: "RemoteStreamTrack") -> DecoderStream:
+        """
+        Create a stream whose decoded frames are delivered to `track`.
+        """
+        return DecoderStream(self, track)
+
+    def _submit(self, stream: DecoderStream, task: DecoderTask) -> None:
+        with self._lock:
+            if stream._closed:
+                return
+            if task is None:
+                stream._closed = True
+            stream._tasks.append(task)
+
+            worker = stream._worker
+            if worker is None:
+                worker = self.__least_busy_worker()
+                stream._worker = worker
+                worker.ready.append(stream)
+                worker._condition.notify()
+            worker.pending += 1
+
+    def __least_busy_worker(self) -> DecoderWorker:
+        # workers are started on demand
+        idle = [worker for worker in self._workers if not worker.pending]
+        if idle:
+            return idle[0]
+        elif len(self._workers) < self.workers:
+            worker = DecoderWorker(self, len(self._workers))
+            self._workers.append(worker)
+            return worker
+        else:
+            return min(self._workers, key=lambda worker: worker.pending)
+
+
+_scheduler: Optional[DecoderScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_decoder_scheduler() -> DecoderScheduler:
+    """
+    Return the process-wide :class:`DecoderScheduler`, creating it if needed.
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DecoderScheduler()
+        return _scheduler
+
+
+def set_decoder_scheduler(scheduler: DecoderScheduler) -> None:
+    """
+    Replace the process-wide :class:`DecoderScheduler`.
+
+    Receivers which are already running keep using the previous scheduler.
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        _scheduler = scheduler
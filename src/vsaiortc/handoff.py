@@ -0,0 +1,136 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Generic, Literal, Optional, TypeVar
+
+T = TypeVar("T")
+
+DropPolicy = Literal["drop-oldest", "drop-newest"]
+
+
+class HandoffQueue(Generic[T]):
+    """
+    A queue which hands items from a producer thread to a coroutine running in
+    an event loop.
+
+    The producer calls :meth:`put` from any thread, without going through the
+    event loop. The event loop is only woken up when the consumer is waiting,
+    and once for all the items put before the consumer runs again.
+
+    Once :meth:`close` has been called and the queue is drained, :meth:`get`
+    returns `None`.
+
+    :param maxsize: The maximum number of items in the queue, or `0` if the
+                    queue is unbounded.
+    :param policy: What to do when the queue is full, either drop the oldest
+                   item (`'drop-oldest'`) or the item being put
+                   (`'drop-newest'`).
+    """
+
+    def __init__(self, maxsize: int = 0, policy: DropPolicy = "drop-oldest") -> None:
+        if policy not in ("drop-oldest", "drop-newest"):
+            raise ValueError(f"Unknown drop policy '{policy}'")
+
+        self.dropped = 0
+        self.maxsize = maxsize
+        self.policy = policy
+
+        self._closed = False
+        self._items: deque[T] = deque()
+        self._lock = threading.Lock()
+        self._waiter: Optional[asyncio.Future[None]] = None
+        self._wakeup_scheduled = False
+
+    def close(self) -> None:
+        """
+        Signal the consumer that no more items will be put.
+        """
+        with self._lock:
+            self._closed = True
+            self.__wakeup()
+
+    def full(self) -> bool:
+        return self.maxsize > 0 and len(self._items) >= self.maxsize
+
+    def put(self, item: T) -> bool:
+        """
+        Put an item in the queue, this can be called from any thread.
+
+        Returns `False` if the item was dropped.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            if self.full():
+                self.dropped += 1
+                if self.policy == "drop-newest":
+                    return False
+                self._items.popleft()
+            self._items.append(item)
+            self.__wakeup()
+        return True
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def resize(self, maxsize: int) -> None:
+        """
+        Change the maximum number of items, dropping the oldest items if needed.
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            while self.full() and len(self._items) > maxsize:
+                self._items.popleft()
+                self.dropped += 1
+
+    async def get(self) -> Optional[T]:
+        """
+        Remove and return an item, waiting until one is available.
+        """
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._items.popleft()
+                elif self._closed:
+                    return None
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiter = waiter
+
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if self._waiter is waiter:
+                        self._waiter = None
+
+    def get_nowait(self) -> Optional[T]:
+        """
+        Remove and return an item if one is immediately available.
+
+        Raises :class:`asyncio.QueueEmpty` otherwise.
+        """
+        with self._lock:
+            if self._items:
+                return self._items.popleft()
+            elif self._closed:
+                return None
+            raise asyncio.QueueEmpty
+
+    def __wakeup(self) -> None:
+        # this is called with the lock held
+        waiter = self._waiter
+        if waiter is None or self._wakeup_scheduled:
+            return
+        try:
+            waiter.get_loop().call_soon_threadsafe(self.__wake_waiter)
+            self._wakeup_scheduled = True
+        except RuntimeError:
+            # the event loop is closed
+            pass
+
+    def __wake_waiter(self) -> None:
+        with self._lock:
+            self._wakeup_scheduled = False
+            waiter = self._waiter
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
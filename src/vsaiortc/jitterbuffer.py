@@ -1,10 +1,18 @@
+import math
+from collections import deque
 from typing import Optional
 
 from .rtp import RtpPacket
-from .utils import uint16_add
+from .utils import uint16_add, uint16_gt
 
 MAX_MISORDER = 100
 
+# the window over which the fastest transit time is tracked
+DELAY_WINDOW_MS = 2000
+
+# the weight given to the first packets when building the delay histogram
+START_FORGET_WEIGHT = 2
+
 
 class JitterFrame:
     def __init__(self, data: bytes, timestamp: int) -> None:
@@ -12,22 +20,79 @@ class JitterFrame:
         self.timestamp = timestamp
 
 
+class FrameDescriptor:
+    """
+    A frame among the packets received contiguously from the origin of a
+    :class:`JitterBuffer`.
+
+    The size of the frame in bytes is not tracked: the payloads are joined
+    once when the frame is released, and `bytes.join` already allocates the
+    exact size.
+    """
+
+    __slots__ = ("complete", "count", "first", "start_known", "timestamp")
+
+    def __init__(self, first: int, timestamp: int, start_known: bool) -> None:
+        self.complete = False
+        self.count = 0
+        self.first = first
+        self.start_known = start_known
+        self.timestamp = timestamp
+
+    @property
+    def last(self) -> int:
+        return uint16_add(self.first, self.count - 1)
+
+
 class JitterBuffer:
+    """
+    Reassemble the frames carried by a stream of RTP packets.
+
+    A frame is normally complete once a packet of the next frame arrives.
+    For video, a frame is also complete as soon as all its packets up to the
+    one which ends the frame have arrived, provided the first packet of the
+    frame is known. This saves waiting for the next frame.
+
+    The frames found in the packets received contiguously from the origin
+    are tracked as each packet arrives, so adding a packet does not need to
+    scan the buffer.
+    """
+
     def __init__(
         self, capacity: int, prefetch: int = 0, is_video: bool = False
     ) -> None:
         assert capacity & (capacity - 1) == 0, "capacity must be a power of 2"
         self._capacity = capacity
         self._origin: Optional[int] = None
+        self._origin_starts_frame = False
         self._packets: list[Optional[RtpPacket]] = [None for i in range(capacity)]
+        self._frame_starts: list[Optional[bool]] = [None for i in range(capacity)]
+        self._frame_ends = [False for i in range(capacity)]
         self._prefetch = prefetch
         self._is_video = is_video
 
+        # the frames in the contiguous run of packets starting at the origin
+        self._run_frames: deque[FrameDescriptor] = deque()
+        self._run_length = 0
+
     @property
     def capacity(self) -> int:
         return self._capacity
 
-    def add(self, packet: RtpPacket) -> tuple[bool, Optional[JitterFrame]]:
+    def add(
+        self,
+        packet: RtpPacket,
+        frame_start: Optional[bool] = None,
+        frame_end: Optional[bool] = None,
+    ) -> tuple[bool, Optional[JitterFrame]]:
+        """
+        Add a packet, and return a frame if one is complete.
+
+        :param frame_start: Whether the packet starts a frame, or `None`
+                            if this is not known.
+        :param frame_end: Whether the packet ends a frame. By default, this is
+                          given by the marker bit for video.
+        """
         pli_flag = False
         if self._origin is None:
             self._origin = packet.sequence_number
@@ -41,6 +106,7 @@ class JitterBuffer:
             if misorder >= MAX_MISORDER:
                 self.remove(self.capacity)
                 self._origin = packet.sequence_number
+                self._origin_starts_frame = False
                 delta = misorder = 0
                 if self._is_video:
                     pli_flag = True
@@ -52,53 +118,98 @@ class JitterBuffer:
             excess = delta - self.capacity + 1
             if self.smart_remove(excess):
                 self._origin = packet.sequence_number
+            self._origin_starts_frame = False
             if self._is_video:
                 pli_flag = True
 
         pos = packet.sequence_number % self._capacity
         self._packets[pos] = packet
+        self._frame_starts[pos] = frame_start
+        if frame_end is None:
+            frame_end = self._is_video and bool(packet.marker)
+        self._frame_ends[pos] = frame_end
 
-        return pli_flag, self._remove_frame(packet.sequence_number)
+        return pli_flag, self._remove_frame()
 
-    def _remove_frame(self, sequence_number: int) -> Optional[JitterFrame]:
-        frame = None
-        frames = 0
-        packets: list[RtpPacket] = []
-        remove = 0
-        timestamp = None
+    def pop(self) -> Optional[JitterFrame]:
+        """
+        Return a further frame if one is complete.
+
+        Adding a packet can complete several frames, for instance when it fills
+        a gap, but :meth:`add` only returns the first one.
+        """
+        if self._origin is None:
+            return None
+        return self._remove_frame()
 
-        for count in range(self.capacity):
+    def _remove_frame(self) -> Optional[JitterFrame]:
+        self.__extend_run()
+
+        # check we have prefetched enough
+        frames = self._run_frames
+        complete = len(frames) - (0 if frames and frames[-1].complete else 1)
+        if complete < max(self._prefetch, 1):
+            return None
+
+        # only return the first frame
+        descriptor = frames.popleft()
+        packets = self._packets
+        data = []
+        for count in range(descriptor.count):
             pos = (self._origin + count) % self._capacity
+            data.append(packets[pos].depayloaded)
+            packets[pos] = None
+        self._origin = uint16_add(self._origin, descriptor.count)
+        self._origin_starts_frame = True
+        self._run_length -= descriptor.count
+        return JitterFrame(data=b"".join(data), timestamp=descriptor.timestamp)
+
+    def __extend_run(self) -> None:
+        """
+        Take into account the packets which extend the contiguous run of
+        packets starting at the origin.
+        """
+        frames = self._run_frames
+        last = frames[-1] if frames else None
+        while self._run_length < self._capacity:
+            pos = (self._origin + self._run_length) % self._capacity
             packet = self._packets[pos]
             if packet is None:
                 break
-            if timestamp is None:
-                timestamp = packet.timestamp
-            elif packet.timestamp != timestamp:
-                # we now have a complete frame, only store the first one
-                if frame is None:
-                    frame = JitterFrame(
-                        data=b"".join([x._data for x in packets]),  # type: ignore
-                        timestamp=timestamp,
-                    )
-                    remove = count
 
-                # check we have prefetched enough
-                frames += 1
-                if frames >= self._prefetch:
-                    self.remove(remove)
-                    return frame
+            if last is None or last.complete or packet.timestamp != last.timestamp:
+                if last is None:
+                    # the first frame, check whether it starts at the origin
+                    frame_start = self._frame_starts[pos]
+                    start_known = bool(
+                        frame_start
+                        or (frame_start is None and self._origin_starts_frame)
+                    )
+                else:
+                    # a change of timestamp completes the previous frame
+                    last.complete = True
+                    start_known = True
+                last = FrameDescriptor(
+                    first=packet.sequence_number,
+                    timestamp=packet.timestamp,
+                    start_known=start_known,
+                )
+                frames.append(last)
 
-                # start a new frame
-                packets = []
-                timestamp = packet.timestamp
+            last.count += 1
+            self._run_length += 1
 
-            packets.append(packet)
+            # the packet ends a frame whose first packet is known
+            if self._frame_ends[pos] and last.start_known:
+                last.complete = True
 
-        return None
+    def __reset_run(self) -> None:
+        self._run_frames.clear()
+        self._run_length = 0
 
     def remove(self, count: int) -> None:
         assert count <= self._capacity
+        self.__reset_run()
         for i in range(count):
             pos = self._origin % self._capacity
             self._packets[pos] = None
@@ -109,6 +220,7 @@ class JitterBuffer:
         Makes sure that all packages belonging to the same frame are removed
         to prevent sending corrupted frames to the decoder.
         """
+        self.__reset_run()
         timestamp = None
         for i in range(self._capacity):
             pos = self._origin % self._capacity
@@ -122,3 +234,176 @@ class JitterBuffer:
             if i == self._capacity - 1:
                 return True
         return False
+
+
+class PlayoutDelayEstimator:
+    """
+    Estimate how long a receiver needs to wait for late audio packets.
+
+    Each packet's transit time is compared to the fastest transit time seen
+    over the last couple of seconds, which gives how late the packet is
+    relative to its peers. The delays, counted in frames, are collected into
+    a histogram which slowly forgets older packets. The target delay is the
+    smallest delay which covers all packets but a fraction `late_loss_rate`
+    of them.
+
+    :param max_delay: The largest target delay, in frames.
+    :param late_loss_rate: The fraction of packets which may arrive too late.
+    :param forget_factor: How much weight the histogram keeps on each packet.
+    """
+
+    def __init__(
+        self,
+        max_delay: int,
+        late_loss_rate: float = 0.05,
+        forget_factor: float = 0.983,
+    ) -> None:
+        self._clock_rate: Optional[int] = None
+        self._forget_factor = forget_factor
+        self._histogram = [0.0 for i in range(max_delay + 1)]
+        self._late_loss_rate = late_loss_rate
+        self._packets = 0
+
+        # timestamps
+        self._frame_duration = 0
+        self._last_sequence_number: Optional[int] = None
+        self._last_timestamp = 0
+        self._timestamp_cycles = 0
+
+        # the candidates for the fastest transit time, as (arrival, transit)
+        self._transits: deque[tuple[int, float]] = deque()
+
+        self.target_delay = 0
+
+    def add(self, packet: RtpPacket, arrival_time_ms: int, clock_rate: int) -> None:
+        if clock_rate != self._clock_rate:
+            self._clock_rate = clock_rate
+            self._frame_duration = clock_rate // 50
+            self._last_sequence_number = None
+            self._transits.clear()
+
+        # unwrap the timestamp, and measure the duration of a frame
+        if self._last_sequence_number is None:
+            self._last_sequence_number = packet.sequence_number
+            self._last_timestamp = packet.timestamp
+            self._timestamp_cycles = 0
+        timestamp_delta = (packet.timestamp - self._last_timestamp) & 0xFFFFFFFF
+        if timestamp_delta >= 0x80000000:
+            timestamp_delta -= 0x100000000
+        timestamp = self._timestamp_cycles + self._last_timestamp + timestamp_delta
+        if uint16_gt(packet.sequence_number, self._last_sequence_number):
+            sequence_delta = uint16_add(
+                packet.sequence_number, -self._last_sequence_number
+            )
+            if sequence_delta == 1 and timestamp_delta > 0:
+                self._frame_duration = timestamp_delta
+            self._last_sequence_number = packet.sequence_number
+            self._last_timestamp = packet.timestamp
+            self._timestamp_cycles = timestamp - packet.timestamp
+
+        # compare the transit time to the fastest recent one
+        transit = arrival_time_ms - timestamp * 1000 / clock_rate
+        transits = self._transits
+        while transits and transits[-1][1] >= transit:
+            transits.pop()
+        transits.append((arrival_time_ms, transit))
+        while transits[0][0] < arrival_time_ms - DELAY_WINDOW_MS:
+            transits.popleft()
+        relative_delay = transit - transits[0][1]
+
+        frame_ms = self._frame_duration * 1000 / clock_rate
+        delay = min(math.floor(relative_delay / frame_ms), len(self._histogram) - 1)
+        self.__update_histogram(delay)
+
+    def __update_histogram(self, delay: int) -> None:
+        # give more weight to the first packets, so the estimate settles quickly
+        self._packets += 1
+        forget_factor = max(
+            0.0, min(self._forget_factor, 1 - START_FORGET_WEIGHT / self._packets)
+        )
+
+        histogram = self._histogram
+        for i in range(len(histogram)):
+            histogram[i] *= forget_factor
+        histogram[delay] += 1 - forget_factor
+
+        # find the smallest delay which meets the late loss rate
+        total = 0.0
+        for i, weight in enumerate(histogram):
+            total += weight
+            if total >= 1 - self._late_loss_rate:
+                break
+        self.target_delay = i
+
+
+class AudioJitterBuffer(JitterBuffer):
+    """
+    A jitter buffer for audio whose delay adapts to network conditions.
+
+    Each audio packet carries a whole frame, so frames are returned as soon
+    as they follow on from the previous frame. When a packet is missing, the
+    buffer waits for it until the packets which follow it span the target
+    delay given by a :class:`PlayoutDelayEstimator`, and then gives up on it.
+
+    :param late_loss_rate: The fraction of packets which may be given up on
+                           because they arrive too late.
+    """
+
+    def __init__(self, capacity: int, late_loss_rate: float = 0.05) -> None:
+        super().__init__(capacity=capacity)
+        self._delay_estimator = PlayoutDelayEstimator(
+            max_delay=capacity // 2, late_loss_rate=late_loss_rate
+        )
+        self._highest: Optional[int] = None
+
+        self.packets_skipped = 0
+
+    @property
+    def target_delay(self) -> int:
+        """
+        How many frames the buffer waits for a missing packet.
+        """
+        return self._delay_estimator.target_delay
+
+    def add(
+        self,
+        packet: RtpPacket,
+        frame_start: Optional[bool] = None,
+        frame_end: Optional[bool] = None,
+        arrival_time_ms: Optional[int] = None,
+        clock_rate: Optional[int] = None,
+    ) -> tuple[bool, Optional[JitterFrame]]:
+        """
+        Add a packet, and return a frame if one is complete.
+
+        :param arrival_time_ms: When the packet arrived, in milliseconds.
+        :param clock_rate: The clock rate of the packet's codec.
+        """
+        if arrival_time_ms is not None and clock_rate is not None:
+            self._delay_estimator.add(packet, arrival_time_ms, clock_rate)
+
+        if (
+            self._highest is None
+            or uint16_gt(packet.sequence_number, self._highest)
+            or uint16_add(self._highest, -packet.sequence_number) >= MAX_MISORDER
+        ):
+            self._highest = packet.sequence_number
+
+        return super().add(packet, frame_start=True, frame_end=True)
+
+    def _remove_frame(self) -> Optional[JitterFrame]:
+        frame = super()._remove_frame()
+        if frame is None and self._run_length == 0 and self.__is_late():
+            # give up on the missing packets
+            while self._packets[self._origin % self._capacity] is None:
+                self._origin = uint16_add(self._origin, 1)
+                self.packets_skipped += 1
+            self._origin_starts_frame = True
+            frame = super()._remove_frame()
+        return frame
+
+    def __is_late(self) -> bool:
+        if self._highest is None or self._origin is None:
+            return False
+        span = uint16_add(self._highest, -self._origin)
+        return span < self._capacity and span > self.target_delay
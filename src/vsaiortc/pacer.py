@@ -0,0 +1,227 @@
+import asyncio
+import enum
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# pacing rate
+DEFAULT_BITRATE = 1000000
+PACING_MULTIPLIER = 2.5
+PACING_INTERVAL = 0.005
+
+# packets are sent faster if they would otherwise wait longer than this
+MAX_QUEUE_TIME = 1.0
+
+
+class PacketPriority(enum.IntEnum):
+    AUDIO = 0
+    RETRANSMISSION = 1
+    VIDEO = 2
+
+
+class PacketPacer:
+    """
+    Leaky bucket pacer for the RTP packets sent over a transport.
+
+    Packets are sent at :attr:`multiplier` times the estimated bitrate,
+    spreading out the bursts caused by large frames. Audio packets are sent
+    as soon as possible, then retransmissions, then video.
+
+    All the packets released in one pacing interval are passed to `send`
+    together, so the transport can write them with a single system call.
+    Each packet comes with the offset of its transport-wide sequence number,
+    if it has one, so the transport can fill it in as the packet leaves.
+
+    :param send: The coroutine function which sends a list of packets.
+    """
+
+    def __init__(
+        self, send: Callable[[list[tuple[bytes, Optional[int]]]], Awaitable[None]]
+    ) -> None:
+        self.bitrate = DEFAULT_BITRATE
+        self.multiplier = PACING_MULTIPLIER
+
+        # padding
+        self.padding_bitrate = 0
+        self.padding_generator: Optional[Callable[[int], list[bytes]]] = None
+
+        self._budget = 0.0
+        self._last_time: Optional[float] = None
+        self._padding_budget = 0.0
+        self._probe_bitrate = 0
+        self._probe_end = 0.0
+        self._queues: list[deque[tuple[bytes, Optional[int], float]]] = [
+            deque() for priority in PacketPriority
+        ]
+        self._queue_bytes = 0
+        self._send = send
+        self._task: Optional[asyncio.Future[None]] = None
+        self._wakeup = asyncio.Event()
+
+        # stats
+        self.packets_sent = 0
+        self.total_queue_delay = 0.0
+
+    @property
+    def queue_delay(self) -> float:
+        """
+        The time in seconds the oldest queued packet has been waiting.
+        """
+        oldest = min((q[0][2] for q in self._queues if q), default=None)
+        if oldest is None:
+            return 0.0
+        return time.monotonic() - oldest
+
+    @property
+    def queue_size(self) -> int:
+        """
+        The number of queued packets.
+        """
+        return sum(len(q) for q in self._queues)
+
+    def enqueue(
+        self,
+        data: bytes,
+        priority: PacketPriority,
+        transport_sequence_number_offset: Optional[int] = None,
+    ) -> None:
+        """
+        Queue a packet for sending.
+        """
+        self._queues[priority].append(
+            (data, transport_sequence_number_offset, time.monotonic())
+        )
+        self._queue_bytes += len(data)
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def enqueue_batch(
+        self,
+        packets: list[bytes],
+        priority: PacketPriority,
+        transport_sequence_number_offset: Optional[int] = None,
+    ) -> None:
+        """
+        Queue several packets for sending, such as all the packets of a frame.
+        They share the same header layout, hence the same offset.
+        """
+        queue = self._queues[priority]
+        queued_time = time.monotonic()
+        for data in packets:
+            queue.append((data, transport_sequence_number_offset, queued_time))
+            self._queue_bytes += len(data)
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def probe(self, bitrate: int, duration: float) -> None:
+        """
+        Send at least at `bitrate` for `duration` seconds, using padding
+        if there is not enough media.
+        """
+        self._probe_bitrate = bitrate
+        self._probe_end = time.monotonic() + duration
+        self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self) -> None:
+        """
+        Stop the pacer, discarding any queued packets.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for queue in self._queues:
+            queue.clear()
+        self._queue_bytes = 0
+
+    def _padding_rate(self, now: float) -> int:
+        if self.padding_generator is None:
+            return 0
+        elif now < self._probe_end:
+            return max(self.padding_bitrate, self._probe_bitrate)
+        else:
+            return self.padding_bitrate
+
+    def _pacing_rate(self, now: float) -> float:
+        rate = self.multiplier * self.bitrate
+        if now < self._probe_end:
+            rate = max(rate, self._probe_bitrate)
+
+        # make sure the queue drains in time
+        if self._queue_bytes:
+            time_left = max(MAX_QUEUE_TIME - self.queue_delay, PACING_INTERVAL)
+            rate = max(rate, 8 * self._queue_bytes / time_left)
+        return rate
+
+    def _pop(self) -> Optional[tuple[bytes, Optional[int], float]]:
+        for queue in self._queues:
+            if queue:
+                item = queue.popleft()
+                self._queue_bytes -= len(item[0])
+                return item
+        return None
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            padding_rate = self._padding_rate(now)
+            if not self._queue_bytes and not padding_rate:
+                # wait for packets, without building up a budget
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                self._last_time = None
+                continue
+
+            # update the budgets, unused budget does not carry over
+            elapsed = PACING_INTERVAL
+            if self._last_time is not None:
+                elapsed = min(now - self._last_time, 10 * PACING_INTERVAL)
+            self._last_time = now
+            self._budget = min(self._budget, 0) + self._pacing_rate(now) * elapsed / 8
+            self._padding_budget = (
+                min(self._padding_budget, 0) + padding_rate * elapsed / 8
+            )
+
+            # audio is not held back by the budget
+            batch = []
+            while self._queues[PacketPriority.AUDIO] or self._budget > 0:
+                item = self._pop()
+                if item is None:
+                    break
+                data, offset, queued_time = item
+                batch.append((data, offset))
+                self._budget -= len(data)
+                self.packets_sent += 1
+                self.total_queue_delay += now - queued_time
+
+            # fill the remaining budget with padding
+            if self.padding_generator is not None and not self._queue_bytes:
+                size = int(min(self._budget, self._padding_budget))
+                if size > 0:
+                    try:
+                        padding = self.padding_generator(size)
+                    except Exception:
+                        logger.exception("PacketPacer x Generating padding failed")
+                        padding = []
+                    for data in padding:
+                        batch.append((data, None))
+                        self._budget -= len(data)
+                        self._padding_budget -= len(data)
+
+            # a failed batch must not stop the pacer
+            if batch:
+                try:
+                    await self._send(batch)
+                except ConnectionError as exc:
+                    logger.debug("PacketPacer x Sending packets failed: %s", exc)
+                except Exception:
+                    logger.exception("PacketPacer x Sending packets failed")
+
+            await asyncio.sleep(PACING_INTERVAL)
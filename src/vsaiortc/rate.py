@@ -2,7 +2,8 @@ import math
 from enum import Enum
 from typing import Any, Optional
 
-from .utils import uint32_add, uint32_gt
+from .rtp import RtcpTransportFeedbackPacket
+from .utils import uint16_add, uint32_add, uint32_gt
 
 BURST_DELTA_THRESHOLD_MS = 5
 
@@ -19,6 +20,12 @@ INTER_ARRIVAL_SHIFT = 26
 TIMESTAMP_GROUP_LENGTH_MS = 5
 TIMESTAMP_TO_MS = 1000.0 / (1 << INTER_ARRIVAL_SHIFT)
 
+# loss-based estimator
+LOSS_DECREASE_INTERVAL_MS = 300
+LOSS_HIGH_THRESHOLD = 0.1
+LOSS_LOW_THRESHOLD = 0.02
+LOSS_MIN_PACKETS = 20
+
 
 class BandwidthUsage(Enum):
     NORMAL = 0
@@ -577,3 +584,121 @@ class RemoteBitrateEstimator:
                 return target_bitrate, list(self.ssrcs.keys())
 
         return None
+
+
+class SentPacket:
+    def __init__(self, send_time_ms: int, size: int) -> None:
+        self.send_time_ms = send_time_ms
+        self.size = size
+
+
+class SendSideBandwidthEstimator:
+    """
+    Sender-side bandwidth estimator, driven by transport-wide congestion
+    control feedback.
+
+    The delay-based estimate runs the send and arrival times of each packet
+    through the same filters as :class:`RemoteBitrateEstimator`, and is capped
+    by a loss-based estimate.
+    """
+
+    def __init__(self) -> None:
+        self.acknowledged_bitrate = RateCounter(1000, 8000)
+        self.inter_arrival = InterArrival(TIMESTAMP_GROUP_LENGTH_MS, 1.0)
+        self.estimator = OveruseEstimator()
+        self.detector = OveruseDetector()
+        self.rate_control = AimdRateControl()
+        self.sent_packets: dict[int, SentPacket] = {}
+
+        self.bitrate: Optional[int] = None
+        self.loss_bitrate: Optional[int] = None
+        self.loss_decrease_ms: Optional[int] = None
+        self.packets_expected = 0
+        self.packets_lost = 0
+
+    def add_sent_packet(
+        self, sequence_number: int, send_time_ms: int, payload_size: int
+    ) -> None:
+        self.sent_packets[sequence_number] = SentPacket(send_time_ms, payload_size)
+
+    def add_feedback(
+        self, packet: RtcpTransportFeedbackPacket, now_ms: int
+    ) -> Optional[int]:
+        arrival_ticks = packet.reference_time * 256
+        sequence_number = packet.base_sequence_number
+        for delta in packet.deltas:
+            sent = self.sent_packets.pop(sequence_number, None)
+            sequence_number = uint16_add(sequence_number, 1)
+            if delta is not None:
+                arrival_ticks += delta
+            if sent is None:
+                continue
+
+            self.packets_expected += 1
+            if delta is None:
+                self.packets_lost += 1
+                continue
+
+            # update acknowledged bitrate
+            self.acknowledged_bitrate.add(sent.size, now_ms)
+
+            # calculate inter-arrival deltas
+            arrival_time_ms = arrival_ticks // 4
+            deltas = self.inter_arrival.compute_deltas(
+                sent.send_time_ms & 0xFFFFFFFF, arrival_time_ms, sent.size
+            )
+            if deltas is not None:
+                self.estimator.update(
+                    deltas.arrival_time,
+                    deltas.timestamp,
+                    deltas.size,
+                    self.detector.state(),
+                    arrival_time_ms,
+                )
+                self.detector.detect(
+                    self.estimator.offset(),
+                    deltas.timestamp,
+                    self.estimator.num_of_deltas(),
+                    arrival_time_ms,
+                )
+
+        estimated_throughput = self.acknowledged_bitrate.rate(now_ms)
+        delay_bitrate = self.rate_control.update(
+            self.detector.state(), estimated_throughput, now_ms
+        )
+        self._update_loss_bitrate(estimated_throughput, now_ms)
+
+        bitrates = [b for b in (delay_bitrate, self.loss_bitrate) if b is not None]
+        if not bitrates:
+            return None
+        self.bitrate = min(bitrates)
+        return self.bitrate
+
+    def _update_loss_bitrate(
+        self, estimated_throughput: Optional[int], now_ms: int
+    ) -> None:
+        if self.packets_expected < LOSS_MIN_PACKETS:
+            return
+
+        loss = self.packets_lost / self.packets_expected
+        self.packets_expected = 0
+        self.packets_lost = 0
+
+        if loss > LOSS_HIGH_THRESHOLD:
+            # decrease in proportion to the loss, at most once per interval
+            bitrate = self.bitrate or estimated_throughput
+            if bitrate is not None and (
+                self.loss_decrease_ms is None
+                or now_ms - self.loss_decrease_ms >= LOSS_DECREASE_INTERVAL_MS
+            ):
+                self.loss_bitrate = int(bitrate * (1 - 0.5 * loss))
+                self.loss_decrease_ms = now_ms
+        elif loss < LOSS_LOW_THRESHOLD and self.loss_bitrate is not None:
+            # increase by 8%, and lift the cap once the delay-based estimate
+            # is lower
+            self.loss_bitrate = int(1.08 * self.loss_bitrate) + 1000
+            if (
+                self.rate_control.current_bitrate_initialized
+                and self.loss_bitrate >= self.rate_control.current_bitrate
+            ):
+                self.loss_bitrate = None
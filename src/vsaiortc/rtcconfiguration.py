@@ -1,6 +1,11 @@
 import enum
 from dataclasses import dataclass
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    from .decoderscheduler import DecoderScheduler
+    from .rtcdtlstransport import RTCCertificate
+    from .sharedencoder import SharedEncoderPool
 
 
 @dataclass
@@ -64,3 +69,29 @@ class RTCConfiguration:
 
     bundlePolicy: RTCBundlePolicy = RTCBundlePolicy.BALANCED
     "The media-bundling policy to use when gathering ICE candidates."
+
+    certificates: Optional[list["RTCCertificate"]] = None
+    """
+    A list of :class:`RTCCertificate` used to authenticate the DTLS
+    transports, only the first one is used currently. If `None`, the
+    connection generates its own certificate in an executor.
+    """
+
+    encoderPool: Optional["SharedEncoderPool"] = None
+    """
+    A :class:`~vsaiortc.sharedencoder.SharedEncoderPool` used by the senders,
+    so that a track sent to several peers is only encoded once.
+    """
+
+    decoderScheduler: Optional["DecoderScheduler"] = None
+    """
+    The :class:`~vsaiortc.decoderscheduler.DecoderScheduler` used by the
+    receivers. If `None`, the process-wide scheduler is used.
+    """
+
+    receiveBatching: bool = False
+    """
+    Whether the ICE transports hand received SRTP packets to the DTLS
+    transports as soon as they arrive, reading the socket in batches. This
+    replaces methods of the underlying aioice objects, so it is off by default.
+    """
@@ -4,9 +4,12 @@ import datetime
 import enum
 import logging
 import os
+import threading
 import traceback
+from collections.abc import Coroutine
 from dataclasses import dataclass, field
-from typing import Optional, Protocol, Type, TypeVar, Union
+from struct import pack_into, unpack_from
+from typing import Any, Optional, Protocol, Type, TypeVar, Union
 
 import pylibsrtp
 from cryptography import x509
@@ -18,6 +21,8 @@ from pyee.asyncio import AsyncIOEventEmitter
 from pylibsrtp import Policy, Session
 
 from . import clock, rtp
+from .pacer import PacketPacer, PacketPriority
+from .rate import SendSideBandwidthEstimator
 from .rtcicetransport import RTCIceTransport
 from .rtcrtpparameters import RTCRtpReceiveParameters, RTCRtpSendParameters
 from .rtp import (
@@ -28,10 +33,12 @@ from .rtp import (
     RtcpRrPacket,
     RtcpRtpfbPacket,
     RtcpSrPacket,
+    RtcpTransportFeedbackPacket,
     RtpPacket,
     is_rtcp,
 )
 from .stats import RTCStatsReport, RTCTransportStats
+from .utils import random32, uint16_add
 
 CERTIFICATE_T = TypeVar("CERTIFICATE_T", bound="RTCCertificate")
 K = TypeVar("K")
@@ -39,6 +46,13 @@ V = TypeVar("V")
 
 logger = logging.getLogger(__name__)
 
+# transport-wide congestion control feedback
+TRANSPORT_FEEDBACK_INTERVAL_MS = 100
+TRANSPORT_FEEDBACK_MAX_PACKETS = 100
+
+# shared certificates are replaced this long before they expire
+CERTIFICATE_ROTATION_MARGIN = datetime.timedelta(days=1)
+
 # Mapping of supported `RTCDtlsFingerprint` algorithms to the
 # corresponding argument for `x509.Certificate.fingerprint`.
 X509_DIGEST_ALGORITHMS = {
@@ -159,6 +173,7 @@ class RTCCertificate:
     def __init__(self, key: ec.EllipticCurvePrivateKey, cert: x509.Certificate) -> None:
         self._key = key
         self._cert = cert
+        self._ssl_contexts: dict[bytes, SSL.Context] = {}
 
     @property
     def expires(self) -> datetime.datetime:
@@ -194,6 +209,15 @@ class RTCCertificate:
     def _create_ssl_context(
         self, srtp_profiles: list[SRTPProtectionProfile]
     ) -> SSL.Context:
+        # contexts are reused by all the transports using this certificate
+        openssl_profiles = b":".join(x.openssl_profile for x in srtp_profiles)
+        ctx = self._ssl_contexts.get(openssl_profiles)
+        if ctx is None:
+            ctx = self.__build_ssl_context(openssl_profiles)
+            self._ssl_contexts[openssl_profiles] = ctx
+        return ctx
+
+    def __build_ssl_context(self, openssl_profiles: bytes) -> SSL.Context:
         ctx = SSL.Context(SSL.DTLS_METHOD)
         ctx.set_verify(
             SSL.VERIFY_PEER | SSL.VERIFY_FAIL_IF_NO_PEER_CERT, lambda *args: True
@@ -203,11 +227,98 @@ class RTCCertificate:
         ctx.set_cipher_list(
             b"ECDHE-ECDSA-AES128-GCM-SHA256:ECDHE-ECDSA-CHACHA20-POLY1305:ECDHE-ECDSA-AES128-SHA:ECDHE-ECDSA-AES256-SHA"
         )
-        ctx.set_tlsext_use_srtp(b":".join(x.openssl_profile for x in srtp_profiles))
+        ctx.set_tlsext_use_srtp(openssl_profiles)
 
         return ctx
 
 
+class CertificateCache:
+    """
+    A certificate which can be shared by several :class:`RTCPeerConnection`
+    instances, by passing it in their :attr:`RTCConfiguration.certificates`.
+
+    By default each connection generates its own certificate. Sharing one
+    lets the remote peers tell that the connections come from the same
+    process, so it is up to the application to opt in.
+
+    Generating a certificate is expensive, so the same certificate is reused
+    until it is about to expire. Once it enters its last `rotation_margin`, a
+    replacement is generated in a background thread and the current
+    certificate is used in the meantime.
+
+    :param rotation_margin: How long before it expires a certificate is
+                            replaced.
+    """
+
+    def __init__(
+        self, rotation_margin: datetime.timedelta = CERTIFICATE_ROTATION_MARGIN
+    ) -> None:
+        self.rotation_margin = rotation_margin
+        self._certificate: Optional[RTCCertificate] = None
+        self._lock = threading.Lock()
+        self._rotating = False
+
+    def get(self) -> RTCCertificate:
+        """
+        Return the shared certificate.
+
+        If there is no valid certificate yet, one is generated synchronously,
+        call :meth:`generate` beforehand to avoid blocking the event loop.
+        """
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        with self._lock:
+            certificate = self._certificate
+            if certificate is not None and certificate.expires <= now:
+                certificate = None
+            rotate = (
+                certificate is not None
+                and certificate.expires - self.rotation_margin <= now
+                and not self._rotating
+            )
+            if rotate:
+                self._rotating = True
+
+        if certificate is None:
+            certificate = RTCCertificate.generateCertificate()
+            self.__set(certificate)
+        elif rotate:
+            threading.Thread(target=self.__rotate, daemon=True).start()
+        return certificate
+
+    async def generate(self) -> RTCCertificate:
+        """
+        Generate a new shared certificate in an executor, without blocking
+        the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        certificate = await loop.run_in_executor(
+            None, RTCCertificate.generateCertificate
+        )
+        self.__set(certificate)
+        return certificate
+
+    def __rotate(self) -> None:
+        try:
+            self.__set(RTCCertificate.generateCertificate())
+        finally:
+            with self._lock:
+                self._rotating = False
+
+    def __set(self, certificate: RTCCertificate) -> None:
+        with self._lock:
+            self._certificate = certificate
+
+
+_certificate_cache = CertificateCache()
+
+
+def get_certificate_cache() -> CertificateCache:
+    """
+    Return the process-wide :class:`CertificateCache`.
+    """
+    return _certificate_cache
+
+
 @dataclass
 class RTCDtlsParameters:
     """
@@ -232,12 +343,19 @@ class RtpReceiver(Protocol):
     async def _handle_rtp_packet(
         self, packet: RtpPacket, arrival_time_ms: int
     ) -> None: ...
+    def _receive_rtp_packet(
+        self, packet: RtpPacket, arrival_time_ms: int
+    ) -> list[Coroutine[Any, Any, None]]: ...
 
 
 class RtpSender(Protocol):
     _ssrc: int
 
+    @property
+    def kind(self) -> str: ...
+
     async def _handle_rtcp_packet(self, packet: AnyRtcpPacket) -> None: ...
+    def _handle_target_bitrate(self, bitrate: int) -> None: ...
 
 
 class RtpRouter:
@@ -338,6 +456,90 @@ class RtpRouter:
                 d.pop(k)
 
 
+class TransportFeedbackGenerator:
+    """
+    Generator for transport-wide congestion control feedback.
+
+    It records the arrival time of each packet carrying a transport-wide
+    sequence number and periodically reports them in RTPFB fmt=15 packets.
+    """
+
+    def __init__(self) -> None:
+        self.arrivals: dict[int, int] = {}
+        self.feedback_count = 0
+        self.last_feedback_ms: Optional[int] = None
+        self.max_seq: Optional[int] = None
+        self.media_ssrc = 0
+        self.reported_seq: Optional[int] = None
+
+    def add(self, sequence_number: int, arrival_time_ms: int, ssrc: int) -> bool:
+        """
+        Record the arrival of a packet, and return whether feedback is due.
+        """
+        # unwrap the sequence number
+        if self.max_seq is None:
+            seq = sequence_number
+            self.last_feedback_ms = arrival_time_ms
+        else:
+            delta = (sequence_number - self.max_seq) & 0xFFFF
+            seq = self.max_seq + (delta - 0x10000 if delta & 0x8000 else delta)
+
+        # ignore packets which were already reported
+        if self.reported_seq is None or seq > self.reported_seq:
+            self.arrivals[seq] = arrival_time_ms
+            self.max_seq = seq if self.max_seq is None else max(self.max_seq, seq)
+            self.media_ssrc = ssrc
+
+        return len(self.arrivals) >= TRANSPORT_FEEDBACK_MAX_PACKETS or (
+            arrival_time_ms - self.last_feedback_ms >= TRANSPORT_FEEDBACK_INTERVAL_MS
+        )
+
+    def feedback(self, ssrc: int, now_ms: int) -> list[RtcpTransportFeedbackPacket]:
+        """
+        Report all the pending packets.
+        """
+        packets: list[RtcpTransportFeedbackPacket] = []
+        self.last_feedback_ms = now_ms
+        if not self.arrivals:
+            return packets
+
+        seq = min(self.arrivals)
+        end = max(self.arrivals)
+        while seq <= end:
+            # each feedback packet starts with a received packet
+            base_seq = seq
+            reference_time = self.arrivals[seq] // 64
+            previous_ticks = reference_time * 256
+            deltas: list[Optional[int]] = []
+            while seq <= end:
+                arrival_time_ms = self.arrivals.get(seq)
+                if arrival_time_ms is None:
+                    deltas.append(None)
+                else:
+                    delta = arrival_time_ms * 4 - previous_ticks
+                    if deltas and not -0x8000 <= delta <= 0x7FFF:
+                        break
+                    deltas.append(delta)
+                    previous_ticks = arrival_time_ms * 4
+                seq += 1
+
+            packets.append(
+                RtcpTransportFeedbackPacket(
+                    ssrc=ssrc,
+                    media_ssrc=self.media_ssrc,
+                    base_sequence_number=base_seq & 0xFFFF,
+                    reference_time=reference_time & 0xFFFFFF,
+                    feedback_packet_count=self.feedback_count & 0xFF,
+                    deltas=deltas,
+                )
+            )
+            self.feedback_count += 1
+
+        self.arrivals.clear()
+        self.reported_seq = end
+        return packets
+
+
 class RTCDtlsTransport(AsyncIOEventEmitter):
     """
     The :class:`RTCDtlsTransport` object includes information relating to
@@ -351,8 +553,7 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
     def __init__(
         self, transport: RTCIceTransport, certificates: list[RTCCertificate]
     ) -> None:
-        assert len(certificates) == 1
-        certificate = certificates[0]
+        assert len(certificates) <= 1
 
         super().__init__()
         self.encrypted = False
@@ -363,8 +564,19 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
         self._state = State.NEW
         self._stats_id = "transport_" + str(id(self))
         self._task: Optional[asyncio.Future[None]] = None
+        self._tasks: set[asyncio.Future[None]] = set()
         self._transport = transport
 
+        # transport-wide congestion control
+        self._rtcp_ssrc = random32()
+        self._transport_feedback_generator = TransportFeedbackGenerator()
+        self._transport_feedback_handle: Optional[asyncio.TimerHandle] = None
+        self._transport_sequence_number = 0
+        self._transport_bandwidth_estimator = SendSideBandwidthEstimator()
+
+        # pacing
+        self._pacer = PacketPacer(self.__send_paced_rtp)
+
         # counters
         self.__rx_bytes = 0
         self.__rx_packets = 0
@@ -378,7 +590,9 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
         # SSL
         self._srtp_profiles = SRTP_PROFILES
         self._ssl: Optional[SSL.Connection] = None
-        self.__local_certificate = certificate
+        self.__local_certificate: Optional[RTCCertificate] = (
+            certificates[0] if certificates else None
+        )
 
     @property
     def state(self) -> str:
@@ -402,10 +616,18 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
 
         :rtype: :class:`RTCDtlsParameters`
         """
+        assert self.__local_certificate is not None
         return RTCDtlsParameters(
             fingerprints=self.__local_certificate.getFingerprints()
         )
 
+    def _set_certificate(self, certificate: RTCCertificate) -> None:
+        """
+        Set the certificate of a transport which was created without one,
+        before its parameters are used.
+        """
+        self.__local_certificate = certificate
+
     async def _do_handshake(self) -> None:
         """
         Attempt to complete the DTLS handshake.
@@ -514,6 +736,7 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
                 self._set_role("client")
 
         # Initialise SSL.
+        assert self.__local_certificate is not None
         self._ssl = SSL.Connection(
             self.__local_certificate._create_ssl_context(
                 srtp_profiles=self._srtp_profiles
@@ -540,9 +763,10 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
         if self._state == State.FAILED:
             return
 
-        # start data pump
+        # start data pump, SRTP is handled as soon as it is received
         self.__log_debug("- DTLS handshake complete")
         self._set_state(State.CONNECTED)
+        self.transport._set_datagram_handler(self._datagram_received)
         self._task = asyncio.ensure_future(self.__run())
 
     async def stop(self) -> None:
@@ -552,6 +776,11 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
         if self._task is not None:
             self._task.cancel()
             self._task = None
+        self.transport._set_datagram_handler(None)
+        for task in list(self._tasks):
+            task.cancel()
+        self.__transport_feedback_cancel()
+        self._pacer.stop()
 
         if self._ssl and self._state in [State.CONNECTING, State.CONNECTED]:
             try:
@@ -576,8 +805,29 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
                 self.__log_warning(traceback.format_exc())
             raise exc
         finally:
+            self.transport._set_datagram_handler(None)
+            self.__transport_feedback_cancel()
+            self._pacer.stop()
             self._set_state(State.CLOSED)
 
+    def _datagram_received(self, data: bytes) -> bool:
+        """
+        Handle an SRTP or SRTCP datagram as soon as it is received.
+
+        Returns `False` for other datagrams, which are left to the receive loop.
+        """
+        first_byte = data[0]
+        if not (first_byte > 127 and first_byte < 192 and self._rx_srtp):
+            return False
+
+        self.__rx_bytes += len(data)
+        self.__rx_packets += 1
+        try:
+            self._handle_srtp_data(data)
+        except Exception:
+            self.__log_warning(traceback.format_exc())
+        return True
+
     def _get_stats(self) -> RTCStatsReport:
         report = RTCStatsReport()
         report.add(
@@ -593,6 +843,10 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
                 bytesReceived=self.__rx_bytes,
                 iceRole=self.transport.role,
                 dtlsState=self.state,
+                packetsPaced=self._pacer.packets_sent,
+                totalPacingDelay=self._pacer.total_queue_delay,
+                pacingQueueSize=self._pacer.queue_size,
+                pacingQueueDelay=self._pacer.queue_delay,
             )
         )
         return report
@@ -605,21 +859,69 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
             return
 
         for packet in packets:
+            # transport-wide congestion control feedback is for the transport
+            if isinstance(packet, RtcpTransportFeedbackPacket):
+                self._handle_transport_feedback(packet)
+                continue
+
+            # the receiver estimated maximum bitrate drives the pacer
+            if isinstance(packet, RtcpPsfbPacket) and packet.fmt == rtp.RTCP_PSFB_APP:
+                try:
+                    self._pacer.bitrate = rtp.unpack_remb_fci(packet.fci)[0]
+                except ValueError:
+                    pass
+
             # route RTCP packet
             for recipient in self._rtp_router.route_rtcp(packet):
                 await recipient._handle_rtcp_packet(packet)
 
-    async def _handle_rtp_data(self, data: bytes, arrival_time_ms: int) -> None:
+    def _handle_rtp_data(self, data: bytes, arrival_time_ms: int) -> None:
         try:
             packet = RtpPacket.parse(data, self._rtp_header_extensions_map)
         except ValueError as exc:
             self.__log_debug("x RTP parsing failed: %s", exc)
             return
 
-        # route RTP packet
+        # send transport-wide congestion control feedback, either when enough
+        # packets arrived or when the timer expires. The sequence number is
+        # read from the raw header, so other extensions are not decoded.
+        offset = self._rtp_header_extensions_map.transport_sequence_number_offset(data)
+        if offset is not None:
+            transport_sequence_number = unpack_from("!H", data, offset)[0]
+            if self._transport_feedback_generator.add(
+                transport_sequence_number, arrival_time_ms, packet.ssrc
+            ):
+                self.__send_transport_feedback(arrival_time_ms)
+            elif self._transport_feedback_handle is None:
+                self._transport_feedback_handle = asyncio.get_running_loop().call_later(
+                    TRANSPORT_FEEDBACK_INTERVAL_MS / 1000,
+                    self.__transport_feedback_expired,
+                )
+
+        # route RTP packet, the receiver's feedback is sent in the background
         receiver = self._rtp_router.route_rtp(packet)
         if receiver is not None:
-            await receiver._handle_rtp_packet(packet, arrival_time_ms=arrival_time_ms)
+            for coroutine in receiver._receive_rtp_packet(
+                packet, arrival_time_ms=arrival_time_ms
+            ):
+                self.__schedule(coroutine)
+
+    def _handle_srtp_data(self, data: bytes) -> None:
+        """
+        Unprotect and handle an SRTP or SRTCP datagram.
+
+        RTP packets are handled immediately, RTCP packets in the background.
+        """
+        arrival_time_ms = clock.current_ms()
+        try:
+            if is_rtcp(data):
+                data = self._rx_srtp.unprotect_rtcp(data)
+                self.__schedule(self._handle_rtcp_data(data))
+            else:
+                data = self._rx_srtp.unprotect(data)
+                self._handle_rtp_data(data, arrival_time_ms=arrival_time_ms)
+        except pylibsrtp.Error as exc:
+            self.__log_debug("x SRTP unprotect failed: %s", exc)
 
     async def _recv_next(self) -> None:
         # get timeout
@@ -660,16 +962,76 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
                 await self._data_receiver._handle_data(data)
         elif first_byte > 127 and first_byte < 192 and self._rx_srtp:
             # SRTP / SRTCP
-            arrival_time_ms = clock.current_ms()
-            try:
-                if is_rtcp(data):
-                    data = self._rx_srtp.unprotect_rtcp(data)
-                    await self._handle_rtcp_data(data)
-                else:
-                    data = self._rx_srtp.unprotect(data)
-                    await self._handle_rtp_data(data, arrival_time_ms=arrival_time_ms)
-            except pylibsrtp.Error as exc:
-                self.__log_debug("x SRTP unprotect failed: %s", exc)
+            self._handle_srtp_data(data)
+
+    def _handle_transport_feedback(self, packet: RtcpTransportFeedbackPacket) -> None:
+        bitrate = self._transport_bandwidth_estimator.add_feedback(
+            packet, clock.current_ms()
+        )
+        if bitrate is None:
+            return
+        self._pacer.bitrate = bitrate
+
+        # share the estimated bitrate between the video senders
+        senders = set(
+            sender
+            for sender in self._rtp_router.senders.values()
+            if sender.kind == "video"
+        )
+        for sender in senders:
+            sender._handle_target_bitrate(bitrate // len(senders))
+
+    def __send_transport_feedback(self, now_ms: int) -> None:
+        self.__transport_feedback_cancel()
+        feedback = self._transport_feedback_generator.feedback(
+            ssrc=self._rtcp_ssrc, now_ms=now_ms
+        )
+        if feedback:
+            self.__schedule(self._send_rtp(b"".join(bytes(p) for p in feedback)))
+
+    def __transport_feedback_cancel(self) -> None:
+        if self._transport_feedback_handle is not None:
+            self._transport_feedback_handle.cancel()
+            self._transport_feedback_handle = None
+
+    def __transport_feedback_expired(self) -> None:
+        self._transport_feedback_handle = None
+        self.__send_transport_feedback(clock.current_ms())
+
+    def _queue_rtp(
+        self,
+        data: bytes,
+        priority: PacketPriority,
+        transport_sequence_number_offset: Optional[int] = None,
+    ) -> None:
+        """
+        Queue an RTP packet, which the pacer will send.
+
+        If `transport_sequence_number_offset` is given, the transport-wide
+        sequence number at that offset is filled in as the packet leaves.
+        """
+        if self._state != State.CONNECTED:
+            raise ConnectionError("Cannot send encrypted RTP, not connected")
+
+        self._pacer.enqueue(data, priority, transport_sequence_number_offset)
+
+    def _queue_rtp_batch(
+        self,
+        packets: list[bytes],
+        priority: PacketPriority,
+        transport_sequence_number_offset: Optional[int] = None,
+    ) -> None:
+        """
+        Queue several RTP packets, such as all the packets of a frame, which
+        the pacer will send.
+
+        The packets share the same header layout, so a single
+        `transport_sequence_number_offset` applies to all of them.
+        """
+        if self._state != State.CONNECTED:
+            raise ConnectionError("Cannot send encrypted RTP, not connected")
+
+        self._pacer.enqueue_batch(packets, priority, transport_sequence_number_offset)
 
     def _register_data_receiver(self, receiver: DataReceiver) -> None:
         assert self._data_receiver is None
@@ -695,6 +1057,22 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
     ) -> None:
         self._rtp_header_extensions_map.configure(parameters)
         self._rtp_router.register_sender(sender, ssrc=sender._ssrc)
+        for encoding in parameters.encodings:
+            self._rtp_router.register_sender(sender, ssrc=encoding.ssrc)
+
+    def _next_transport_sequence_number(self, payload_size: int) -> int:
+        """
+        Allocate a transport-wide sequence number for an outgoing RTP packet
+        which is about to be sent.
+
+        The send time and size are recorded for the bandwidth estimator.
+        """
+        sequence_number = self._transport_sequence_number
+        self._transport_sequence_number = uint16_add(sequence_number, 1)
+        self._transport_bandwidth_estimator.add_sent_packet(
+            sequence_number, clock.current_ms(), payload_size
+        )
+        return sequence_number
 
     async def _send_data(self, data: bytes) -> None:
         if self._state != State.CONNECTED:
@@ -715,6 +1093,43 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
         self.__tx_bytes += len(data)
         self.__tx_packets += 1
 
+    async def _send_rtp_batch(self, packets: list[bytes]) -> None:
+        """
+        Protect and send several RTP or RTCP packets, handing them to the
+        socket layer in as few system calls as possible.
+        """
+        if self._state != State.CONNECTED:
+            raise ConnectionError("Cannot send encrypted RTP, not connected")
+
+        protected = [
+            self._tx_srtp.protect_rtcp(data)
+            if is_rtcp(data)
+            else self._tx_srtp.protect(data)
+            for data in packets
+        ]
+        await self.transport._send_batch(protected)
+        self.__tx_bytes += sum(len(data) for data in protected)
+        self.__tx_packets += len(protected)
+
+    async def __send_paced_rtp(
+        self, packets: list[tuple[bytes, Optional[int]]]
+    ) -> None:
+        # assign the transport-wide sequence numbers when the packets leave
+        batch = []
+        for data, offset in packets:
+            if offset is not None:
+                buffer = bytearray(data)
+                pack_into(
+                    "!H",
+                    buffer,
+                    offset,
+                    self._next_transport_sequence_number(len(data)),
+                )
+                data = bytes(buffer)
+            batch.append(data)
+
+        await self._send_rtp_batch(batch)
+
     def _set_role(self, role: str) -> None:
         self._role = role
 
@@ -747,6 +1162,19 @@ class RTCDtlsTransport(AsyncIOEventEmitter):
             self.__tx_bytes += len(data)
             self.__tx_packets += 1
 
+    def __schedule(self, coroutine: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self.__task_done)
+
+    def __task_done(self, task: asyncio.Future[None]) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled():
+            exc = task.exception()
+            if exc is not None and not isinstance(exc, ConnectionError):
+                lines = traceback.format_exception(type(exc), exc, exc.__traceback__)
+                self.__log_warning("".join(lines))
+
     def __log_debug(self, msg: str, *args: object) -> None:
         logger.debug(f"RTCDtlsTransport(%s) {msg}", self._role, *args)
 
@@ -1,12 +1,16 @@
 import asyncio
 import logging
 import re
+import socket
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import Any, Optional, Union
 
 from aioice import Candidate, Connection, ConnectionClosed
+from aioice.ice import StunProtocol
 from pyee.asyncio import AsyncIOEventEmitter
 
+from .datagram import DatagramSender, receive_datagrams
 from .exceptions import InvalidStateError
 from .rtcconfiguration import RTCIceServer
 
@@ -24,6 +28,11 @@ TURN_REGEX = re.compile(
 
 logger = logging.getLogger(__name__)
 
+# the most datagrams handled each time the socket is readable
+RECEIVE_BATCH_SIZE = 32
+
+DatagramHandler = Callable[[bytes], bool]
+
 
 @dataclass
 class RTCIceCandidate:
@@ -138,6 +147,29 @@ def connection_kwargs(servers: list[RTCIceServer]) -> dict[str, Any]:
     return kwargs
 
 
+def nominated_stun_pair(
+    connection: Connection,
+) -> Optional[tuple[StunProtocol, tuple[str, int]]]:
+    """
+    Return the protocol and remote address of the candidate pair nominated
+    for the first component, if it uses a plain UDP socket.
+
+    This relies on private aioice attributes, so `None` is also returned if
+    they are missing, in which case callers use the public aioice API.
+    """
+    nominated = getattr(connection, "_nominated", None)
+    pair = nominated.get(1) if isinstance(nominated, dict) else None
+    protocol = getattr(pair, "protocol", None)
+    remote_addr = getattr(pair, "remote_addr", None)
+    if (
+        not isinstance(protocol, StunProtocol)
+        or getattr(protocol, "transport", None) is None
+        or remote_addr is None
+    ):
+        return None
+    return protocol, remote_addr
+
+
 def parse_stun_turn_uri(uri: str) -> dict[str, Any]:
     if uri.startswith("stun"):
         match = STUN_REGEX.fullmatch(uri)
@@ -250,15 +282,24 @@ class RTCIceTransport(AsyncIOEventEmitter):
     transport over which packets are sent and received.
 
     :param gatherer: An :class:`RTCIceGatherer`.
+    :param receiveBatching: Whether received datagrams may be handed to the
+                            DTLS transport as soon as they arrive and read
+                            from the socket in batches. This replaces methods
+                            of the underlying aioice objects, so it is off by
+                            default.
     """
 
-    def __init__(self, gatherer: RTCIceGatherer) -> None:
+    def __init__(self, gatherer: RTCIceGatherer, receiveBatching: bool = False) -> None:
         super().__init__()
+        self.__batch: Optional[tuple[StunProtocol, socket.socket]] = None
+        self.__datagram_handler: Optional[DatagramHandler] = None
+        self.__datagram_sender: Optional[tuple[StunProtocol, DatagramSender]] = None
         self.__iceGatherer = gatherer
         self.__monitor_task: Optional[asyncio.Future[None]] = None
         self.__start: Optional[asyncio.Event] = None
         self.__state = "new"
         self._connection = gatherer._connection
+        self._receive_batching = receiveBatching
         self._role_set = False
 
         # expose recv / send methods
@@ -348,19 +389,116 @@ class RTCIceTransport(AsyncIOEventEmitter):
         """
         if self.state != "closed":
             self.__setState("closed")
+            self._set_datagram_handler(None)
+            self.__close_datagram_sender()
             await self._connection.close()
             if self.__monitor_task is not None:
                 await self.__monitor_task
                 self.__monitor_task = None
 
+    async def _send_batch(self, packets: list[bytes]) -> None:
+        """
+        Send several datagrams on the first component.
+
+        If the connection is not established, a `ConnectionError` is raised.
+        """
+        sender = self.__get_datagram_sender()
+        if sender is not None:
+            sender.send(packets)
+        else:
+            for data in packets:
+                await self._connection.sendto(data, 1)
+
+    def _set_datagram_handler(self, handler: Optional[DatagramHandler]) -> None:
+        """
+        Hand the datagrams received on the first component to `handler` as
+        soon as they arrive, instead of queuing them for :meth:`_recv`.
+
+        The handler returns `False` for the datagrams it does not process,
+        which are then queued as usual. While a handler is set, the datagrams
+        waiting on the socket of the nominated candidate pair are read in
+        batches. Passing `None` restores the default behaviour.
+
+        This does nothing unless the transport was created with
+        `receiveBatching` enabled.
+        """
+        self.__stop_batching()
+        if self.__datagram_handler is not None:
+            del self._connection.data_received
+        self.__datagram_handler = handler
+        if handler is None or not self._receive_batching:
+            self.__datagram_handler = None
+            return
+
+        queue_datagram = self._connection.data_received
+
+        def data_received(data: Optional[bytes], component: Optional[int]) -> None:
+            if data is None or component != 1 or not handler(data):
+                queue_datagram(data, component)
+
+        self._connection.data_received = data_received  # type: ignore[method-assign]
+        self.__start_batching()
+
     async def _monitor(self) -> None:
         while True:
             event = await self._connection.get_event()
             if isinstance(event, ConnectionClosed):
+                self.__close_datagram_sender()
                 if self.state == "completed":
                     self.__setState("failed")
                 return
 
+    def __start_batching(self) -> None:
+        # reading the socket directly only works with a selector event loop
+        nominated = nominated_stun_pair(self._connection)
+        if nominated is None or not isinstance(
+            asyncio.get_running_loop(), asyncio.SelectorEventLoop
+        ):
+            return
+        protocol = nominated[0]
+        sock = protocol.transport.get_extra_info("socket")
+        if sock is None:
+            return
+
+        batch_socket = sock.dup()
+        receive = protocol.datagram_received
+
+        def datagram_received(data: Union[bytes, str], addr: tuple) -> None:
+            receive(data, addr)
+            for data, addr in receive_datagrams(batch_socket, RECEIVE_BATCH_SIZE - 1):
+                receive(data, addr)
+
+        protocol.datagram_received = datagram_received  # type: ignore[method-assign]
+        self.__batch = (protocol, batch_socket)
+
+    def __stop_batching(self) -> None:
+        if self.__batch is not None:
+            protocol, batch_socket = self.__batch
+            del protocol.datagram_received
+            batch_socket.close()
+            self.__batch = None
+
+    def __close_datagram_sender(self) -> None:
+        if self.__datagram_sender is not None:
+            self.__datagram_sender[1].close()
+            self.__datagram_sender = None
+
+    def __get_datagram_sender(self) -> Optional[DatagramSender]:
+        # the sender is kept for as long as the same pair is nominated
+        nominated = nominated_stun_pair(self._connection)
+        if self.__datagram_sender is not None:
+            protocol, sender = self.__datagram_sender
+            if nominated == (protocol, sender.addr):
+                return sender
+            self.__close_datagram_sender()
+        if nominated is None:
+            return None
+
+        protocol, remote_addr = nominated
+        sender = DatagramSender(protocol.transport, remote_addr)
+        self.__datagram_sender = (protocol, sender)
+        return sender
+
     def __log_debug(self, msg: str, *args: object) -> None:
         logger.debug(f"RTCIceTransport(%s) {msg}", self.role, *args)
 
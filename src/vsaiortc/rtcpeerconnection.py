@@ -1,4 +1,5 @@
 import asyncio
+import concurrent.futures
 import copy
 import logging
 import uuid
@@ -18,7 +19,11 @@ from .exceptions import (
 from .mediastreams import MediaStreamTrack
 from .rtcconfiguration import RTCBundlePolicy, RTCConfiguration
 from .rtcdatachannel import RTCDataChannel, RTCDataChannelParameters
-from .rtcdtlstransport import RTCCertificate, RTCDtlsParameters, RTCDtlsTransport
+from .rtcdtlstransport import (
+    RTCCertificate,
+    RTCDtlsParameters,
+    RTCDtlsTransport,
+)
 from .rtcicetransport import (
     RTCIceCandidate,
     RTCIceGatherer,
@@ -29,13 +34,14 @@ from .rtcrtpparameters import (
     RTCRtpCodecCapability,
     RTCRtpCodecParameters,
     RTCRtpDecodingParameters,
+    RTCRtpEncodingParameters,
     RTCRtpHeaderExtensionParameters,
     RTCRtpParameters,
     RTCRtpReceiveParameters,
     RTCRtpRtxParameters,
     RTCRtpSendParameters,
 )
-from .rtcrtpreceiver import RemoteStreamTrack, RTCRtpReceiver
+from .rtcrtpreceiver import RemoteStreamTrack, RTCRtpReceiver, TrackMode
 from .rtcrtpsender import RTCRtpSender
 from .rtcrtptransceiver import RTCRtpTransceiver
 from .rtcsctptransport import RTCSctpCapabilities, RTCSctpTransport
@@ -217,8 +223,36 @@ def create_media_description_for_sctp(
     return media
 
 
+def negotiate_send_encodings(
+    transceiver: RTCRtpTransceiver, remote_media: Optional[sdp.MediaDescription]
+) -> list[RTCRtpEncodingParameters]:
+    """
+    Determine which of the sender's encodings are sent, given the remote
+    media description if there is one.
+
+    With simulcast, only the RIDs the remote party agreed to receive are
+    kept. If it does not support simulcast, only the first encoding is sent.
+    """
+    encodings = transceiver.sender._encodings
+    if len(encodings) == 1 or remote_media is None:
+        return encodings
+    if remote_media.simulcast is None:
+        return encodings[:1]
+
+    rids = set()
+    for stream in remote_media.simulcast.recv:
+        for rid in stream.split(","):
+            if not rid.startswith("~"):
+                rids.add(rid)
+    return [encoding for encoding in encodings if encoding.rid in rids] or encodings[:1]
+
+
 def create_media_description_for_transceiver(
-    transceiver: RTCRtpTransceiver, cname: str, direction: str, mid: str
+    transceiver: RTCRtpTransceiver,
+    cname: str,
+    direction: str,
+    mid: str,
+    remote_media: Optional[sdp.MediaDescription] = None,
 ) -> sdp.MediaDescription:
     media = sdp.MediaDescription(
         kind=transceiver.kind,
@@ -251,6 +285,17 @@ def create_media_description_for_transceiver(
             )
         ]
 
+    # with simulcast, the other encodings are identified by their RID
+    encodings = negotiate_send_encodings(transceiver, remote_media)
+    if len(encodings) > 1 and direction in ["sendrecv", "sendonly"]:
+        media.rid = [
+            sdp.RidDescription(rid=encoding.rid, direction="send")
+            for encoding in encodings
+        ]
+        media.simulcast = sdp.SimulcastDescription(
+            send=[encoding.rid for encoding in encodings]
+        )
+
     add_transport_description(media, transceiver.receiver.transport)
 
     return media
@@ -292,9 +337,27 @@ class RTCPeerConnection(AsyncIOEventEmitter):
 
     def __init__(self, configuration: Optional[RTCConfiguration] = None) -> None:
         super().__init__()
-        self.__certificates = [RTCCertificate.generateCertificate()]
         self.__cname = f"{uuid.uuid4()}"
         self.__configuration = configuration or RTCConfiguration()
+        self.__certificateFuture: concurrent.futures.Future[RTCCertificate] = (
+            concurrent.futures.Future()
+        )
+        self.__certificateGenerating = False
+        self.__certificates: list[RTCCertificate] = []
+        if self.__configuration.certificates:
+            now = clock.current_datetime()
+            for certificate in self.__configuration.certificates:
+                if certificate.expires <= now:
+                    raise InvalidAccessError("Certificate has expired")
+            self.__certificates = self.__configuration.certificates[:1]
+        else:
+            # generate this connection's certificate without blocking the loop
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                self.__startCertificateGeneration()
         self.__dtlsTransports: set[RTCDtlsTransport] = set()
         self.__iceTransports: set[RTCIceTransport] = set()
         self.__remoteDtls: dict[
@@ -304,6 +367,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             Union[RTCRtpTransceiver, RTCSctpTransport], RTCIceParameters
         ] = {}
         self.__seenMids: set[str] = set()
+        self.__spareDtlsTransports: list[RTCDtlsTransport] = []
         self.__sctp: Optional[RTCSctpTransport] = None
         self.__sctp_mline_index: Optional[int] = None
         self._sctpLegacySdp = True
@@ -472,10 +536,19 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         return transceiver.sender
 
     def addTransceiver(
-        self, trackOrKind: Union[str, MediaStreamTrack], direction: str = "sendrecv"
+        self,
+        trackOrKind: Union[str, MediaStreamTrack],
+        direction: str = "sendrecv",
+        sendEncodings: Optional[list[RTCRtpEncodingParameters]] = None,
     ) -> RTCRtpTransceiver:
         """
         Add a new :class:`RTCRtpTransceiver`.
+
+        :param trackOrKind: Either a :class:`MediaStreamTrack` instance or a
+                            media kind (`'audio'` or `'video'`).
+        :param direction: The preferred direction of the transceiver.
+        :param sendEncodings: A list of :class:`RTCRtpEncodingParameters`, to
+                              send video using simulcast.
         """
         self.__assertNotClosed()
 
@@ -498,7 +571,10 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             self.__assertTrackHasNoSender(track)
 
         return self.__createTransceiver(
-            direction=direction, kind=kind, sender_track=track
+            direction=direction,
+            kind=kind,
+            sender_track=track,
+            send_encodings=sendEncodings,
         )
 
     async def close(self) -> None:
@@ -510,20 +586,20 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             return
         self.__isClosed = asyncio.Future()
         self.__setSignalingState("closed")
+        self.__certificateFuture.cancel()
 
         # stop senders / receivers
-        for transceiver in self.__transceivers:
-            await transceiver.stop()
-        if self.__sctp:
-            await self.__sctp.stop()
+        await asyncio.gather(
+            *(transceiver.stop() for transceiver in self.__transceivers),
+            *([self.__sctp.stop()] if self.__sctp else []),
+        )
 
-        # stop transports
-        for transceiver in self.__transceivers:
-            await transceiver.receiver.transport.stop()
-            await transceiver.receiver.transport.transport.stop()
-        if self.__sctp:
-            await self.__sctp.transport.stop()
-            await self.__sctp.transport.transport.stop()
+        # stop transports, each one only once
+        await asyncio.gather(
+            *(self.__stopTransport(t) for t in self.__transportUsers()),
+            *(t.transport.stop() for t in self.__spareDtlsTransports),
+        )
+        self.__spareDtlsTransports = []
 
         # update states
         self.__updateIceGatheringState()
@@ -549,6 +625,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             raise InvalidStateError(
                 f'Cannot create answer in signaling state "{self.signalingState}"'
             )
+        await self.__waitCertificates()
 
         # create description
         ntp_seconds = clock.current_ntp_time() >> 32
@@ -569,6 +646,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
                         transceiver.direction, transceiver._offerDirection
                     ),
                     mid=transceiver.mid,
+                    remote_media=remote_m,
                 )
                 dtlsTransport = transceiver.receiver.transport
             else:
@@ -633,6 +711,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         """
         # check state is valid
         self.__assertNotClosed()
+        await self.__waitCertificates()
 
         # offer codecs
         for transceiver in self.__transceivers:
@@ -720,6 +799,18 @@ class RTCPeerConnection(AsyncIOEventEmitter):
 
         return wrap_session_description(description)
 
+    @staticmethod
+    async def generateCertificate() -> RTCCertificate:
+        """
+        Generate an :class:`RTCCertificate` in an executor, without blocking
+        the event loop.
+
+        The certificate can be passed to new connections using
+        :attr:`RTCConfiguration.certificates`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, RTCCertificate.generateCertificate)
+
     def getReceivers(self) -> list[RTCRtpReceiver]:
         """
         Returns the list of :class:`RTCRtpReceiver` objects that are currently
@@ -768,6 +859,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         """
         # check state is valid
         self.__assertNotClosed()
+        await self.__waitCertificates()
 
         if sessionDescription is None:
             # https://w3c.github.io/webrtc-pc/#dom-peerconnection-setlocaldescription
@@ -856,12 +948,23 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         custom_codecs: Optional[list[RTCRtpCodecParameters]] = [],
         kind: Optional[str] = None,
         track_buffer_size: Optional[int] = None,
+        track_mode: TrackMode = "all",
+        track_max_fps: Optional[float] = None,
+        track_decode: bool = True,
     ) -> None:
         """
         Changes the remote description associated with the connection.
 
         :param sessionDescription: An :class:`RTCSessionDescription` created from
                                     information received over the signaling channel.
+        :param track_mode: The consumption mode of the remote tracks, see
+                           :class:`~vsaiortc.rtcrtpreceiver.RemoteStreamTrack`.
+        :param track_max_fps: The maximum frame rate of remote video tracks
+                              using the `'max-fps'` mode. Audio tracks use the
+                              `'bounded'` mode instead.
+        :param track_decode: Whether the remote tracks decode the received media.
+                             If `False`, they yield :class:`av.packet.Packet`
+                             instances instead of frames.
         """
         self.__log_debug(
             "setRemoteDescription(%s)\n%s",
@@ -873,6 +976,7 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         description = sdp.SessionDescription.parse(sessionDescription.sdp)
         description.type = sessionDescription.type
         self.__validate_description(description, is_local=False)
+        await self.__waitCertificates()
 
         # apply description
         iceCandidates: dict[RTCIceTransport, sdp.MediaDescription] = {}
@@ -935,6 +1039,13 @@ class RTCPeerConnection(AsyncIOEventEmitter):
                         kind=media.kind,
                         id=description.webrtc_track_id(media),
                         track_buffer_size=track_buffer_size,
+                        mode=(
+                            "bounded"
+                            if track_mode == "max-fps" and media.kind == "audio"
+                            else track_mode
+                        ),
+                        max_fps=track_max_fps,
+                        decode=track_decode,
                     )
                     trackEvents.append(
                         RTCTrackEvent(
@@ -1057,38 +1168,62 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         else:
             self.__pendingRemoteDescription = description
 
+    async def _prewarm(self, count: int = 1) -> None:
+        """
+        Create `count` DTLS transports and gather their ICE candidates ahead of
+        time. They are used by the next transceivers or data channel, so that
+        setting the local description does not wait for candidates.
+        """
+        self.__assertNotClosed()
+        await self.__waitCertificates()
+        while len(self.__spareDtlsTransports) < count:
+            iceGatherer = RTCIceGatherer(iceServers=self.__configuration.iceServers)
+            iceTransport = RTCIceTransport(
+                iceGatherer, receiveBatching=self.__configuration.receiveBatching
+            )
+            self.__spareDtlsTransports.append(
+                RTCDtlsTransport(iceTransport, self.__certificates)
+            )
+        await asyncio.gather(
+            *(
+                dtlsTransport.transport.iceGatherer.gather()
+                for dtlsTransport in self.__spareDtlsTransports
+            )
+        )
+
     async def __connect(self) -> None:
-        for transceiver in self.__transceivers:
-            dtlsTransport = transceiver.receiver.transport
-            iceTransport = dtlsTransport.transport
-            if (
-                iceTransport.iceGatherer.getLocalCandidates()
-                and transceiver in self.__remoteIce
-            ):
-                await iceTransport.start(self.__remoteIce[transceiver])
-                if dtlsTransport.state == "new":
-                    await dtlsTransport.start(self.__remoteDtls[transceiver])
-                if dtlsTransport.state == "connected":
-                    if transceiver.currentDirection in ["sendonly", "sendrecv"]:
-                        await transceiver.sender.send(self.__localRtp(transceiver))
-                    if transceiver.currentDirection in ["recvonly", "sendrecv"]:
-                        await transceiver.receiver.receive(
-                            self.__remoteRtp(transceiver)
-                        )
-        if self.__sctp:
-            dtlsTransport = self.__sctp.transport
-            iceTransport = dtlsTransport.transport
-            if (
-                iceTransport.iceGatherer.getLocalCandidates()
-                and self.__sctp in self.__remoteIce
-            ):
-                await iceTransport.start(self.__remoteIce[self.__sctp])
-                if dtlsTransport.state == "new":
-                    await dtlsTransport.start(self.__remoteDtls[self.__sctp])
-                if dtlsTransport.state == "connected":
-                    await self.__sctp.start(
-                        self.__sctpRemoteCaps, self.__sctpRemotePort
-                    )
+        # transports are brought up concurrently
+        await asyncio.gather(
+            *(
+                self.__connectTransport(dtlsTransport, users)
+                for dtlsTransport, users in self.__transportUsers().items()
+            )
+        )
+
+    async def __connectTransport(
+        self,
+        dtlsTransport: RTCDtlsTransport,
+        users: list[Union[RTCRtpTransceiver, RTCSctpTransport]],
+    ) -> None:
+        iceTransport = dtlsTransport.transport
+        users = [user for user in users if user in self.__remoteIce]
+        if not iceTransport.iceGatherer.getLocalCandidates() or not users:
+            return
+
+        await iceTransport.start(self.__remoteIce[users[0]])
+        if dtlsTransport.state == "new":
+            await dtlsTransport.start(self.__remoteDtls[users[0]])
+        if dtlsTransport.state != "connected":
+            return
+
+        for user in users:
+            if isinstance(user, RTCSctpTransport):
+                await user.start(self.__sctpRemoteCaps, self.__sctpRemotePort)
+                continue
+            if user.currentDirection in ["sendonly", "sendrecv"]:
+                await user.sender.send(self.__localRtp(user))
+            if user.currentDirection in ["recvonly", "sendrecv"]:
+                await user.receiver.receive(self.__remoteRtp(user))
 
     async def __gather(self) -> None:
         coros = map(lambda t: t.iceGatherer.gather(), self.__iceTransports)
@@ -1103,17 +1238,65 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             if sender.track == track:
                 raise InvalidAccessError("Track already has a sender")
 
+    async def __stopTransport(self, dtlsTransport: RTCDtlsTransport) -> None:
+        await dtlsTransport.stop()
+        await dtlsTransport.transport.stop()
+
+    def __transportUsers(
+        self,
+    ) -> dict[RTCDtlsTransport, list[Union[RTCRtpTransceiver, RTCSctpTransport]]]:
+        # bundled transceivers and the SCTP transport share a DTLS transport
+        users: dict[
+            RTCDtlsTransport, list[Union[RTCRtpTransceiver, RTCSctpTransport]]
+        ] = {}
+        for transceiver in self.__transceivers:
+            users.setdefault(transceiver.receiver.transport, []).append(transceiver)
+        if self.__sctp:
+            users.setdefault(self.__sctp.transport, []).append(self.__sctp)
+        return users
+
+    def __generateCertificate(self) -> None:
+        # this runs in an executor, unless the certificate was needed first
+        future = self.__certificateFuture
+        if future.set_running_or_notify_cancel():
+            try:
+                future.set_result(RTCCertificate.generateCertificate())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def __startCertificateGeneration(self) -> None:
+        self.__certificateGenerating = True
+        asyncio.get_running_loop().run_in_executor(None, self.__generateCertificate)
+
+    async def __waitCertificates(self) -> None:
+        # transports created before the certificate was ready receive it now
+        if self.__certificates:
+            return
+        self.__assertNotClosed()
+        if not self.__certificateGenerating:
+            self.__startCertificateGeneration()
+        certificate = await asyncio.wrap_future(self.__certificateFuture)
+        if not self.__certificates:
+            self.__certificates = [certificate]
+            for dtlsTransport in self.__dtlsTransports:
+                dtlsTransport._set_certificate(certificate)
+
     def __createDtlsTransport(self) -> RTCDtlsTransport:
-        # create ICE transport
-        iceGatherer = RTCIceGatherer(iceServers=self.__configuration.iceServers)
+        # create ICE and DTLS transports, unless some were prepared
+        if self.__spareDtlsTransports:
+            dtlsTransport = self.__spareDtlsTransports.pop(0)
+            iceTransport = dtlsTransport.transport
+            iceGatherer = iceTransport.iceGatherer
+        else:
+            iceGatherer = RTCIceGatherer(iceServers=self.__configuration.iceServers)
+            iceTransport = RTCIceTransport(
+                iceGatherer, receiveBatching=self.__configuration.receiveBatching
+            )
+            dtlsTransport = RTCDtlsTransport(iceTransport, self.__certificates)
         iceGatherer.on("statechange", self.__updateIceGatheringState)
-        iceTransport = RTCIceTransport(iceGatherer)
         iceTransport.on("statechange", self.__updateIceConnectionState)
         iceTransport.on("statechange", self.__updateConnectionState)
         self.__iceTransports.add(iceTransport)
-
-        # create DTLS transport
-        dtlsTransport = RTCDtlsTransport(iceTransport, self.__certificates)
         dtlsTransport.on("statechange", self.__updateConnectionState)
         self.__dtlsTransports.add(dtlsTransport)
 
@@ -1143,7 +1326,11 @@ class RTCPeerConnection(AsyncIOEventEmitter):
             self.emit("datachannel", channel)
 
     def __createTransceiver(
-        self, direction: str, kind: str, sender_track: Optional[MediaStreamTrack] = None
+        self,
+        direction: str,
+        kind: str,
+        sender_track: Optional[MediaStreamTrack] = None,
+        send_encodings: Optional[list[RTCRtpEncodingParameters]] = None,
     ) -> RTCRtpTransceiver:
         dtlsTransport = None
         bundled = False
@@ -1168,8 +1355,17 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         transceiver = RTCRtpTransceiver(
             direction=direction,
             kind=kind,
-            sender=RTCRtpSender(sender_track or kind, dtlsTransport),
-            receiver=RTCRtpReceiver(kind, dtlsTransport),
+            sender=RTCRtpSender(
+                sender_track or kind,
+                dtlsTransport,
+                sendEncodings=send_encodings,
+                encoderPool=self.__configuration.encoderPool,
+            ),
+            receiver=RTCRtpReceiver(
+                kind,
+                dtlsTransport,
+                decoderScheduler=self.__configuration.decoderScheduler,
+            ),
         )
         transceiver.receiver._set_rtcp_ssrc(transceiver.sender._ssrc)
         transceiver.sender._stream_id = self.__stream_id
@@ -1197,6 +1393,9 @@ class RTCPeerConnection(AsyncIOEventEmitter):
         rtp.rtcp.cname = self.__cname
         rtp.rtcp.ssrc = transceiver.sender._ssrc
         rtp.rtcp.mux = True
+
+        media = self.__remoteDescription().media[transceiver._get_mline_index()]
+        rtp.encodings = negotiate_send_encodings(transceiver, media)
         return rtp
 
     def __log_debug(self, msg: str, *args: object) -> None:
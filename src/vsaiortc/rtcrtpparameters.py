@@ -72,8 +72,21 @@ class RTCRtpDecodingParameters(RTCRtpCodingParameters):
     pass
 
 
+@dataclass
 class RTCRtpEncodingParameters(RTCRtpCodingParameters):
-    pass
+    """
+    The :class:`RTCRtpEncodingParameters` dictionary describes one encoding of
+    the track sent by an :class:`RTCRtpSender`. Several encodings with distinct
+    RIDs are sent using simulcast.
+    """
+
+    ssrc: int = 0
+    "The Synchronization Source identifier, allocated by the sender if zero."
+    payloadType: int = 0
+    rid: Optional[str] = None
+    "The RTP stream ID of the encoding, required when using simulcast."
+    scaleResolutionDownBy: Optional[float] = None
+    "The factor by which the video resolution is scaled down for this encoding."
 
 
 @dataclass
@@ -1,20 +1,35 @@
 import asyncio
+import copy
 import datetime
+import fractions
 import logging
-import queue
 import random
-import threading
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Coroutine, Iterator
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Literal, Optional, Union
 
+from av import VideoFrame
 from av.frame import Frame
+from av.packet import Packet
+from av.video.reformatter import VideoReformatter
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
 
 from . import clock
-from .codecs import depayload, get_capabilities, get_decoder, is_rtx
+from .codecs import (
+    depayload_with_boundaries,
+    get_capabilities,
+    is_keyframe,
+    is_rtx,
+)
+from .decoderscheduler import DecoderScheduler, DecoderStream, get_decoder_scheduler
 from .exceptions import InvalidStateError
-from .jitterbuffer import JitterBuffer
+from .handoff import HandoffQueue
+from .jitterbuffer import AudioJitterBuffer, JitterBuffer, JitterFrame
 from .mediastreams import MediaStreamError, MediaStreamTrack
 from .rate import RemoteBitrateEstimator
 from .rtcdtlstransport import RTCDtlsTransport
@@ -49,46 +64,107 @@ from .utils import uint16_add, uint16_gt
 
 logger = logging.getLogger(__name__)
 
+# how many times a missing packet is requested
+NACK_MAX_RETRIES = 10
+
+# the round-trip time assumed until it is measured, and the shortest interval
+# between two requests for the same packet, in seconds
+NACK_DEFAULT_RTT = 0.1
+NACK_MIN_INTERVAL = 0.02
+
+# the size of the bitmap of missing packets, which spans the RTP history
+NACK_RING_SIZE = 2 * RTP_HISTORY_SIZE
+
+# smoothing factor for the round-trip time
+RTT_ALPHA = 0.85
+
+TrackMode = Literal["all", "bounded", "latest", "max-fps"]
+
+
+@dataclass
+class OutputFormat:
+    """
+    How decoded video frames are converted, see
+    :meth:`RemoteStreamTrack.set_output`.
+    """
+
+    format: Optional[str]
+    width: Optional[int]
+    height: Optional[int]
+    ndarray: bool
+
+
+@dataclass
+class ConvertedFrame:
+    """
+    A video frame queued along with the NumPy array built from it.
+    """
 
-def decoder_worker(
-    loop: asyncio.AbstractEventLoop,
-    input_q: queue.Queue,
-    output_q: asyncio.Queue,
-    current_frame_queue: asyncio.Queue,
-) -> None:
-    codec_name = None
-    decoder = None
-
-    while True:
-        task = input_q.get()
-        if task is None:
-            # inform the track that is has ended
-            asyncio.run_coroutine_threadsafe(output_q.put(None), loop)
-            break
-        codec, encoded_frame = task
-
-        if codec.name != codec_name:
-            decoder = get_decoder(codec)
-            codec_name = codec.name
-
-        for frame in decoder.decode(encoded_frame):
-            # pass the decoded frame to the track
-            asyncio.run_coroutine_threadsafe(output_q.put(frame), loop)
-            if current_frame_queue.qsize() >= current_frame_queue.maxsize:
-                asyncio.run_coroutine_threadsafe(
-                    current_frame_queue.get(), loop
-                ).result()
-                current_frame_queue.task_done()
-            asyncio.run_coroutine_threadsafe(current_frame_queue.put(frame), loop)
-
-    if decoder is not None:
-        del decoder
+    frame: VideoFrame
+    array: Any
+
+
+def encoded_frame_to_packet(
+    codec: RTCRtpCodecParameters, encoded_frame: JitterFrame
+) -> Packet:
+    """
+    Wrap a reassembled frame in a :class:`av.packet.Packet` without decoding it.
+
+    A copy of the codec parameters is attached as the packet's `opaque` value.
+    """
+    packet = Packet(encoded_frame.data)
+    packet.pts = encoded_frame.timestamp
+    packet.dts = encoded_frame.timestamp
+    packet.time_base = fractions.Fraction(1, codec.clockRate)
+    packet.is_keyframe = is_keyframe(codec, encoded_frame.data)
+    # PyAV releases the opaque value of all packets sharing the same object
+    # as soon as one of them is freed, so give each packet its own copy
+    packet.opaque = copy.copy(codec)
+    return packet
 
 
 class NackGenerator:
+    """
+    Track missing packets and decide when to ask for their retransmission.
+
+    Missing packets are flagged in a bitmap covering the most recent sequence
+    numbers, along with how many times each of them was requested. A packet
+    is requested as soon as it is found missing, then once per round-trip
+    time until it arrives or it has been requested `NACK_MAX_RETRIES` times.
+    Once a packet is given up on, :attr:`keyframe_needed` is set.
+    """
+
     def __init__(self) -> None:
+        self.keyframe_needed = False
         self.max_seq: Optional[int] = None
-        self.missing: set[int] = set()
+        self.rtt: Optional[float] = None
+
+        self._bitmap = 0
+        self._requested = [0.0 for i in range(NACK_RING_SIZE)]
+        self._retries = bytearray(NACK_RING_SIZE)
+
+    @property
+    def has_missing(self) -> bool:
+        """
+        Whether some packets are still missing.
+        """
+        return bool(self._bitmap)
+
+    @property
+    def missing(self) -> set[int]:
+        """
+        The sequence numbers of the missing packets.
+        """
+        return set(self.__iter_missing())
+
+    @property
+    def retry_interval(self) -> float:
+        """
+        How long to wait before requesting a missing packet again, in seconds.
+        """
+        return max(
+            self.rtt if self.rtt is not None else NACK_DEFAULT_RTT, NACK_MIN_INTERVAL
+        )
 
     def add(self, packet: RtpPacket) -> bool:
         """
@@ -100,33 +176,67 @@ class NackGenerator:
             self.max_seq = packet.sequence_number
             return missed
 
-        # mark missing packets
         if uint16_gt(packet.sequence_number, self.max_seq):
-            seq = uint16_add(self.max_seq, 1)
-            while uint16_gt(packet.sequence_number, seq):
-                self.missing.add(seq)
+            # give up on the packets which fall out of the history
+            gap = uint16_add(packet.sequence_number, -self.max_seq)
+            for i in range(min(gap, RTP_HISTORY_SIZE + 1)):
+                self.__give_up(uint16_add(self.max_seq, i - RTP_HISTORY_SIZE))
+
+            # mark missing packets, the oldest ones may not fit in the history
+            if gap > RTP_HISTORY_SIZE + 1:
+                self.keyframe_needed = True
+            for i in range(max(1, gap - RTP_HISTORY_SIZE), gap):
+                pos = uint16_add(self.max_seq, i) % NACK_RING_SIZE
+                self._bitmap |= 1 << pos
+                self._retries[pos] = 0
                 missed = True
-                seq = uint16_add(seq, 1)
             self.max_seq = packet.sequence_number
-        else:
-            self.missing.discard(packet.sequence_number)
-
-        # limit number of tracked packets
-        self.truncate()
+        elif uint16_add(self.max_seq, -packet.sequence_number) <= RTP_HISTORY_SIZE:
+            self._bitmap &= ~(1 << (packet.sequence_number % NACK_RING_SIZE))
 
         return missed
 
-    def truncate(self) -> None:
+    def nacks(self, now: float) -> list[int]:
         """
-        Limit the number of missing packets we track.
+        Return the sequence numbers which are due to be requested, oldest
+        first, and record that they have been requested.
 
-        Otherwise, the size of RTCP FB messages grows indefinitely.
+        :param now: The current time in seconds.
         """
-        if self.max_seq is not None:
-            min_seq = uint16_add(self.max_seq, -RTP_HISTORY_SIZE)
-            for seq in list(self.missing):
-                if uint16_gt(min_seq, seq):
-                    self.missing.discard(seq)
+        interval = self.retry_interval
+        lost = []
+        for seq in self.__iter_missing():
+            pos = seq % NACK_RING_SIZE
+            retries = self._retries[pos]
+            if retries and now - self._requested[pos] < interval:
+                continue
+            elif retries >= NACK_MAX_RETRIES:
+                self.__give_up(seq)
+            else:
+                lost.append(seq)
+                self._requested[pos] = now
+                self._retries[pos] = retries + 1
+        return lost
+
+    def __give_up(self, seq: int) -> None:
+        bit = 1 << (seq % NACK_RING_SIZE)
+        if self._bitmap & bit:
+            self._bitmap &= ~bit
+            self.keyframe_needed = True
+
+    def __iter_missing(self) -> Iterator[int]:
+        if self.max_seq is None:
+            return
+        # walk the bitmap from the oldest sequence number
+        start = uint16_add(self.max_seq, -RTP_HISTORY_SIZE)
+        offset = start % NACK_RING_SIZE
+        bitmap = self._bitmap
+        rotated = (bitmap >> offset) | (bitmap << (NACK_RING_SIZE - offset))
+        rotated &= (1 << NACK_RING_SIZE) - 1
+        while rotated:
+            lowest = rotated & -rotated
+            yield uint16_add(start, lowest.bit_length() - 1)
+            rotated ^= lowest
 
 
 class StreamStatistics:
@@ -198,32 +308,217 @@ class StreamStatistics:
 
 
 class RemoteStreamTrack(MediaStreamTrack):
+    """
+    A track of media received from the remote peer.
+
+    The `mode` controls what happens to decoded frames when the consumer
+    does not keep up:
+
+    - `'all'`: every frame is kept until it is received.
+    - `'bounded'`: at most `track_buffer_size` frames are kept, the oldest
+      frames are dropped.
+    - `'latest'`: only the most recent frame is kept.
+    - `'max-fps'`: video frames are sampled down to `max_fps` frames per
+      second, then handled as in the `'bounded'` mode.
+
+    Dropped frames are reported as `framesDropped` in the receiver's stats.
+
+    If `decode` is `False`, the received frames are not decoded and the track
+    yields :class:`av.packet.Packet` instances instead, whose `opaque` value
+    holds the :class:`RTCRtpCodecParameters`. Packets depend on the previous
+    ones, so use the `'all'` mode unless the consumer can wait for the next
+    key frame.
+
+    Decoded video frames can be converted to the pixel `format` and size the
+    consumer needs, see :meth:`set_output`. The conversion runs in the decoder
+    thread, after sampling, using a cached
+    :class:`av.video.reformatter.VideoReformatter`. With `ndarray`, the frames
+    are also turned into NumPy arrays there, which are returned by
+    :meth:`recv_ndarray`.
+
+    :param kind: The kind of media (`'audio'` or `'video'`).
+    :param id: The track ID.
+    :param track_buffer_size: The number of frames kept by the `'bounded'` and
+                              `'max-fps'` modes.
+    :param mode: The consumption mode.
+    :param max_fps: The maximum frame rate in the `'max-fps'` mode.
+    :param decode: Whether to decode the received frames.
+    :param format: The pixel format of the video frames, for instance `'rgb24'`.
+    :param width: The width of the video frames.
+    :param height: The height of the video frames.
+    :param ndarray: Whether to convert the video frames to NumPy arrays.
+    """
+
     def __init__(
-        self, kind: str, id: Optional[str] = None, track_buffer_size: Optional[int] = 5
+        self,
+        kind: str,
+        id: Optional[str] = None,
+        track_buffer_size: Optional[int] = 5,
+        mode: TrackMode = "all",
+        max_fps: Optional[float] = None,
+        decode: bool = True,
+        format: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        ndarray: bool = False,
     ) -> None:
         super().__init__()
         self.kind = kind
-        track_buffer_size = track_buffer_size if track_buffer_size is not None else 5
-        self._current_frame_queue: asyncio.Queue = asyncio.Queue(track_buffer_size)
         if id is not None:
             self._id = id
-        self._queue: asyncio.Queue = asyncio.Queue()
+        self._decode = decode
+        self._queue: HandoffQueue[Union[Frame, Packet, ConvertedFrame]] = HandoffQueue()
+
+        self.__frames_sampled_out = 0
+        self.__max_fps: Optional[float] = None
+        self.__mode: TrackMode = "all"
+        self.__next_frame_time: Optional[fractions.Fraction] = None
+        self.__track_buffer_size = (
+            track_buffer_size if track_buffer_size is not None else 5
+        )
+        self.__output: Optional[OutputFormat] = None
+        self.__reformatter: Optional[VideoReformatter] = None
+        self.set_mode(mode, max_fps=max_fps)
+        self.set_output(format=format, width=width, height=height, ndarray=ndarray)
+
+    @property
+    def frames_dropped(self) -> int:
+        """
+        The number of frames which were dropped before being received.
+        """
+        return self._queue.dropped + self.__frames_sampled_out
+
+    @property
+    def mode(self) -> TrackMode:
+        """
+        The consumption mode, see :meth:`set_mode`.
+        """
+        return self.__mode
+
+    def set_mode(self, mode: TrackMode, max_fps: Optional[float] = None) -> None:
+        """
+        Change the consumption mode of the track.
 
-    async def recv(self) -> Frame:
+        :param mode: One of `'all'`, `'bounded'`, `'latest'` or `'max-fps'`.
+        :param max_fps: The maximum frame rate in the `'max-fps'` mode.
         """
-        Receive the next frame.
+        if mode not in ("all", "bounded", "latest", "max-fps"):
+            raise ValueError(f"Unknown track mode '{mode}'")
+        if mode == "max-fps":
+            if self.kind != "video":
+                raise ValueError("The 'max-fps' mode is only available for video")
+            if max_fps is None or max_fps <= 0:
+                raise ValueError("The 'max-fps' mode requires a positive max_fps")
+
+        if mode == "all":
+            self._queue.resize(0)
+        elif mode == "latest":
+            self._queue.resize(1)
+        else:
+            self._queue.resize(self.__track_buffer_size)
+        self.__max_fps = max_fps if mode == "max-fps" else None
+        self.__mode = mode
+
+    def set_output(
+        self,
+        format: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        ndarray: bool = False,
+    ) -> None:
+        """
+        Change how decoded video frames are converted before being queued.
+
+        :param format: The pixel format of the video frames, for instance
+                       `'rgb24'`, or `None` to keep the decoder's format.
+        :param width: The width of the video frames, or `None` to keep it.
+        :param height: The height of the video frames, or `None` to keep it.
+        :param ndarray: Whether to convert the video frames to NumPy arrays.
+        """
+        if format is None and width is None and height is None and not ndarray:
+            self.__output = None
+            return
+
+        if self.kind != "video" or not self._decode:
+            raise ValueError("Frame conversion is only available for decoded video")
+        if ndarray and numpy is None:
+            raise ValueError("Frame conversion to NumPy arrays requires numpy")
+        if self.__reformatter is None:
+            self.__reformatter = VideoReformatter()
+        self.__output = OutputFormat(
+            format=format, width=width, height=height, ndarray=ndarray
+        )
+
+    async def recv(self) -> Union[Frame, Packet]:
         """
+        Receive the next frame, or the next packet if the track does not
+        decode.
+        """
+        item = await self.__get()
+        if isinstance(item, ConvertedFrame):
+            return item.frame
+        return item
+
+    async def recv_ndarray(self) -> Any:
+        """
+        Receive the next video frame as a NumPy array.
+
+        If the track was created with `ndarray`, the array was already built
+        in the decoder thread.
+        """
+        item = await self.__get()
+        if isinstance(item, ConvertedFrame):
+            return item.array
+        assert isinstance(item, VideoFrame), "Only video frames can be converted"
+        return item.to_ndarray()
+
+    async def current_frame(self) -> Union[Frame, Packet]:
+        """
+        Receive the next of the most recent frames.
+
+        This switches a track using the `'all'` mode to the `'bounded'` mode.
+        """
+        if self.__mode == "all":
+            self.set_mode("bounded")
+        return await self.recv()
+
+    def _put_frame(self, frame: Union[Frame, Packet]) -> None:
+        """
+        Queue a frame, this is called from the decoder thread.
+        """
+        max_fps = self.__max_fps
+        if max_fps is not None and frame.pts is not None and frame.time_base:
+            # sample frames using their exact timestamps
+            frame_time = frame.pts * frame.time_base
+            interval = 1 / fractions.Fraction(max_fps)
+            next_frame_time = self.__next_frame_time
+            if next_frame_time is not None and frame_time < next_frame_time:
+                self.__frames_sampled_out += 1
+                return
+            elif next_frame_time is None or frame_time >= next_frame_time + interval:
+                self.__next_frame_time = frame_time + interval
+            else:
+                self.__next_frame_time = next_frame_time + interval
+
+        output = self.__output
+        if output is not None and isinstance(frame, VideoFrame):
+            frame = self.__reformatter.reformat(
+                frame, format=output.format, width=output.width, height=output.height
+            )
+            if output.ndarray:
+                self._queue.put(ConvertedFrame(frame=frame, array=frame.to_ndarray()))
+                return
+        self._queue.put(frame)
+
+    async def __get(self) -> Union[Frame, Packet, ConvertedFrame]:
         if self.readyState != "live":
             raise MediaStreamError
 
-        frame = await self._queue.get()
-        if frame is None:
+        item = await self._queue.get()
+        if item is None:
             self.stop()
             raise MediaStreamError
-        return frame
-
-    async def current_frame(self) -> Frame:
-        return await self._current_frame_queue.get()
+        return item
 
 
 class TimestampMapper:
@@ -276,20 +571,28 @@ class RTCRtpReceiver:
 
     :param kind: The kind of media (`'audio'` or `'video'`).
     :param transport: An :class:`RTCDtlsTransport`.
+    :param decoderScheduler: The
+        :class:`~vsaiortc.decoderscheduler.DecoderScheduler` which decodes the
+        received frames. If `None`, the process-wide scheduler is used.
     """
 
-    def __init__(self, kind: str, transport: RTCDtlsTransport) -> None:
+    def __init__(
+        self,
+        kind: str,
+        transport: RTCDtlsTransport,
+        decoderScheduler: Optional[DecoderScheduler] = None,
+    ) -> None:
         if transport.state == "closed":
             raise InvalidStateError
 
         self._enabled = True
         self.__active_ssrc: dict[int, datetime.datetime] = {}
         self.__codecs: dict[int, RTCRtpCodecParameters] = {}
-        self.__decoder_queue: queue.Queue = queue.Queue()
-        self.__decoder_thread: Optional[threading.Thread] = None
+        self.__decoder_scheduler = decoderScheduler
+        self.__decoder_stream: Optional[DecoderStream] = None
         self.__kind = kind
         if kind == "audio":
-            self.__jitter_buffer = JitterBuffer(capacity=16, prefetch=4)
+            self.__jitter_buffer: JitterBuffer = AudioJitterBuffer(capacity=64)
             self.__nack_generator = None
             self.__remote_bitrate_estimator = None
         else:
@@ -300,6 +603,9 @@ class RTCRtpReceiver:
         self.__rtcp_exited = asyncio.Event()
         self.__rtcp_started = asyncio.Event()
         self.__rtcp_task: Optional[asyncio.Future[None]] = None
+        self.__nack_handle: Optional[asyncio.TimerHandle] = None
+        self.__nack_ssrc: Optional[int] = None
+        self.__nack_tasks: set[asyncio.Future[None]] = set()
         self.__rtx_ssrc: dict[int, int] = {}
         self.__started = False
         self.__stats = RTCStatsReport()
@@ -350,6 +656,7 @@ class RTCRtpReceiver:
 
         :rtype: :class:`RTCStatsReport`
         """
+        decoder_stream = self.__decoder_stream
         for ssrc, stream in self.__remote_streams.items():
             self.__stats.add(
                 RTCInboundRtpStreamStats(
@@ -366,6 +673,16 @@ class RTCRtpReceiver:
                     packetsLost=stream.packets_lost,
                     jitter=stream.jitter,
                     # RTPInboundRtpStreamStats
+                    framesDecoded=(
+                        decoder_stream.frames_decoded if decoder_stream else 0
+                    ),
+                    totalDecodeTime=(
+                        decoder_stream.total_decode_time if decoder_stream else 0.0
+                    ),
+                    framesDropped=self._track.frames_dropped if self._track else 0,
+                    decoderQueueDepth=(
+                        decoder_stream.queue_depth if decoder_stream else 0
+                    ),
                 )
             )
         self.__stats.update(self.transport._get_stats())
@@ -399,18 +716,13 @@ class RTCRtpReceiver:
                 if encoding.rtx:
                     self.__rtx_ssrc[encoding.rtx.ssrc] = encoding.ssrc
 
-            # start decoder thread
-            self.__decoder_thread = threading.Thread(
-                target=decoder_worker,
-                name=self.__kind + "-decoder",
-                args=(
-                    asyncio.get_event_loop(),
-                    self.__decoder_queue,
-                    self._track._queue,
-                    self._track._current_frame_queue,
-                ),
-            )
-            self.__decoder_thread.start()
+            # start decoding
+            if self._track._decode:
+                if self.__decoder_scheduler is None:
+                    self.__decoder_scheduler = get_decoder_scheduler()
+                self.__decoder_stream = self.__decoder_scheduler.open_stream(
+                    self._track
+                )
 
             self.__transport._register_rtp_receiver(self, parameters)
             self.__rtcp_task = asyncio.ensure_future(self._run_rtcp())
@@ -423,6 +735,10 @@ class RTCRtpReceiver:
         """
         Irreversibly stop the receiver.
         """
+        if self.__nack_handle is not None:
+            self.__nack_handle.cancel()
+            self.__nack_handle = None
+
         if self.__started:
             self.__transport._unregister_rtp_receiver(self)
             self.__stop_decoder()
@@ -439,6 +755,10 @@ class RTCRtpReceiver:
         self.__log_debug("< %s", packet)
 
         if isinstance(packet, RtcpSrPacket):
+            for report in packet.reports:
+                if report.ssrc == self.__rtcp_ssrc and report.lsr:
+                    self.__update_rtt(report.lsr, report.dlsr)
+
             self.__stats.add(
                 RTCRemoteOutboundRtpStreamStats(
                     # RTCStats
@@ -467,13 +787,26 @@ class RTCRtpReceiver:
 
     async def _handle_rtp_packet(self, packet: RtpPacket, arrival_time_ms: int) -> None:
         """
-        Handle an incoming RTP packet.
+        Handle an incoming RTP packet, and send the resulting feedback.
+        """
+        for feedback in self._receive_rtp_packet(packet, arrival_time_ms):
+            await feedback
+
+    def _receive_rtp_packet(
+        self, packet: RtpPacket, arrival_time_ms: int
+    ) -> list[Coroutine[Any, Any, None]]:
+        """
+        Handle an incoming RTP packet without yielding to the event loop.
+
+        The RTCP feedback which needs to be sent is returned as coroutines,
+        which the caller awaits or schedules.
         """
         self.__log_debug("< %s", packet)
+        feedback: list[Coroutine[Any, Any, None]] = []
 
         # If the receiver is disabled, discard the packet.
         if not self._enabled:
-            return
+            return feedback
 
         # feed bitrate estimator
         if self.__remote_bitrate_estimator is not None:
@@ -492,7 +825,7 @@ class RTCRtpReceiver:
                         media_ssrc=0,
                         fci=pack_remb_fci(*remb),
                     )
-                    await self._send_rtcp(rtcp_packet)
+                    feedback.append(self._send_rtcp(rtcp_packet))
 
         # keep track of sources
         self.__active_ssrc[packet.ssrc] = clock.current_datetime()
@@ -503,7 +836,7 @@ class RTCRtpReceiver:
             self.__log_debug(
                 "x RTP packet with unknown payload type %d", packet.payload_type
             )
-            return
+            return feedback
 
         # feed RTCP statistics
         if packet.ssrc not in self.__remote_streams:
@@ -515,7 +848,7 @@ class RTCRtpReceiver:
             original_ssrc = self.__rtx_ssrc.get(packet.ssrc)
             if original_ssrc is None:
                 self.__log_debug("x RTX packet from unknown SSRC %d", packet.ssrc)
-                return
+                return feedback
 
             apt = codec.parameters.get("apt")
             if (
@@ -523,39 +856,71 @@ class RTCRtpReceiver:
                 or not isinstance(apt, int)
                 or apt not in self.__codecs
             ):
-                return
+                return feedback
 
             packet = unwrap_rtx(packet, payload_type=apt, ssrc=original_ssrc)
             codec = self.__codecs[apt]
 
-        # send NACKs for any missing any packets
-        if self.__nack_generator is not None and self.__nack_generator.add(packet):
-            await self._send_rtcp_nack(
-                packet.ssrc, sorted(self.__nack_generator.missing)
-            )
+        # send NACKs for the missing packets which are due, and ask for a
+        # keyframe once some of them are given up on
+        keyframe_needed = False
+        if self.__nack_generator is not None:
+            self.__nack_generator.add(packet)
+            lost = self.__nack_generator.nacks(time.time())
+            if lost:
+                feedback.append(self._send_rtcp_nack(packet.ssrc, lost))
+            keyframe_needed = self.__nack_generator.keyframe_needed
+            self.__nack_generator.keyframe_needed = False
+            self.__nack_ssrc = packet.ssrc
+            self.__schedule_nack_retry()
 
         # parse codec-specific information
+        frame_start: Optional[bool] = None
+        fragment_end = True
         try:
             if packet.payload:
-                packet._data = depayload(codec, packet.payload)  # type: ignore
+                data, frame_start, fragment_end = depayload_with_boundaries(
+                    codec,
+                    packet.payload,  # type: ignore
+                )
+                packet.depayloaded = data
             else:
-                packet._data = b""  # type: ignore
+                packet.depayloaded = b""
         except ValueError as exc:
             self.__log_debug("x RTP payload parsing failed: %s", exc)
-            return
+            return feedback
 
-        # try to re-assemble encoded frame
-        pli_flag, encoded_frame = self.__jitter_buffer.add(packet)
+        # try to re-assemble encoded frame, a video frame ends with the
+        # marker bit once its last packet is complete
+        if isinstance(self.__jitter_buffer, AudioJitterBuffer):
+            pli_flag, encoded_frame = self.__jitter_buffer.add(
+                packet, arrival_time_ms=arrival_time_ms, clock_rate=codec.clockRate
+            )
+        else:
+            pli_flag, encoded_frame = self.__jitter_buffer.add(
+                packet,
+                frame_start=frame_start,
+                frame_end=bool(packet.marker) and fragment_end,
+            )
         # check if the PLI should be sent
-        if pli_flag:
-            await self._send_rtcp_pli(packet.ssrc)
+        if pli_flag or keyframe_needed:
+            feedback.append(self._send_rtcp_pli(packet.ssrc))
+
+        # decode the complete encoded frames or pass them as is
+        while encoded_frame is not None:
+            if self.__started:
+                encoded_frame.timestamp = self.__timestamp_mapper.map(
+                    encoded_frame.timestamp
+                )
+                if self.__decoder_stream is not None:
+                    self.__decoder_stream.put(codec, encoded_frame)
+                else:
+                    self._track._put_frame(
+                        encoded_frame_to_packet(codec, encoded_frame)
+                    )
+            encoded_frame = self.__jitter_buffer.pop()
 
-        # if we have a complete encoded frame, decode it
-        if encoded_frame is not None and self.__decoder_thread:
-            encoded_frame.timestamp = self.__timestamp_mapper.map(
-                encoded_frame.timestamp
-            )
-            self.__decoder_queue.put((codec, encoded_frame))
+        return feedback
 
     async def _run_rtcp(self) -> None:
         self.__log_debug("- RTCP started")
@@ -628,14 +993,62 @@ class RTCRtpReceiver:
             )
             await self._send_rtcp(packet)
 
+    def __nack_retry_expired(self) -> None:
+        # the stream may have stalled, request the packets which are due
+        self.__nack_handle = None
+        generator = self.__nack_generator
+        feedback = []
+        lost = generator.nacks(time.time())
+        if lost:
+            feedback.append(self._send_rtcp_nack(self.__nack_ssrc, lost))
+        if generator.keyframe_needed:
+            generator.keyframe_needed = False
+            feedback.append(self._send_rtcp_pli(self.__nack_ssrc))
+        for coroutine in feedback:
+            task = asyncio.ensure_future(coroutine)
+            self.__nack_tasks.add(task)
+            task.add_done_callback(self.__nack_tasks.discard)
+        self.__schedule_nack_retry()
+
+    def __schedule_nack_retry(self) -> None:
+        """
+        Request the missing packets again once they are due, even if no more
+        packets arrive.
+        """
+        generator = self.__nack_generator
+        if self.__nack_handle is None and generator.has_missing:
+            self.__nack_handle = asyncio.get_running_loop().call_later(
+                generator.retry_interval, self.__nack_retry_expired
+            )
+
+    def __update_rtt(self, lsr: int, dlsr: int) -> None:
+        """
+        Estimate the round-trip time from a report about our own stream,
+        as described in RFC 3550 section 6.4.1.
+        """
+        if self.__nack_generator is None:
+            return
+
+        now = (clock.current_ntp_time() >> 16) & 0xFFFFFFFF
+        rtt = ((now - lsr - dlsr) & 0xFFFFFFFF) / 65536
+        if rtt > 60:
+            # the clock went backwards
+            return
+
+        generator = self.__nack_generator
+        if generator.rtt is None:
+            generator.rtt = rtt
+        else:
+            generator.rtt = RTT_ALPHA * generator.rtt + (1 - RTT_ALPHA) * rtt
+
     def _set_rtcp_ssrc(self, ssrc: int) -> None:
         self.__rtcp_ssrc = ssrc
 
     def __stop_decoder(self) -> None:
         """
-        Stop the decoder thread, which will in turn stop the track.
+        Stop decoding, which will in turn stop the track.
         """
-        if self.__decoder_thread:
-            self.__decoder_queue.put(None)
-            self.__decoder_thread.join()
-            self.__decoder_thread = None
+        if self.__decoder_stream:
+            self.__decoder_stream.close()
+        elif self.__started and self._track is not None:
+            self._track._queue.close()
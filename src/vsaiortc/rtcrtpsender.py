@@ -1,13 +1,16 @@
 import asyncio
+import dataclasses
 import logging
 import random
+import re
 import time
 import traceback
 import uuid
 from collections.abc import Callable
-from typing import Optional, Union
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Union
 
-from av import AudioFrame
+from av import AudioFrame, VideoFrame
 from av.frame import Frame
 
 from . import clock, rtp
@@ -15,17 +18,19 @@ from .codecs import get_capabilities, get_encoder, is_rtx
 from .codecs.base import Encoder
 from .exceptions import InvalidStateError
 from .mediastreams import MediaStreamError, MediaStreamTrack
+from .pacer import PacketPriority
 from .rtcdtlstransport import RTCDtlsTransport
 from .rtcrtpparameters import (
     RTCRtpCapabilities,
     RTCRtpCodecParameters,
+    RTCRtpEncodingParameters,
+    RTCRtpRtxParameters,
     RTCRtpSendParameters,
 )
 from .rtp import (
     RTCP_PSFB_APP,
     RTCP_PSFB_PLI,
     RTCP_RTPFB_NACK,
-    RTP_HISTORY_SIZE,
     AnyRtcpPacket,
     RtcpByePacket,
     RtcpPsfbPacket,
@@ -35,9 +40,9 @@ from .rtp import (
     RtcpSenderInfo,
     RtcpSourceInfo,
     RtcpSrPacket,
-    RtpPacket,
+    RtpPacketHistory,
     unpack_remb_fci,
-    wrap_rtx,
+    wrap_rtx_data,
 )
 from .stats import (
     RTCOutboundRtpStreamStats,
@@ -46,10 +51,16 @@ from .stats import (
 )
 from .utils import random16, random32, uint16_add, uint32_add
 
+if TYPE_CHECKING:
+    from .sharedencoder import SharedEncoderPool, SharedEncoderSubscription
+
 logger = logging.getLogger(__name__)
 
 RTT_ALPHA = 0.85
 
+# RFC 8851, limited to what fits in a one-byte header extension
+RID_REGEX = re.compile(r"^[A-Za-z0-9_-]{1,16}$")
+
 
 def random_sequence_number() -> int:
     """
@@ -71,6 +82,45 @@ class RTCEncodedFrame:
         self.audio_level = audio_level
 
 
+class SendLayer:
+    """
+    The state of one encoding sent by an :class:`RTCRtpSender`.
+
+    Without simulcast the sender has a single layer.
+    """
+
+    def __init__(self, encoding: RTCRtpEncodingParameters) -> None:
+        self.encoding = encoding
+        self.encoder: Optional[Encoder] = None
+        self.force_keyframe = False
+        self.history = RtpPacketHistory()
+        self.rtx_sequence_number = random_sequence_number()
+        self.sequence_number = random_sequence_number()
+
+        # stats
+        self.lsr: Optional[int] = None
+        self.lsr_time: Optional[float] = None
+        self.ntp_timestamp = 0
+        self.rtp_timestamp = 0
+        self.octet_count = 0
+        self.packet_count = 0
+        self.rtt: Optional[float] = None
+        self.frames_encoded = 0
+        self.total_encode_time = 0.0
+
+    @property
+    def bitrate_weight(self) -> float:
+        """
+        The share of the target bitrate given to this layer, proportional to
+        its number of pixels.
+        """
+        scale = self.encoding.scaleResolutionDownBy or 1.0
+        return 1.0 / (scale * scale)
+
+
+EncodedFrames = list[tuple[SendLayer, RTCEncodedFrame]]
+
+
 class RTCRtpSender:
     """
     The :class:`RTCRtpSender` interface provides the ability to control and
@@ -80,13 +130,34 @@ class RTCRtpSender:
     :param trackOrKind: Either a :class:`MediaStreamTrack` instance or a
                          media kind (`'audio'` or `'video'`).
     :param transport: An :class:`RTCDtlsTransport`.
+    :param encodeExecutor: The :class:`concurrent.futures.Executor` in which
+                           frames are encoded. If `None`, the sender uses a
+                           dedicated thread per encoding.
+    :param encodeQueueSize: The maximum number of encoded frames waiting to be
+                            sent. Encoding of the next frame overlaps with
+                            sending of the current one.
+    :param sendEncodings: A list of :class:`RTCRtpEncodingParameters`. Several
+                          video encodings with distinct `rid` values are sent
+                          using simulcast, each one scaled down by its
+                          `scaleResolutionDownBy`.
+    :param encoderPool: A :class:`~vsaiortc.sharedencoder.SharedEncoderPool`.
+                        If given, the track is encoded once for all the
+                        senders using the pool with the same codec.
     """
 
     def __init__(
-        self, trackOrKind: Union[MediaStreamTrack, str], transport: RTCDtlsTransport
+        self,
+        trackOrKind: Union[MediaStreamTrack, str],
+        transport: RTCDtlsTransport,
+        encodeExecutor: Optional[Executor] = None,
+        encodeQueueSize: int = 1,
+        sendEncodings: Optional[list[RTCRtpEncodingParameters]] = None,
+        encoderPool: Optional["SharedEncoderPool"] = None,
     ) -> None:
         if transport.state == "closed":
             raise InvalidStateError
+        if encodeQueueSize < 1:
+            raise ValueError("encodeQueueSize must be at least 1")
 
         if isinstance(trackOrKind, MediaStreamTrack):
             self.__kind = trackOrKind.kind
@@ -94,39 +165,58 @@ class RTCRtpSender:
         else:
             self.__kind = trackOrKind
             self.replaceTrack(None)
+
+        # validate encodings, and allocate their SSRCs
+        if not sendEncodings:
+            sendEncodings = [RTCRtpEncodingParameters()]
+        elif len(sendEncodings) > 1:
+            if self.__kind != "video":
+                raise ValueError("Simulcast is only supported for video")
+            rids = [encoding.rid for encoding in sendEncodings]
+            if None in rids or len(set(rids)) != len(rids):
+                raise ValueError("Simulcast encodings must have distinct RIDs")
+            if encoderPool is not None:
+                raise ValueError("Simulcast cannot be used with shared encoders")
+        self.__encodings: list[RTCRtpEncodingParameters] = []
+        for encoding in sendEncodings:
+            if encoding.rid is not None and not RID_REGEX.match(encoding.rid):
+                raise ValueError(f'Invalid RID "{encoding.rid}"')
+            if (
+                encoding.scaleResolutionDownBy is not None
+                and encoding.scaleResolutionDownBy < 1.0
+            ):
+                raise ValueError("scaleResolutionDownBy must be at least 1.0")
+            self.__encodings.append(
+                dataclasses.replace(
+                    encoding,
+                    ssrc=encoding.ssrc or random32(),
+                    rtx=encoding.rtx or RTCRtpRtxParameters(ssrc=random32()),
+                )
+            )
+
         self.__cname: Optional[str] = None
-        self._ssrc = random32()
-        self._rtx_ssrc = random32()
         # FIXME: how should this be initialised?
         self._stream_id = str(uuid.uuid4())
         self._enabled = True
-        self.__encoder: Optional[Encoder] = None
-        self.__force_keyframe = False
+        self.__encode_executor = encodeExecutor
+        self.__encode_queue_size = encodeQueueSize
+        self.__encoder_pool = encoderPool
+        self.__shared_encoding: Optional[SharedEncoderSubscription] = None
+        self.__layers = [SendLayer(self.__encodings[0])]
         self.__loop = asyncio.get_event_loop()
         self.__mid: Optional[str] = None
         self.__rtp_exited = asyncio.Event()
         self.__rtp_header_extensions_map = rtp.HeaderExtensionsMap()
         self.__rtp_started = asyncio.Event()
         self.__rtp_task: Optional[asyncio.Future[None]] = None
-        self.__rtp_history: dict[int, RtpPacket] = {}
         self.__rtcp_exited = asyncio.Event()
         self.__rtcp_started = asyncio.Event()
         self.__rtcp_task: Optional[asyncio.Future[None]] = None
         self.__rtx_payload_type: Optional[int] = None
-        self.__rtx_sequence_number = random_sequence_number()
         self.__started = False
         self.__stats = RTCStatsReport()
         self.__transport = transport
 
-        # stats
-        self.__lsr: Optional[int] = None
-        self.__lsr_time: Optional[float] = None
-        self.__ntp_timestamp = 0
-        self.__rtp_timestamp = 0
-        self.__octet_count = 0
-        self.__packet_count = 0
-        self.__rtt: Optional[float] = None
-
         # logging
         self.__log_debug: Callable[..., None] = lambda *args: None
         if logger.isEnabledFor(logging.DEBUG):
@@ -153,6 +243,26 @@ class RTCRtpSender:
         """
         return self.__transport
 
+    @property
+    def _encodings(self) -> list[RTCRtpEncodingParameters]:
+        return self.__encodings
+
+    @property
+    def _ssrc(self) -> int:
+        return self.__encodings[0].ssrc
+
+    @_ssrc.setter
+    def _ssrc(self, ssrc: int) -> None:
+        self.__encodings[0].ssrc = ssrc
+
+    @property
+    def _rtx_ssrc(self) -> int:
+        return self.__encodings[0].rtx.ssrc
+
+    @_rtx_ssrc.setter
+    def _rtx_ssrc(self, ssrc: int) -> None:
+        self.__encodings[0].rtx = RTCRtpRtxParameters(ssrc=ssrc)
+
     @classmethod
     def getCapabilities(self, kind: str) -> RTCRtpCapabilities:
         """
@@ -169,23 +279,29 @@ class RTCRtpSender:
 
         :rtype: :class:`RTCStatsReport`
         """
-        self.__stats.add(
-            RTCOutboundRtpStreamStats(
-                # RTCStats
-                timestamp=clock.current_datetime(),
-                type="outbound-rtp",
-                id="outbound-rtp_" + str(id(self)),
-                # RTCStreamStats
-                ssrc=self._ssrc,
-                kind=self.__kind,
-                transportId=self.transport._stats_id,
-                # RTCSentRtpStreamStats
-                packetsSent=self.__packet_count,
-                bytesSent=self.__octet_count,
-                # RTCOutboundRtpStreamStats
-                trackId=str(id(self.track)),
+        for layer in self.__layers:
+            self.__stats.add(
+                RTCOutboundRtpStreamStats(
+                    # RTCStats
+                    timestamp=clock.current_datetime(),
+                    type="outbound-rtp",
+                    id=self.__stats_id("outbound-rtp", layer),
+                    # RTCStreamStats
+                    ssrc=layer.encoding.ssrc,
+                    kind=self.__kind,
+                    transportId=self.transport._stats_id,
+                    # RTCSentRtpStreamStats
+                    packetsSent=layer.packet_count,
+                    bytesSent=layer.octet_count,
+                    # RTCOutboundRtpStreamStats
+                    trackId=str(id(self.track)),
+                    rid=layer.encoding.rid,
+                    framesEncoded=layer.frames_encoded,
+                    totalEncodeTime=layer.total_encode_time,
+                    rtpHistoryHits=layer.history.hits,
+                    rtpHistoryMisses=layer.history.misses,
+                )
             )
-        )
         self.__stats.update(self.transport._get_stats())
 
         return self.__stats
@@ -210,6 +326,12 @@ class RTCRtpSender:
             self.__cname = parameters.rtcp.cname
             self.__mid = parameters.muxId
 
+            # the negotiated encodings, one layer is sent for each of them
+            if parameters.encodings:
+                self.__layers = [
+                    SendLayer(encoding) for encoding in parameters.encodings
+                ]
+
             # make note of the RTP header extension IDs
             self.__transport._register_rtp_sender(self, parameters)
             self.__rtp_header_extensions_map.configure(parameters)
@@ -242,39 +364,47 @@ class RTCRtpSender:
 
     async def _handle_rtcp_packet(self, packet: AnyRtcpPacket) -> None:
         if isinstance(packet, (RtcpRrPacket, RtcpSrPacket)):
-            for report in filter(lambda x: x.ssrc == self._ssrc, packet.reports):
+            for report in packet.reports:
+                layer = self.__layer_for_ssrc(report.ssrc)
+                if layer is None:
+                    continue
+
                 # estimate round-trip time
-                if self.__lsr == report.lsr and report.dlsr:
-                    rtt = time.time() - self.__lsr_time - (report.dlsr / 65536)
-                    if self.__rtt is None:
-                        self.__rtt = rtt
+                if layer.lsr == report.lsr and report.dlsr:
+                    rtt = time.time() - layer.lsr_time - (report.dlsr / 65536)
+                    if layer.rtt is None:
+                        layer.rtt = rtt
                     else:
-                        self.__rtt = RTT_ALPHA * self.__rtt + (1 - RTT_ALPHA) * rtt
+                        layer.rtt = RTT_ALPHA * layer.rtt + (1 - RTT_ALPHA) * rtt
 
                 self.__stats.add(
                     RTCRemoteInboundRtpStreamStats(
                         # RTCStats
                         timestamp=clock.current_datetime(),
                         type="remote-inbound-rtp",
-                        id="remote-inbound-rtp_" + str(id(self)),
+                        id=self.__stats_id("remote-inbound-rtp", layer),
                         # RTCStreamStats
                         ssrc=packet.ssrc,
                         kind=self.__kind,
                         transportId=self.transport._stats_id,
                         # RTCReceivedRtpStreamStats
-                        packetsReceived=self.__packet_count - report.packets_lost,
+                        packetsReceived=layer.packet_count - report.packets_lost,
                         packetsLost=report.packets_lost,
                         jitter=report.jitter,
                         # RTCRemoteInboundRtpStreamStats
-                        roundTripTime=self.__rtt,
+                        roundTripTime=layer.rtt,
                         fractionLost=report.fraction_lost,
                     )
                 )
+
+                # let the encoder protect the stream against the reported loss
+                if layer.encoder and hasattr(layer.encoder, "packet_loss"):
+                    layer.encoder.packet_loss = report.fraction_lost * 100 // 256
         elif isinstance(packet, RtcpRtpfbPacket) and packet.fmt == RTCP_RTPFB_NACK:
             for seq in packet.lost:
-                await self._retransmit(seq)
+                await self._retransmit(seq, ssrc=packet.media_ssrc)
         elif isinstance(packet, RtcpPsfbPacket) and packet.fmt == RTCP_PSFB_PLI:
-            self._send_keyframe()
+            self._send_keyframe(ssrc=packet.media_ssrc)
         elif isinstance(packet, RtcpPsfbPacket) and packet.fmt == RTCP_PSFB_APP:
             try:
                 bitrate, ssrcs = unpack_remb_fci(packet.fci)
@@ -282,14 +412,62 @@ class RTCRtpSender:
                     self.__log_debug(
                         "- receiver estimated maximum bitrate %d bps", bitrate
                     )
-                    if self.__encoder and hasattr(self.__encoder, "target_bitrate"):
-                        self.__encoder.target_bitrate = bitrate
+                    self._handle_target_bitrate(bitrate)
             except ValueError:
                 pass
 
-    async def _next_encoded_frame(
-        self, codec: RTCRtpCodecParameters
-    ) -> Optional[RTCEncodedFrame]:
+    def _handle_target_bitrate(self, bitrate: int) -> None:
+        """
+        Apply a bandwidth estimate, from REMB or transport-wide congestion
+        control, to the encoders.
+
+        With simulcast, the bitrate is shared between the layers in
+        proportion to their number of pixels.
+        """
+        if self.__encoder_pool is not None:
+            # the shared encoder runs at the pool's bitrate
+            return
+
+        total_weight = sum(layer.bitrate_weight for layer in self.__layers)
+        for layer in self.__layers:
+            if layer.encoder and hasattr(layer.encoder, "target_bitrate"):
+                layer.encoder.target_bitrate = int(
+                    bitrate * layer.bitrate_weight / total_weight
+                )
+
+    @staticmethod
+    def _encode_frame(
+        encoder: Encoder,
+        frame: Frame,
+        force_keyframe: bool,
+        scale: Optional[float] = None,
+    ) -> tuple[list[bytes], int, Optional[int], float]:
+        """
+        Encode a frame, and compute its audio level for audio frames.
+
+        Video frames are first scaled down by `scale`, if given.
+
+        This runs in an executor, away from the event loop. The time spent
+        encoding is returned in seconds.
+        """
+        start = time.perf_counter()
+        audio_level = None
+        if isinstance(frame, AudioFrame):
+            audio_level = rtp.compute_audio_level_dbov(frame)
+        elif isinstance(frame, VideoFrame) and scale is not None and scale > 1.0:
+            scaled = frame.reformat(
+                width=max(2, int(frame.width / scale) & ~1),
+                height=max(2, int(frame.height / scale) & ~1),
+            )
+            scaled.pts = frame.pts
+            scaled.time_base = frame.time_base
+            frame = scaled
+        payloads, timestamp = encoder.encode(frame, force_keyframe)
+        return payloads, timestamp, audio_level, time.perf_counter() - start
+
+    async def _next_encoded_frames(
+        self, codec: RTCRtpCodecParameters, executor: Executor
+    ) -> EncodedFrames:
         # Get [Frame|Packet].
         data = await self.__track.recv()
 
@@ -297,110 +475,276 @@ class RTCRtpSender:
         # We still want to read from the track in order to avoid frames
         # accumulating in memory.
         if not self._enabled:
-            return None
+            return []
 
-        audio_level = None
-
-        if self.__encoder is None:
-            self.__encoder = get_encoder(codec)
+        for layer in self.__layers:
+            if layer.encoder is None:
+                layer.encoder = get_encoder(codec)
 
+        results: EncodedFrames = []
         if isinstance(data, Frame):
-            # Encode the frame.
-            if isinstance(data, AudioFrame):
-                audio_level = rtp.compute_audio_level_dbov(data)
-
-            force_keyframe = self.__force_keyframe
-            self.__force_keyframe = False
-            payloads, timestamp = await self.__loop.run_in_executor(
-                None, self.__encoder.encode, data, force_keyframe
+            # Encode the frame once per layer, in parallel.
+            layers = self.__layers
+            force_keyframes = [layer.force_keyframe for layer in layers]
+            for layer in layers:
+                layer.force_keyframe = False
+            encoded = await asyncio.gather(
+                *(
+                    self.__loop.run_in_executor(
+                        executor,
+                        self._encode_frame,
+                        layer.encoder,
+                        data,
+                        force_keyframe,
+                        layer.encoding.scaleResolutionDownBy,
+                    )
+                    for layer, force_keyframe in zip(layers, force_keyframes)
+                )
             )
+            for layer, (payloads, timestamp, audio_level, encode_time) in zip(
+                layers, encoded
+            ):
+                layer.frames_encoded += 1
+                layer.total_encode_time += encode_time
+
+                # If the encoder did not return any payloads, skip the layer.
+                # This may be due to a delay caused by resampling.
+                if payloads:
+                    results.append(
+                        (layer, RTCEncodedFrame(payloads, timestamp, audio_level))
+                    )
         else:
-            # Pack the pre-encoded data.
-            payloads, timestamp = self.__encoder.pack(data)
-
-        # If the encoder did not return any payloads, return `None`.
-        # This may be due to a delay caused by resampling.
-        if not payloads:
-            return None
+            # Pack the pre-encoded data, which can only be sent on one layer.
+            layer = self.__layers[0]
+            payloads, timestamp = layer.encoder.pack(data)
+            if payloads:
+                results.append((layer, RTCEncodedFrame(payloads, timestamp, None)))
 
-        return RTCEncodedFrame(payloads, timestamp, audio_level)
+        return results
 
-    async def _retransmit(self, sequence_number: int) -> None:
+    async def _retransmit(
+        self, sequence_number: int, ssrc: Optional[int] = None
+    ) -> None:
         """
         Retransmit an RTP packet which was reported as lost.
         """
-        packet = self.__rtp_history.get(sequence_number % RTP_HISTORY_SIZE)
-        if packet and packet.sequence_number == sequence_number:
-            if self.__rtx_payload_type is not None:
-                packet = wrap_rtx(
-                    packet,
-                    payload_type=self.__rtx_payload_type,
-                    sequence_number=self.__rtx_sequence_number,
-                    ssrc=self._rtx_ssrc,
-                )
-                self.__rtx_sequence_number = uint16_add(self.__rtx_sequence_number, 1)
-
-            self.__log_debug("> %s", packet)
-            packet_bytes = packet.serialize(self.__rtp_header_extensions_map)
-            await self.transport._send_rtp(packet_bytes)
+        layer = self.__layers[0] if ssrc is None else self.__layer_for_ssrc(ssrc)
+        if layer is None:
+            return
+
+        packet_bytes = layer.history.get(sequence_number)
+        if packet_bytes is None:
+            return
+
+        if self.__rtx_payload_type is not None:
+            packet_bytes = wrap_rtx_data(
+                packet_bytes,
+                payload_type=self.__rtx_payload_type,
+                sequence_number=layer.rtx_sequence_number,
+                ssrc=layer.encoding.rtx.ssrc,
+                extensions_map=self.__rtp_header_extensions_map,
+            )
+            self.__log_debug(
+                "> RtpPacket(seq=%d, rtx_seq=%d, %d bytes)",
+                sequence_number,
+                layer.rtx_sequence_number,
+                len(packet_bytes),
+            )
+            layer.rtx_sequence_number = uint16_add(layer.rtx_sequence_number, 1)
+        else:
+            self.__log_debug(
+                "> RtpPacket(seq=%d, %d bytes)", sequence_number, len(packet_bytes)
+            )
+        self.transport._queue_rtp(
+            packet_bytes,
+            PacketPriority.RETRANSMISSION,
+            self.__rtp_header_extensions_map.transport_sequence_number_offset(
+                packet_bytes
+            ),
+        )
 
-    def _send_keyframe(self) -> None:
+    def _send_keyframe(self, ssrc: Optional[int] = None) -> None:
         """
-        Request the next frame to be a keyframe.
+        Request the next frame to be a keyframe, for the layer with the given
+        SSRC or for all the layers.
         """
-        self.__force_keyframe = True
-
-    async def _run_rtp(self, codec: RTCRtpCodecParameters) -> None:
-        self.__log_debug("- RTP started")
-        self.__rtp_started.set()
+        for layer in self.__layers:
+            if ssrc is None or ssrc == layer.encoding.ssrc:
+                layer.force_keyframe = True
+        if self.__shared_encoding is not None:
+            self.__shared_encoding.request_keyframe()
+
+    async def _run_encode(
+        self,
+        codec: RTCRtpCodecParameters,
+        executor: Executor,
+        queue: "asyncio.Queue[Union[EncodedFrames, Exception]]",
+    ) -> None:
+        """
+        Read and encode frames from the track, ahead of packetization.
 
-        sequence_number = random_sequence_number()
-        timestamp_origin = random32()
+        Any exception is handed over to the RTP task through the queue.
+        """
         try:
             while True:
                 if not self.__track:
                     await asyncio.sleep(0.02)
                     continue
 
-                # Fetch the next encoded frame. This can be `None` if the sender
+                # Fetch the next encoded frames. This can be empty if the sender
                 # is disabled, in which case we just continue the loop.
-                enc_frame = await self._next_encoded_frame(codec)
-                if enc_frame is None:
+                enc_frames = await self._next_encoded_frames(codec, executor)
+                if enc_frames:
+                    await queue.put(enc_frames)
+        except Exception as exc:
+            await queue.put(exc)
+
+    async def _run_shared_encode(
+        self,
+        codec: RTCRtpCodecParameters,
+        queue: "asyncio.Queue[Union[EncodedFrames, Exception]]",
+    ) -> None:
+        """
+        Receive frames from a shared encoder, ahead of packetization.
+
+        Any exception is handed over to the RTP task through the queue.
+        """
+        assert self.__encoder_pool is not None
+        layer = self.__layers[0]
+        skipped = False
+        try:
+            while True:
+                if not self.__track:
+                    await asyncio.sleep(0.02)
+                    continue
+
+                # follow track replacements
+                subscription = self.__shared_encoding
+                if subscription is None or subscription.track is not self.__track:
+                    if subscription is not None:
+                        subscription.unsubscribe()
+                    subscription = self.__encoder_pool.subscribe(self.__track, codec)
+                    self.__shared_encoding = subscription
+
+                enc_frame, encode_time = await subscription.recv()
+
+                # Frames are still received while the sender is disabled, so
+                # that they do not accumulate. Since frames depend on the
+                # previous ones, resume on a keyframe.
+                if not self._enabled:
+                    skipped = True
+                    continue
+                elif skipped:
+                    skipped = False
+                    subscription.resync()
                     continue
 
-                timestamp = uint32_add(timestamp_origin, enc_frame.timestamp)
+                layer.frames_encoded += 1
+                layer.total_encode_time += encode_time
+                await queue.put([(layer, enc_frame)])
+        except Exception as exc:
+            await queue.put(exc)
+        finally:
+            if self.__shared_encoding is not None:
+                self.__shared_encoding.unsubscribe()
+                self.__shared_encoding = None
 
-                for i, payload in enumerate(enc_frame.payloads):
-                    packet = RtpPacket(
-                        payload_type=codec.payloadType,
-                        sequence_number=sequence_number,
-                        timestamp=timestamp,
-                    )
-                    packet.ssrc = self._ssrc
-                    packet.payload = payload
-                    packet.marker = (i == len(enc_frame.payloads) - 1) and 1 or 0
-
-                    # set header extensions
-                    packet.extensions.abs_send_time = (
-                        clock.current_ntp_time() >> 14
-                    ) & 0x00FFFFFF
-                    packet.extensions.mid = self.__mid
+    async def _run_rtp(self, codec: RTCRtpCodecParameters) -> None:
+        self.__log_debug("- RTP started")
+        self.__rtp_started.set()
+
+        # Frames are encoded in a separate task, so that encoding the next
+        # frame overlaps with sending the current one.
+        executor = self.__encode_executor
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=len(self.__layers),
+                thread_name_prefix=self.__kind + "-encoder",
+            )
+        encode_queue: asyncio.Queue[Union[EncodedFrames, Exception]] = asyncio.Queue(
+            maxsize=self.__encode_queue_size
+        )
+        if self.__encoder_pool is not None:
+            encode_task = asyncio.ensure_future(
+                self._run_shared_encode(codec, encode_queue)
+            )
+        else:
+            encode_task = asyncio.ensure_future(
+                self._run_encode(codec, executor, encode_queue)
+            )
+
+        priority = PacketPriority.VIDEO
+        if self.__kind == "audio":
+            priority = PacketPriority.AUDIO
+
+        timestamp_origin = random32()
+        try:
+            # precompile the RTP headers, only a few fields change per packet
+            header_templates = {
+                id(layer): rtp.RtpHeaderTemplate(
+                    self.__rtp_header_extensions_map,
+                    payload_type=codec.payloadType,
+                    ssrc=layer.encoding.ssrc,
+                    extensions=rtp.HeaderExtensions(
+                        mid=self.__mid, rtp_stream_id=layer.encoding.rid
+                    ),
+                )
+                for layer in self.__layers
+            }
+
+            while True:
+                enc_frames = await encode_queue.get()
+                if isinstance(enc_frames, Exception):
+                    raise enc_frames
+
+                for layer, enc_frame in enc_frames:
+                    header_template = header_templates[id(layer)]
+                    timestamp = uint32_add(timestamp_origin, enc_frame.timestamp)
+                    audio_level = None
                     if enc_frame.audio_level is not None:
-                        packet.extensions.audio_level = (False, -enc_frame.audio_level)
+                        audio_level = (False, -enc_frame.audio_level)
+
+                    last = len(enc_frame.payloads) - 1
+                    packets = []
+                    for i, payload in enumerate(enc_frame.payloads):
+                        marker = (i == last) and 1 or 0
+                        sequence_number = layer.sequence_number
+                        packet_bytes = header_template.serialize(
+                            sequence_number=sequence_number,
+                            timestamp=timestamp,
+                            marker=marker,
+                            payload=payload,
+                            abs_send_time=(clock.current_ntp_time() >> 14) & 0x00FFFFFF,
+                            audio_level=audio_level,
+                        )
 
-                    # send packet
-                    self.__log_debug("> %s", packet)
-                    self.__rtp_history[packet.sequence_number % RTP_HISTORY_SIZE] = (
-                        packet
+                        self.__log_debug(
+                            "> RtpPacket(ssrc=%d, seq=%d, ts=%d, marker=%d, "
+                            "payload=%d, %d bytes)",
+                            layer.encoding.ssrc,
+                            sequence_number,
+                            timestamp,
+                            marker,
+                            codec.payloadType,
+                            len(payload),
+                        )
+                        layer.history.add(
+                            sequence_number, packet_bytes, clock.current_ms()
+                        )
+                        packets.append(packet_bytes)
+
+                        layer.ntp_timestamp = clock.current_ntp_time()
+                        layer.rtp_timestamp = timestamp
+                        layer.octet_count += len(payload)
+                        layer.packet_count += 1
+                        layer.sequence_number = uint16_add(sequence_number, 1)
+
+                    # send all the packets of the frame together
+                    self.transport._queue_rtp_batch(
+                        packets,
+                        priority,
+                        header_template.transport_sequence_number_offset(audio_level),
                     )
-                    packet_bytes = packet.serialize(self.__rtp_header_extensions_map)
-                    await self.transport._send_rtp(packet_bytes)
-
-                    self.__ntp_timestamp = clock.current_ntp_time()
-                    self.__rtp_timestamp = packet.timestamp
-                    self.__octet_count += len(payload)
-                    self.__packet_count += 1
-                    sequence_number = uint16_add(sequence_number, 1)
         except (asyncio.CancelledError, ConnectionError, MediaStreamError):
             pass
         except Exception:
@@ -408,13 +752,20 @@ class RTCRtpSender:
             # so issue a warning if we hit an unexpected exception
             self.__log_warning(traceback.format_exc())
 
-        # stop track
+        # stop encoding
+        encode_task.cancel()
+        if self.__encode_executor is None:
+            executor.shutdown(wait=False)
+
+        # stop track, unless other senders are using it
         if self.__track:
-            self.__track.stop()
+            if self.__encoder_pool is None:
+                self.__track.stop()
             self.__track = None
 
-        # release encoder
-        self.__encoder = None
+        # release encoders
+        for layer in self.__layers:
+            layer.encoder = None
 
         self.__log_debug("- RTP finished")
         self.__rtp_exited.set()
@@ -430,19 +781,21 @@ class RTCRtpSender:
                 await asyncio.sleep(0.5 + random.random())
 
                 # RTCP SR
-                packets: list[AnyRtcpPacket] = [
-                    RtcpSrPacket(
-                        ssrc=self._ssrc,
-                        sender_info=RtcpSenderInfo(
-                            ntp_timestamp=self.__ntp_timestamp,
-                            rtp_timestamp=self.__rtp_timestamp,
-                            packet_count=self.__packet_count & 0xFFFFFFFF,
-                            octet_count=self.__octet_count & 0xFFFFFFFF,
-                        ),
+                packets: list[AnyRtcpPacket] = []
+                for layer in self.__layers:
+                    packets.append(
+                        RtcpSrPacket(
+                            ssrc=layer.encoding.ssrc,
+                            sender_info=RtcpSenderInfo(
+                                ntp_timestamp=layer.ntp_timestamp,
+                                rtp_timestamp=layer.rtp_timestamp,
+                                packet_count=layer.packet_count & 0xFFFFFFFF,
+                                octet_count=layer.octet_count & 0xFFFFFFFF,
+                            ),
+                        )
                     )
-                ]
-                self.__lsr = ((self.__ntp_timestamp) >> 16) & 0xFFFFFFFF
-                self.__lsr_time = time.time()
+                    layer.lsr = ((layer.ntp_timestamp) >> 16) & 0xFFFFFFFF
+                    layer.lsr_time = time.time()
 
                 # RTCP SDES
                 if self.__cname is not None:
@@ -450,9 +803,10 @@ class RTCRtpSender:
                         RtcpSdesPacket(
                             chunks=[
                                 RtcpSourceInfo(
-                                    ssrc=self._ssrc,
+                                    ssrc=layer.encoding.ssrc,
                                     items=[(1, self.__cname.encode("utf8"))],
                                 )
+                                for layer in self.__layers
                             ]
                         )
                     )
@@ -462,7 +816,7 @@ class RTCRtpSender:
             pass
 
         # RTCP BYE
-        packet = RtcpByePacket(sources=[self._ssrc])
+        packet = RtcpByePacket(sources=[layer.encoding.ssrc for layer in self.__layers])
         await self._send_rtcp([packet])
 
         self.__log_debug("- RTCP finished")
@@ -479,5 +833,17 @@ class RTCRtpSender:
         except ConnectionError:
             pass
 
+    def __layer_for_ssrc(self, ssrc: int) -> Optional[SendLayer]:
+        for layer in self.__layers:
+            if layer.encoding.ssrc == ssrc:
+                return layer
+        return None
+
     def __log_warning(self, msg: str, *args: object) -> None:
         logger.warning(f"RTCRtpsender(%s) {msg}", self.__kind, *args)
+
+    def __stats_id(self, prefix: str, layer: SendLayer) -> str:
+        stats_id = f"{prefix}_{id(self)}"
+        if layer is not self.__layers[0]:
+            stats_id += f"_{layer.encoding.rid}"
+        return stats_id
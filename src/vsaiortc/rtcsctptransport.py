@@ -6,7 +6,7 @@ import math
 import os
 import time
 from collections import deque
-from collections.abc import Callable, Iterator
+from collections.abc import Awaitable, Callable, Iterator
 from dataclasses import dataclass, field
 from struct import pack, unpack_from
 from typing import Deque, Optional, Union, cast
@@ -27,6 +27,9 @@ COOKIE_LIFETIME = 60
 MAX_STREAMS = 65535
 USERDATA_MAX_LENGTH = 1200
 
+# largest packet we send, it holds a DATA chunk with USERDATA_MAX_LENGTH bytes
+PACKET_MAX_LENGTH = 12 + 16 + USERDATA_MAX_LENGTH
+
 # protocol constants
 SCTP_CAUSE_INVALID_STREAM = 0x0001
 SCTP_CAUSE_STALE_COOKIE = 0x0003
@@ -394,6 +397,9 @@ CHUNK_CLASSES = [
 ]
 CHUNK_TYPES = dict((cls.type, cls) for cls in CHUNK_CLASSES)
 
+# chunks which must be alone in their packet (RFC 4960, section 6.10)
+UNBUNDLED_CHUNK_TYPES = (InitChunk, InitAckChunk, ShutdownCompleteChunk)
+
 
 def parse_packet(data: bytes) -> tuple[int, int, int, list[Chunk]]:
     length = len(data)
@@ -420,10 +426,42 @@ def parse_packet(data: bytes) -> tuple[int, int, int, list[Chunk]]:
 
 
 def serialize_packet(
-    source_port: int, destination_port: int, verification_tag: int, chunk: Chunk
+    source_port: int, destination_port: int, verification_tag: int, *chunks: Chunk
 ) -> bytes:
     header = pack("!HHL", source_port, destination_port, verification_tag)
-    data = bytes(chunk)
+    return checksum_packet(header, b"".join(bytes(chunk) for chunk in chunks))
+
+
+def serialize_packets(
+    source_port: int,
+    destination_port: int,
+    verification_tag: int,
+    chunks: list[Chunk],
+    max_length: int = PACKET_MAX_LENGTH,
+) -> list[bytes]:
+    """
+    Bundle chunks in order into as few packets as possible.
+
+    A packet is only larger than `max_length` if it holds a single chunk.
+    """
+    header = pack("!HHL", source_port, destination_port, verification_tag)
+    packets = []
+    parts: list[bytes] = []
+    length = 12
+    for chunk in chunks:
+        data = bytes(chunk)
+        if parts and length + len(data) > max_length:
+            packets.append(checksum_packet(header, b"".join(parts)))
+            parts = []
+            length = 12
+        parts.append(data)
+        length += len(data)
+    if parts:
+        packets.append(checksum_packet(header, b"".join(parts)))
+    return packets
+
+
+def checksum_packet(header: bytes, data: bytes) -> bytes:
     checksum = crc32c(header + b"\x00\x00\x00\x00" + data)
     return header + pack("<L", checksum) + data
 
@@ -645,6 +683,7 @@ class RTCSctpTransport(AsyncIOEventEmitter):
         self._local_tsn = random32()
         self._last_sacked_tsn = tsn_minus_one(self._local_tsn)
         self._advanced_peer_ack_tsn = tsn_minus_one(self._local_tsn)
+        self._bundles: dict[Optional[asyncio.Task], list[Chunk]] = {}
         self._outbound_queue: Deque[DataChunk] = deque()
         self._outbound_stream_seq: dict[int, int] = {}
         self._outbound_streams_count = MAX_STREAMS
@@ -772,6 +811,29 @@ class RTCSctpTransport(AsyncIOEventEmitter):
         except ConnectionError:
             pass
 
+    async def _bundle(self, coroutine: Awaitable[None]) -> None:
+        """
+        Run `coroutine`, bundling the chunks it sends.
+
+        Each task has its own bundle, so chunks sent by other tasks, such as
+        timer retransmissions, are not held back. Calls can be nested, the
+        chunks are sent when the outermost returns. If `coroutine` raises an
+        exception, the chunks are dropped, as for a failed send.
+        """
+        task = asyncio.current_task()
+        if task in self._bundles:
+            await coroutine
+            return
+
+        chunks: list[Chunk] = []
+        self._bundles[task] = chunks
+        try:
+            await coroutine
+        finally:
+            del self._bundles[task]
+        if chunks:
+            await self._send_chunks(chunks)
+
     async def _init(self) -> None:
         """
         Initialize the association.
@@ -852,11 +914,14 @@ class RTCSctpTransport(AsyncIOEventEmitter):
             )
             return
 
+        await self._bundle(self.__receive_chunks(chunks))
+
+    async def __receive_chunks(self, chunks: list[Chunk]) -> None:
         # handle chunks
         for chunk in chunks:
             await self._receive_chunk(chunk)
 
-        # send SACK if needed
+        # send SACK if needed, along with any DATA chunks
         if self._sack_needed:
             await self._send_sack()
 
@@ -1341,17 +1406,41 @@ class RTCSctpTransport(AsyncIOEventEmitter):
 
     async def _send_chunk(self, chunk: Chunk) -> None:
         """
-        Transmit a chunk (no bundling for now).
+        Transmit a chunk.
+
+        Within :meth:`_bundle`, in the same task, the chunk is held back and
+        sent along with the other chunks once the bundled coroutine returns.
         """
         self.__log_debug("> %s", chunk)
-        await self.__transport._send_data(
-            serialize_packet(
-                self._local_port,
-                self._remote_port,
-                self._remote_verification_tag,
-                chunk,
+        bundle = self._bundles.get(asyncio.current_task()) if self._bundles else None
+        if bundle is not None and not isinstance(chunk, UNBUNDLED_CHUNK_TYPES):
+            bundle.append(chunk)
+        else:
+            await self.__transport._send_data(
+                serialize_packet(
+                    self._local_port,
+                    self._remote_port,
+                    self._remote_verification_tag,
+                    chunk,
+                )
             )
-        )
+
+    async def _send_chunks(self, chunks: list[Chunk]) -> None:
+        """
+        Transmit chunks, bundling as many of them as fit in each packet.
+
+        Control chunks are placed before DATA chunks, so that a SACK is
+        piggybacked on outgoing data.
+        """
+        if len(chunks) > 1:
+            chunks = sorted(chunks, key=lambda chunk: isinstance(chunk, DataChunk))
+        for packet in serialize_packets(
+            self._local_port,
+            self._remote_port,
+            self._remote_verification_tag,
+            chunks,
+        ):
+            await self.__transport._send_data(packet)
 
     async def _send_reconfig_param(
         self,
@@ -1518,6 +1607,9 @@ class RTCSctpTransport(AsyncIOEventEmitter):
         """
         Transmit outbound data.
         """
+        await self._bundle(self.__transmit())
+
+    async def __transmit(self) -> None:
         # send FORWARD TSN
         if self._forward_tsn_chunk is not None:
             await self._send_chunk(self._forward_tsn_chunk)
@@ -1662,6 +1754,9 @@ class RTCSctpTransport(AsyncIOEventEmitter):
         if self._association_state != self.State.ESTABLISHED:
             return
 
+        await self._bundle(self.__data_channel_flush())
+
+    async def __data_channel_flush(self) -> None:
         while self._data_channel_queue and not self._outbound_queue:
             channel, protocol, user_data = self._data_channel_queue.popleft()
 
@@ -1,17 +1,30 @@
+import array
 import math
+import operator
 import os
-import struct
+from collections.abc import Iterator
 from dataclasses import dataclass, field
-from struct import pack, unpack, unpack_from
+from struct import pack, pack_into, unpack, unpack_from
 from typing import Any, Optional, Union
 
 from av import AudioFrame
 
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
 from .rtcrtpparameters import RTCRtpParameters
+from .utils import uint16_add
 
 # used for NACK and retransmission
 RTP_HISTORY_SIZE = 128
 
+# outgoing packets kept for retransmission
+RTP_HISTORY_CAPACITY = 4096
+RTP_HISTORY_MAX_AGE_MS = 1000
+RTP_HISTORY_MAX_BYTES = 2 * 1024 * 1024
+
 # reserved to avoid confusion with RTCP
 FORBIDDEN_PAYLOAD_TYPES = range(72, 77)
 DYNAMIC_PAYLOAD_TYPES = range(96, 128)
@@ -30,6 +43,7 @@ RTCP_RTPFB = 205
 RTCP_PSFB = 206
 
 RTCP_RTPFB_NACK = 1
+RTCP_RTPFB_TWCC = 15
 
 RTCP_PSFB_PLI = 1
 RTCP_PSFB_SLI = 2
@@ -48,6 +62,17 @@ class HeaderExtensions:
     transport_sequence_number: Optional[int] = None
 
 
+@dataclass
+class HeaderExtensionOffsets:
+    abs_send_time: Optional[int] = None
+    audio_level: Optional[int] = None
+    mid: Optional[int] = None
+    repaired_rtp_stream_id: Optional[int] = None
+    rtp_stream_id: Optional[int] = None
+    transmission_offset: Optional[int] = None
+    transport_sequence_number: Optional[int] = None
+
+
 class HeaderExtensionsMap:
     def __init__(self) -> None:
         self.__ids = HeaderExtensions()
@@ -96,6 +121,82 @@ class HeaderExtensionsMap:
                 values.transport_sequence_number = unpack("!H", x_value)[0]
         return values
 
+    def offsets(
+        self, extension_profile: int, extension_value: bytes, base: int = 0
+    ) -> HeaderExtensionOffsets:
+        """
+        Return the offset of each known header extension value within
+        `extension_value`, plus `base`.
+        """
+        offsets = HeaderExtensionOffsets()
+        for x_id, start, end in _iter_header_extensions(
+            extension_profile, extension_value
+        ):
+            if x_id == self.__ids.mid:
+                offsets.mid = base + start
+            elif x_id == self.__ids.repaired_rtp_stream_id:
+                offsets.repaired_rtp_stream_id = base + start
+            elif x_id == self.__ids.rtp_stream_id:
+                offsets.rtp_stream_id = base + start
+            elif x_id == self.__ids.abs_send_time:
+                offsets.abs_send_time = base + start
+            elif x_id == self.__ids.transmission_offset:
+                offsets.transmission_offset = base + start
+            elif x_id == self.__ids.audio_level:
+                offsets.audio_level = base + start
+            elif x_id == self.__ids.transport_sequence_number:
+                offsets.transport_sequence_number = base + start
+        return offsets
+
+    def transport_sequence_number_offset(self, data: bytes) -> Optional[int]:
+        """
+        Return the offset of the transport-wide sequence number within the
+        serialized RTP packet `data`, or `None` if it does not carry one.
+        """
+        if (
+            not self.__ids.transport_sequence_number
+            or len(data) < RTP_HEADER_LENGTH
+            or not data[0] & 0x10
+        ):
+            return None
+
+        pos = RTP_HEADER_LENGTH + 4 * (data[0] & 0x0F)
+        if len(data) < pos + 4:
+            return None
+        extension_profile, extension_length = unpack_from("!HH", data, pos)
+        pos += 4
+        for x_id, start, end in _iter_header_extensions(
+            extension_profile, data[pos : pos + extension_length * 4]
+        ):
+            if x_id == self.__ids.transport_sequence_number and end - start == 2:
+                return pos + start
+        return None
+
+    def repair_rtp_stream_id(self, header: bytearray) -> None:
+        """
+        Turn the RTP stream ID of a serialized RTP header into a repaired RTP
+        stream ID in place, as carried by retransmissions.
+        """
+        rid_id = self.__ids.rtp_stream_id
+        repaired_id = self.__ids.repaired_rtp_stream_id
+        if not rid_id or not repaired_id or not header[0] & 0x10:
+            return
+
+        pos = RTP_HEADER_LENGTH + 4 * (header[0] & 0x0F)
+        extension_profile, extension_length = unpack_from("!HH", header, pos)
+        pos += 4
+        for x_id, start, end in _iter_header_extensions(
+            extension_profile, bytes(header[pos : pos + extension_length * 4])
+        ):
+            if x_id == rid_id:
+                if extension_profile == 0xBEDE and repaired_id <= 14:
+                    header[pos + start - 1] = (repaired_id << 4) | (
+                        header[pos + start - 1] & 0x0F
+                    )
+                elif extension_profile == 0x1000:
+                    header[pos + start - 2] = repaired_id
+                return
+
     def set(self, values: HeaderExtensions) -> tuple[int, bytes]:
         extensions = []
         if values.mid is not None and self.__ids.mid:
@@ -223,13 +324,24 @@ def padl(length: int) -> int:
     return 4 * ((length + 3) // 4) - length
 
 
-def unpack_header_extensions(
+def _transport_feedback_status(delta: Optional[int]) -> int:
+    """
+    Return the packet status symbol for a transport-cc receive delta.
+    """
+    if delta is None:
+        return 0
+    elif 0 <= delta <= 0xFF:
+        return 1
+    else:
+        return 2
+
+
+def _iter_header_extensions(
     extension_profile: int, extension_value: bytes
-) -> list[tuple[int, bytes]]:
+) -> Iterator[tuple[int, int, int]]:
     """
-    Parse header extensions according to RFC 5285.
+    Yield the ID, start and end offset of each header extension value.
     """
-    extensions = []
     pos = 0
 
     if extension_profile == 0xBEDE:
@@ -246,8 +358,7 @@ def unpack_header_extensions(
 
             if len(extension_value) < pos + x_length:
                 raise ValueError("RTP one-byte header extension value is truncated")
-            x_value = extension_value[pos : pos + x_length]
-            extensions.append((x_id, x_value))
+            yield x_id, pos, pos + x_length
             pos += x_length
     elif extension_profile == 0x1000:
         # Two-Byte Header
@@ -264,11 +375,22 @@ def unpack_header_extensions(
 
             if len(extension_value) < pos + x_length:
                 raise ValueError("RTP two-byte header extension value is truncated")
-            x_value = extension_value[pos : pos + x_length]
-            extensions.append((x_id, x_value))
+            yield x_id, pos, pos + x_length
             pos += x_length
 
-    return extensions
+
+def unpack_header_extensions(
+    extension_profile: int, extension_value: bytes
+) -> list[tuple[int, bytes]]:
+    """
+    Parse header extensions according to RFC 5285.
+    """
+    return [
+        (x_id, extension_value[start:end])
+        for x_id, start, end in _iter_header_extensions(
+            extension_profile, extension_value
+        )
+    ]
 
 
 def pack_header_extensions(extensions: list[tuple[int, bytes]]) -> tuple[int, bytes]:
@@ -313,17 +435,39 @@ def pack_header_extensions(extensions: list[tuple[int, bytes]]) -> tuple[int, by
 def compute_audio_level_dbov(frame: AudioFrame) -> int:
     """
     Compute the energy level as spelled out in RFC 6465, Appendix A.
+
+    The frame must contain signed 16-bit samples, either packed (`s16`) or
+    planar (`s16p`), with any number of channels. The RMS is computed over
+    all the samples of all the channels.
     """
     MAX_SAMPLE_VALUE = 32767
     MAX_AUDIO_LEVEL = 0
     MIN_AUDIO_LEVEL = -127
+
+    # A packed frame stores all the channels in its first plane.
+    if frame.format.is_planar:
+        planes = frame.planes
+        count = frame.samples
+    else:
+        planes = frame.planes[0:1]
+        count = frame.samples * len(frame.layout.channels)
+
+    energy = 0.0
+    for plane in planes:
+        if numpy is not None:
+            samples = numpy.frombuffer(
+                memoryview(plane), dtype=numpy.int16, count=count
+            ).astype(numpy.float64)
+            energy += float(numpy.dot(samples, samples))
+        else:
+            values = array.array("h")
+            values.frombytes(memoryview(plane)[0 : 2 * count])
+            energy += sum(map(operator.mul, values, values))
+
+    total = count * len(planes)
     rms = 0.0
-    buf = bytes(frame.planes[0])
-    s = struct.Struct("h")
-    for unpacked in s.iter_unpack(buf):
-        sample = unpacked[0]
-        rms += sample * sample
-    rms = math.sqrt(rms / (frame.samples * MAX_SAMPLE_VALUE * MAX_SAMPLE_VALUE))
+    if total:
+        rms = math.sqrt(energy / (total * MAX_SAMPLE_VALUE * MAX_SAMPLE_VALUE))
     if rms > 0:
         db = 20 * math.log10(rms)
         db = max(db, MIN_AUDIO_LEVEL)
@@ -486,7 +630,7 @@ class RtcpRtpfbPacket:
             pid = self.lost[0]
             blp = 0
             for p in self.lost[1:]:
-                d = p - pid - 1
+                d = uint16_add(p, -pid) - 1
                 if d < 16:
                     blp |= 1 << d
                 else:
@@ -508,7 +652,7 @@ class RtcpRtpfbPacket:
             lost.append(pid)
             for d in range(0, 16):
                 if (blp >> d) & 1:
-                    lost.append(pid + d + 1)
+                    lost.append(uint16_add(pid, d + 1))
         return cls(fmt=fmt, ssrc=ssrc, media_ssrc=media_ssrc, lost=lost)
 
 
@@ -582,6 +726,127 @@ class RtcpSrPacket:
         return RtcpSrPacket(ssrc=ssrc, sender_info=sender_info, reports=reports)
 
 
+@dataclass
+class RtcpTransportFeedbackPacket:
+    """
+    Transport-wide Congestion Control Feedback Message.
+
+    https://datatracker.ietf.org/doc/html/draft-holmer-rmcat-transport-wide-cc-extensions-01
+    """
+
+    ssrc: int
+    media_ssrc: int
+    base_sequence_number: int
+
+    # reference time in multiples of 64ms
+    reference_time: int
+    feedback_packet_count: int
+
+    # receive delta of each packet in multiples of 250us, None if not received
+    deltas: list[Optional[int]] = field(default_factory=list)
+
+    def __bytes__(self) -> bytes:
+        statuses = [_transport_feedback_status(delta) for delta in self.deltas]
+        count = len(statuses)
+        payload = pack(
+            "!LLHHL",
+            self.ssrc,
+            self.media_ssrc,
+            self.base_sequence_number,
+            count,
+            ((self.reference_time & 0xFFFFFF) << 8)
+            | (self.feedback_packet_count & 0xFF),
+        )
+
+        # packet status chunks
+        pos = 0
+        while pos < count:
+            status = statuses[pos]
+            run = 1
+            while pos + run < count and statuses[pos + run] == status and run < 0x1FFF:
+                run += 1
+            if run >= 7:
+                # run length chunk
+                chunk = (status << 13) | run
+                pos += run
+            elif count - pos > 7 and 2 not in statuses[pos : pos + 14]:
+                # status vector chunk with one-bit symbols
+                chunk = 0x8000
+                for i, status in enumerate(statuses[pos : pos + 14]):
+                    chunk |= status << (13 - i)
+                pos += 14
+            else:
+                # status vector chunk with two-bit symbols
+                chunk = 0xC000
+                for i, status in enumerate(statuses[pos : pos + 7]):
+                    chunk |= status << (12 - 2 * i)
+                pos += 7
+            payload += pack("!H", chunk)
+
+        # receive deltas
+        for delta, status in zip(self.deltas, statuses):
+            if status == 1:
+                payload += pack("!B", delta)
+            elif status == 2:
+                payload += pack("!h", delta)
+        while len(payload) % 4:
+            payload += b"\x00"
+
+        return pack_rtcp_packet(RTCP_RTPFB, RTCP_RTPFB_TWCC, payload)
+
+    @classmethod
+    def parse(cls, data: bytes) -> "RtcpTransportFeedbackPacket":
+        if len(data) < 16:
+            raise ValueError("RTCP transport feedback length is invalid")
+
+        ssrc, media_ssrc, base_sequence_number, count, reference_time = unpack_from(
+            "!LLHHL", data
+        )
+        pos = 16
+
+        # packet status chunks
+        statuses: list[int] = []
+        while len(statuses) < count:
+            if len(data) < pos + 2:
+                raise ValueError("RTCP transport feedback is truncated")
+            chunk = unpack_from("!H", data, pos)[0]
+            pos += 2
+            if not chunk & 0x8000:
+                statuses += [(chunk >> 13) & 3] * (chunk & 0x1FFF)
+            elif not chunk & 0x4000:
+                statuses += [(chunk >> (13 - i)) & 1 for i in range(14)]
+            else:
+                statuses += [(chunk >> (12 - 2 * i)) & 3 for i in range(7)]
+        del statuses[count:]
+
+        # receive deltas
+        deltas: list[Optional[int]] = []
+        for status in statuses:
+            if status == 0:
+                deltas.append(None)
+            elif status == 1:
+                if len(data) < pos + 1:
+                    raise ValueError("RTCP transport feedback is truncated")
+                deltas.append(data[pos])
+                pos += 1
+            elif status == 2:
+                if len(data) < pos + 2:
+                    raise ValueError("RTCP transport feedback is truncated")
+                deltas.append(unpack_from("!h", data, pos)[0])
+                pos += 2
+            else:
+                raise ValueError("RTCP transport feedback status is invalid")
+
+        return cls(
+            ssrc=ssrc,
+            media_ssrc=media_ssrc,
+            base_sequence_number=base_sequence_number,
+            reference_time=reference_time >> 8,
+            feedback_packet_count=reference_time & 0xFF,
+            deltas=deltas,
+        )
+
+
 AnyRtcpPacket = Union[
     RtcpByePacket,
     RtcpPsfbPacket,
@@ -589,6 +854,7 @@ AnyRtcpPacket = Union[
     RtcpRtpfbPacket,
     RtcpSdesPacket,
     RtcpSrPacket,
+    RtcpTransportFeedbackPacket,
 ]
 
 
@@ -631,6 +897,8 @@ class RtcpPacket:
                 packets.append(RtcpSrPacket.parse(payload, count))
             elif packet_type == RTCP_RR:
                 packets.append(RtcpRrPacket.parse(payload, count))
+            elif packet_type == RTCP_RTPFB and count == RTCP_RTPFB_TWCC:
+                packets.append(RtcpTransportFeedbackPacket.parse(payload))
             elif packet_type == RTCP_RTPFB:
                 packets.append(RtcpRtpfbPacket.parse(payload, count))
             elif packet_type == RTCP_PSFB:
@@ -640,6 +908,31 @@ class RtcpPacket:
 
 
 class RtpPacket:
+    """
+    An RTP packet.
+
+    Packets returned by :meth:`parse` keep a :class:`memoryview` over the
+    datagram they were parsed from: the payload is a slice of that view and
+    header extensions are only decoded when :attr:`extensions` is first read.
+    """
+
+    __slots__ = (
+        "version",
+        "marker",
+        "payload_type",
+        "sequence_number",
+        "timestamp",
+        "ssrc",
+        "csrc",
+        "payload",
+        "padding_size",
+        "depayloaded",
+        "_extensions",
+        "_extensions_map",
+        "_extension_profile",
+        "_extension_value",
+    )
+
     def __init__(
         self,
         payload_type: int = 0,
@@ -647,7 +940,7 @@ class RtpPacket:
         sequence_number: int = 0,
         timestamp: int = 0,
         ssrc: int = 0,
-        payload: bytes = b"",
+        payload: Union[bytes, memoryview] = b"",
     ) -> None:
         self.version = 2
         self.marker = marker
@@ -656,9 +949,14 @@ class RtpPacket:
         self.timestamp = timestamp
         self.ssrc = ssrc
         self.csrc: list[int] = []
-        self.extensions = HeaderExtensions()
         self.payload = payload
         self.padding_size = 0
+        # the codec data of the payload, filled in by the receiver
+        self.depayloaded = b""
+        self._extensions: Optional[HeaderExtensions] = None
+        self._extensions_map: Optional[HeaderExtensionsMap] = None
+        self._extension_profile = 0
+        self._extension_value: Optional[memoryview] = None
 
     def __repr__(self) -> str:
         return (
@@ -667,23 +965,52 @@ class RtpPacket:
             f"{len(self.payload)} bytes)"
         )
 
+    @property
+    def extensions(self) -> HeaderExtensions:
+        """
+        The decoded header extensions.
+
+        For parsed packets the raw extension block is decoded on first access.
+        A malformed extension block yields empty :class:`HeaderExtensions`.
+        """
+        if self._extensions is None:
+            if self._extension_value is not None:
+                try:
+                    self._extensions = self._extensions_map.get(
+                        self._extension_profile, bytes(self._extension_value)
+                    )
+                except ValueError:
+                    self._extensions = HeaderExtensions()
+                self._extension_value = None
+            else:
+                self._extensions = HeaderExtensions()
+        return self._extensions
+
+    @extensions.setter
+    def extensions(self, extensions: HeaderExtensions) -> None:
+        self._extensions = extensions
+        self._extension_value = None
+
     @classmethod
     def parse(
         cls, data: bytes, extensions_map: HeaderExtensionsMap = HeaderExtensionsMap()
     ) -> "RtpPacket":
-        if len(data) < RTP_HEADER_LENGTH:
+        length = len(data)
+        if length < RTP_HEADER_LENGTH:
             raise ValueError(
                 f"RTP packet length is less than {RTP_HEADER_LENGTH} bytes"
             )
 
-        v_p_x_cc, m_pt, sequence_number, timestamp, ssrc = unpack("!BBHLL", data[0:12])
+        view = memoryview(data)
+        v_p_x_cc, m_pt, sequence_number, timestamp, ssrc = unpack_from("!BBHLL", view)
         version = v_p_x_cc >> 6
         padding = (v_p_x_cc >> 5) & 1
         extension = (v_p_x_cc >> 4) & 1
         cc = v_p_x_cc & 0x0F
         if version != 2:
             raise ValueError("RTP packet has invalid version")
-        if len(data) < RTP_HEADER_LENGTH + 4 * cc:
+        pos = RTP_HEADER_LENGTH + 4 * cc
+        if length < pos:
             raise ValueError("RTP packet has truncated CSRC")
 
         packet = cls(
@@ -693,33 +1020,31 @@ class RtpPacket:
             timestamp=timestamp,
             ssrc=ssrc,
         )
-
-        pos = RTP_HEADER_LENGTH
-        for i in range(0, cc):
-            packet.csrc.append(unpack_from("!L", data, pos)[0])
-            pos += 4
+        if cc:
+            packet.csrc = list(unpack_from(f"!{cc}L", view, RTP_HEADER_LENGTH))
 
         if extension:
-            if len(data) < pos + 4:
+            if length < pos + 4:
                 raise ValueError("RTP packet has truncated extension profile / length")
-            extension_profile, extension_length = unpack_from("!HH", data, pos)
+            extension_profile, extension_length = unpack_from("!HH", view, pos)
             extension_length *= 4
             pos += 4
 
-            if len(data) < pos + extension_length:
+            if length < pos + extension_length:
                 raise ValueError("RTP packet has truncated extension value")
-            extension_value = data[pos : pos + extension_length]
+            packet._extensions_map = extensions_map
+            packet._extension_profile = extension_profile
+            packet._extension_value = view[pos : pos + extension_length]
             pos += extension_length
-            packet.extensions = extensions_map.get(extension_profile, extension_value)
 
         if padding:
-            padding_len = data[-1]
-            if not padding_len or padding_len > len(data) - pos:
+            padding_len = view[-1]
+            if not padding_len or padding_len > length - pos:
                 raise ValueError("RTP packet padding length is invalid")
             packet.padding_size = padding_len
-            packet.payload = data[pos:-padding_len]
+            packet.payload = view[pos : length - padding_len]
         else:
-            packet.payload = data[pos:]
+            packet.payload = view[pos:]
 
         return packet
 
@@ -752,6 +1077,227 @@ class RtpPacket:
             data += bytes([self.padding_size])
         return data
 
+    def _copy_extensions(self, other: "RtpPacket") -> None:
+        """
+        Share the header extensions of `other` without forcing them to be decoded.
+        """
+        self._extensions = other._extensions
+        self._extensions_map = other._extensions_map
+        self._extension_profile = other._extension_profile
+        self._extension_value = other._extension_value
+
+
+class RtpHeaderTemplate:
+    """
+    A precompiled RTP header for an outgoing stream.
+
+    The header, including the header extensions which do not change from one
+    packet to the next, is serialized once. Each call to :meth:`serialize`
+    then only patches the marker bit, sequence number, timestamp and the
+    per-packet header extensions into a reusable buffer.
+    """
+
+    def __init__(
+        self,
+        extensions_map: HeaderExtensionsMap,
+        payload_type: int,
+        ssrc: int,
+        extensions: HeaderExtensions,
+    ) -> None:
+        # Use placeholders for the extensions which are patched per packet.
+        template_extensions = HeaderExtensions(
+            abs_send_time=0,
+            audio_level=(False, 0),
+            mid=extensions.mid,
+            repaired_rtp_stream_id=extensions.repaired_rtp_stream_id,
+            rtp_stream_id=extensions.rtp_stream_id,
+            transport_sequence_number=0,
+        )
+        self._headers: dict[bool, tuple[bytearray, HeaderExtensionOffsets]] = {}
+        for with_audio_level in (False, True):
+            if not with_audio_level:
+                template_extensions.audio_level = None
+            else:
+                template_extensions.audio_level = (False, 0)
+
+            extension_profile, extension_value = extensions_map.set(template_extensions)
+            header = bytearray(
+                pack(
+                    "!BBHLL",
+                    (2 << 6) | (bool(extension_value) << 4),
+                    payload_type,
+                    0,
+                    0,
+                    ssrc,
+                )
+            )
+            offsets = HeaderExtensionOffsets()
+            if extension_value:
+                header += pack("!HH", extension_profile, len(extension_value) >> 2)
+                offsets = extensions_map.offsets(
+                    extension_profile, extension_value, base=len(header)
+                )
+                header += extension_value
+            self._headers[with_audio_level] = (header, offsets)
+
+        self._buffer = bytearray()
+
+    def transport_sequence_number_offset(
+        self, audio_level: Optional[tuple[bool, int]] = None
+    ) -> Optional[int]:
+        """
+        Return the offset of the transport-wide sequence number within the
+        packets :meth:`serialize` produces with this `audio_level`, or `None`
+        if they do not carry one.
+        """
+        return self._headers[audio_level is not None][1].transport_sequence_number
+
+    def serialize(
+        self,
+        sequence_number: int,
+        timestamp: int,
+        marker: int,
+        payload: bytes,
+        abs_send_time: Optional[int] = None,
+        audio_level: Optional[tuple[bool, int]] = None,
+        transport_sequence_number: Optional[int] = None,
+    ) -> bytes:
+        """
+        Serialize an RTP packet using the precompiled header.
+        """
+        header, offsets = self._headers[audio_level is not None]
+        header_length = len(header)
+        length = header_length + len(payload)
+
+        buffer = self._buffer
+        if len(buffer) < length:
+            buffer.extend(bytes(length - len(buffer)))
+
+        buffer[0:header_length] = header
+        buffer[1] |= marker << 7
+        pack_into("!HL", buffer, 2, sequence_number, timestamp)
+        if offsets.abs_send_time is not None and abs_send_time is not None:
+            pack_into(
+                "!BH",
+                buffer,
+                offsets.abs_send_time,
+                (abs_send_time >> 16) & 0xFF,
+                abs_send_time & 0xFFFF,
+            )
+        if offsets.audio_level is not None:
+            buffer[offsets.audio_level] = (0x80 if audio_level[0] else 0) | (
+                audio_level[1] & 0x7F
+            )
+        if (
+            offsets.transport_sequence_number is not None
+            and transport_sequence_number is not None
+        ):
+            pack_into(
+                "!H",
+                buffer,
+                offsets.transport_sequence_number,
+                transport_sequence_number,
+            )
+        buffer[header_length:length] = payload
+
+        return bytes(memoryview(buffer)[0:length])
+
+
+class RtpPacketHistory:
+    """
+    A ring buffer of the serialized RTP packets recently sent on a stream,
+    used to answer retransmission requests.
+
+    Packets are evicted once they are older than `max_age_ms`, or when the
+    history would otherwise hold more than `max_bytes` or `capacity` packets.
+    Packets are expected in sequence number order, a discontinuity clears
+    the history.
+    """
+
+    def __init__(
+        self,
+        capacity: int = RTP_HISTORY_CAPACITY,
+        max_age_ms: int = RTP_HISTORY_MAX_AGE_MS,
+        max_bytes: int = RTP_HISTORY_MAX_BYTES,
+    ) -> None:
+        self.capacity = capacity
+        self.max_age_ms = max_age_ms
+        self.max_bytes = max_bytes
+
+        self._packets: list[Optional[bytes]] = [None] * capacity
+        self._send_times = [0] * capacity
+        self._bytes = 0
+        self._count = 0
+        self._head = 0
+        self._oldest = 0
+
+        # stats
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size(self) -> int:
+        """
+        The number of bytes held in the history.
+        """
+        return self._bytes
+
+    def add(self, sequence_number: int, data: bytes, now_ms: int) -> None:
+        """
+        Store the packet with the given sequence number.
+        """
+        if self._count and sequence_number != uint16_add(self._oldest, self._count):
+            self.clear()
+        if not self._count:
+            self._oldest = sequence_number
+        elif self._count == self.capacity:
+            self._evict()
+
+        slot = (self._head + self._count) % self.capacity
+        self._packets[slot] = data
+        self._send_times[slot] = now_ms
+        self._bytes += len(data)
+        self._count += 1
+
+        # evict the oldest packets, always keeping the newest one
+        while self._count > 1 and (
+            self._bytes > self.max_bytes
+            or now_ms - self._send_times[self._head] > self.max_age_ms
+        ):
+            self._evict()
+
+    def clear(self) -> None:
+        """
+        Remove all the packets from the history.
+        """
+        while self._count:
+            self._evict()
+
+    def get(self, sequence_number: int) -> Optional[bytes]:
+        """
+        Return the packet with the given sequence number, if it is still
+        in the history.
+        """
+        offset = uint16_add(sequence_number, -self._oldest)
+        if offset < self._count:
+            self.hits += 1
+            return self._packets[(self._head + offset) % self.capacity]
+        else:
+            self.misses += 1
+            return None
+
+    def _evict(self) -> None:
+        data = self._packets[self._head]
+        if data is not None:
+            self._bytes -= len(data)
+        self._packets[self._head] = None
+        self._head = (self._head + 1) % self.capacity
+        self._oldest = uint16_add(self._oldest, 1)
+        self._count -= 1
+
 
 def unwrap_rtx(rtx: RtpPacket, payload_type: int, ssrc: int) -> RtpPacket:
     """
@@ -766,7 +1312,7 @@ def unwrap_rtx(rtx: RtpPacket, payload_type: int, ssrc: int) -> RtpPacket:
         payload=rtx.payload[2:],
     )
     packet.csrc = rtx.csrc
-    packet.extensions = rtx.extensions
+    packet._copy_extensions(rtx)
     return packet
 
 
@@ -785,5 +1331,36 @@ def wrap_rtx(
         payload=pack("!H", packet.sequence_number) + packet.payload,
     )
     rtx.csrc = packet.csrc
-    rtx.extensions = packet.extensions
+    rtx._copy_extensions(packet)
     return rtx
+
+
+def wrap_rtx_data(
+    data: bytes,
+    payload_type: int,
+    sequence_number: int,
+    ssrc: int,
+    extensions_map: Optional[HeaderExtensionsMap] = None,
+) -> bytes:
+    """
+    Create a serialized retransmission packet from a serialized lost packet.
+
+    Only the header is rewritten, the header extensions are kept as-is except
+    for the RTP stream ID which becomes a repaired RTP stream ID if
+    `extensions_map` is given.
+    """
+    header_length = RTP_HEADER_LENGTH + 4 * (data[0] & 0x0F)
+    if data[0] & 0x10:
+        header_length += 4 + 4 * unpack_from("!H", data, header_length + 2)[0]
+    payload_end = len(data)
+    if data[0] & 0x20:
+        payload_end -= data[-1]
+
+    header = bytearray(data[0:header_length])
+    header[0] &= 0xDF
+    header[1] = (header[1] & 0x80) | payload_type
+    pack_into("!H", header, 2, sequence_number)
+    pack_into("!L", header, 8, ssrc)
+    if extensions_map is not None:
+        extensions_map.repair_rtp_stream_id(header)
+    return bytes(header) + data[2:4] + data[header_length:payload_end]
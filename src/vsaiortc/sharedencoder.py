@@ -0,0 +1,304 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional, Union
+
+from av.frame import Frame
+
+from .codecs import depayload, get_encoder, is_keyframe
+from .codecs.base import Encoder
+from .mediastreams import MediaStreamTrack
+from .rtcrtpparameters import RTCRtpCodecParameters
+from .rtcrtpsender import RTCEncodedFrame, RTCRtpSender
+
+logger = logging.getLogger(__name__)
+
+# keyframe requests closer together than this are merged
+KEYFRAME_MIN_INTERVAL = 0.5
+
+# the number of encoded frames a subscriber can fall behind
+SUBSCRIPTION_QUEUE_SIZE = 30
+
+EncoderKey = tuple[int, str, int, Optional[int], tuple[tuple[str, str], ...]]
+SharedFrame = tuple[RTCEncodedFrame, bool, float]
+
+
+def encoder_key(track: MediaStreamTrack, codec: RTCRtpCodecParameters) -> EncoderKey:
+    """
+    Identify the encoded output for a track and a codec.
+
+    The payload type is left out, as it only appears in the RTP header.
+    """
+    return (
+        id(track),
+        codec.mimeType.lower(),
+        codec.clockRate,
+        codec.channels,
+        tuple(sorted((k, str(v)) for k, v in codec.parameters.items())),
+    )
+
+
+class SharedEncoderSubscription:
+    """
+    The encoded frames of a :class:`SharedEncoder` as seen by one sender.
+
+    A video subscription always starts on a keyframe, and skips ahead to the
+    next keyframe if it falls behind. Audio frames are independent, so audio
+    subscriptions never wait.
+    """
+
+    def __init__(self, encoder: "SharedEncoder") -> None:
+        self.encoder = encoder
+        self._queue: asyncio.Queue[Union[SharedFrame, Exception]] = asyncio.Queue(
+            maxsize=SUBSCRIPTION_QUEUE_SIZE
+        )
+        self._waiting_keyframe = self.track.kind == "video"
+
+    @property
+    def track(self) -> MediaStreamTrack:
+        return self.encoder.track
+
+    async def recv(self) -> tuple[RTCEncodedFrame, float]:
+        """
+        Receive the next encoded frame and the time it took to encode.
+        """
+        while True:
+            item = await self._queue.get()
+            if isinstance(item, Exception):
+                raise item
+
+            enc_frame, keyframe, encode_time = item
+            if self._waiting_keyframe and not keyframe:
+                continue
+            self._waiting_keyframe = False
+            return enc_frame, encode_time
+
+    def request_keyframe(self) -> None:
+        """
+        Ask for a keyframe, for instance following a PLI.
+        """
+        self.encoder.request_keyframe()
+
+    def resync(self) -> None:
+        """
+        Discard queued frames and resume at the next keyframe.
+        """
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        if self.track.kind == "video":
+            self._waiting_keyframe = True
+            self.encoder.request_keyframe()
+
+    def unsubscribe(self) -> None:
+        self.encoder._unsubscribe(self)
+
+    def _put(self, item: Union[SharedFrame, Exception]) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if isinstance(item, Exception):
+                self.resync()
+                self._queue.put_nowait(item)
+            else:
+                logger.debug("SharedEncoder x Subscriber fell behind, resyncing")
+                self.resync()
+
+
+class SharedEncoder:
+    """
+    Encodes the frames of a track once, for several senders.
+
+    Frames are read from the track and encoded in a single thread. Each
+    encoded frame is handed to every subscribed sender, which packetizes it
+    with its own SSRC and sequence numbers.
+    """
+
+    def __init__(
+        self,
+        pool: "SharedEncoderPool",
+        key: EncoderKey,
+        track: MediaStreamTrack,
+        codec: RTCRtpCodecParameters,
+    ) -> None:
+        self.codec = codec
+        self.track = track
+
+        self._encoder: Optional[Encoder] = None
+        self._key = key
+        self._keyframe_requested = False
+        self._last_keyframe_time: Optional[float] = None
+        self._pool = pool
+        self._subscriptions: list[SharedEncoderSubscription] = []
+        self._task: Optional[asyncio.Future[None]] = None
+
+        # stats
+        self.frames_encoded = 0
+        self.keyframes_forced = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def request_keyframe(self) -> None:
+        """
+        Ask for a keyframe. Requests from all the subscribers until the
+        keyframe is encoded result in a single keyframe.
+        """
+        self._keyframe_requested = True
+
+    def _subscribe(self) -> SharedEncoderSubscription:
+        subscription = SharedEncoderSubscription(self)
+        self._subscriptions.append(subscription)
+        if self.track.kind == "video":
+            self.request_keyframe()
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        return subscription
+
+    def _unsubscribe(self, subscription: SharedEncoderSubscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        if not self._subscriptions:
+            self._stop()
+
+    def _stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._pool._remove(self)
+
+    def _take_keyframe_request(self) -> bool:
+        if not self._keyframe_requested:
+            return False
+        now = time.monotonic()
+        if (
+            self._last_keyframe_time is not None
+            and now - self._last_keyframe_time < KEYFRAME_MIN_INTERVAL
+        ):
+            return False
+        self._keyframe_requested = False
+        self._last_keyframe_time = now
+        self.keyframes_forced += 1
+        return True
+
+    def __is_keyframe(self, payloads: list[bytes]) -> bool:
+        if self.track.kind != "video":
+            return True
+        return is_keyframe(
+            self.codec, b"".join(depayload(self.codec, p) for p in payloads)
+        )
+
+    async def _run(self) -> None:
+        loop = asyncio.get_event_loop()
+        executor = self._pool._executor
+        own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=self.track.kind + "-shared-encoder"
+            )
+
+        self._encoder = get_encoder(self.codec)
+        if self._pool.bitrate is not None and hasattr(self._encoder, "target_bitrate"):
+            self._encoder.target_bitrate = self._pool.bitrate
+
+        try:
+            while True:
+                data = await self.track.recv()
+                keyframe = self._take_keyframe_request()
+                if isinstance(data, Frame):
+                    (
+                        payloads,
+                        timestamp,
+                        audio_level,
+                        encode_time,
+                    ) = await loop.run_in_executor(
+                        executor,
+                        RTCRtpSender._encode_frame,
+                        self._encoder,
+                        data,
+                        keyframe,
+                    )
+
+                    # flag the keyframes the encoder actually produced
+                    produced_keyframe = bool(payloads) and self.__is_keyframe(payloads)
+                    if keyframe and not produced_keyframe:
+                        # the keyframe was not produced, try again
+                        self._keyframe_requested = True
+                        self._last_keyframe_time = None
+                else:
+                    # pre-encoded data cannot be turned into a keyframe
+                    payloads, timestamp = self._encoder.pack(data)
+                    audio_level, encode_time = None, 0.0
+                    produced_keyframe = data.is_keyframe
+                self.frames_encoded += 1
+
+                if payloads:
+                    item = (
+                        RTCEncodedFrame(payloads, timestamp, audio_level),
+                        produced_keyframe,
+                        encode_time,
+                    )
+                    for subscription in self._subscriptions:
+                        subscription._put(item)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:
+            # hand the error to the senders, which will stop
+            for subscription in self._subscriptions:
+                subscription._put(exc)
+            self._task = None
+            self._pool._remove(self)
+        finally:
+            self._encoder = None
+            if own_executor:
+                executor.shutdown(wait=False)
+
+
+class SharedEncoderPool:
+    """
+    A pool of encoders shared between :class:`RTCRtpSender` instances.
+
+    When the same track is sent to many peers, senders which use the same
+    pool and the same codec share a single encoder instead of each encoding
+    the frames again. Keyframe requests from all these senders are merged.
+
+    Pass the source track itself to every sender, the pool is its only
+    reader. Senders using a shared encoder do not adapt to bandwidth
+    estimates: the encoder runs at the pool's `bitrate`, so use one pool per
+    bitrate tier.
+
+    :param bitrate: The target bitrate of the encoders, in bits per second.
+                    If `None`, the codec's default bitrate is used.
+    :param executor: The :class:`concurrent.futures.Executor` in which frames
+                     are encoded. If `None`, each encoder uses a dedicated
+                     thread.
+    """
+
+    def __init__(
+        self, bitrate: Optional[int] = None, executor: Optional[Executor] = None
+    ) -> None:
+        self.bitrate = bitrate
+        self._encoders: dict[EncoderKey, SharedEncoder] = {}
+        self._executor = executor
+
+    @property
+    def encoders(self) -> list[SharedEncoder]:
+        return list(self._encoders.values())
+
+    def subscribe(
+        self, track: MediaStreamTrack, codec: RTCRtpCodecParameters
+    ) -> SharedEncoderSubscription:
+        """
+        Subscribe to the encoded frames of `track` using `codec`.
+        """
+        key = encoder_key(track, codec)
+        encoder = self._encoders.get(key)
+        if encoder is None:
+            encoder = SharedEncoder(self, key, track, codec)
+            self._encoders[key] = encoder
+        return encoder._subscribe()
+
+    def _remove(self, encoder: SharedEncoder) -> None:
+        if self._encoders.get(encoder._key) is encoder:
+            del self._encoders[encoder._key]
@@ -44,7 +44,14 @@ class RTCInboundRtpStreamStats(RTCReceivedRtpStreamStats):
     metrics for the incoming RTP media stream.
     """
 
-    pass
+    framesDecoded: int = 0
+    "Total number of frames correctly decoded for this RTP stream."
+    totalDecodeTime: float = 0.0
+    "Total number of seconds spent decoding the frames of this RTP stream."
+    framesDropped: int = 0
+    "Total number of decoded frames dropped before the track received them."
+    decoderQueueDepth: int = 0
+    "Number of frames waiting to be decoded for this RTP stream."
 
 
 @dataclass
@@ -66,6 +73,16 @@ class RTCOutboundRtpStreamStats(RTCSentRtpStreamStats):
     """
 
     trackId: str
+    rid: Optional[str] = None
+    "The RTP stream ID of the encoding, if any."
+    framesEncoded: int = 0
+    "Total number of frames successfully encoded for this RTP stream."
+    totalEncodeTime: float = 0.0
+    "Total number of seconds spent encoding the frames of this RTP stream."
+    rtpHistoryHits: int = 0
+    "Number of retransmission requests answered from the packet history."
+    rtpHistoryMisses: int = 0
+    "Number of retransmission requests for packets no longer in the history."
 
 
 @dataclass
@@ -92,6 +109,14 @@ class RTCTransportStats(RTCStats):
     "The current value of :attr:`RTCIceTransport.role`."
     dtlsState: str
     "The current value of :attr:`RTCDtlsTransport.state`."
+    packetsPaced: int = 0
+    "Total number of RTP packets sent through the pacer."
+    totalPacingDelay: float = 0.0
+    "Total number of seconds RTP packets spent queued in the pacer."
+    pacingQueueSize: int = 0
+    "Number of RTP packets currently queued in the pacer."
+    pacingQueueDelay: float = 0.0
+    "Number of seconds the oldest packet in the pacer has been queued."
 
 
 class RTCStatsReport(dict):
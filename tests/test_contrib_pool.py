@@ -0,0 +1,125 @@
+import asyncio
+from unittest import TestCase
+from unittest.mock import patch
+
+from vsaiortc import RTCPeerConnection
+from vsaiortc.contrib.pool import (
+    LATENCY_BUCKETS,
+    LatencyHistogram,
+    RTCPeerConnectionPool,
+)
+
+from .utils import asynctest
+
+
+async def wait_for_idle(pool: RTCPeerConnectionPool, count: int) -> None:
+    for i in range(100):
+        if pool.idle >= count:
+            return
+        await asyncio.sleep(0.05)
+
+
+class LatencyHistogramTest(TestCase):
+    def test_add(self) -> None:
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.mean)
+
+        histogram.add(0.0005)
+        histogram.add(0.002)
+        histogram.add(10.0)
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(histogram.counts[0], 1)
+        self.assertEqual(histogram.counts[1], 1)
+        self.assertEqual(histogram.counts[len(LATENCY_BUCKETS)], 1)
+        self.assertAlmostEqual(histogram.mean or 0, 3.334166, places=5)
+
+
+class RTCPeerConnectionPoolTest(TestCase):
+    @asynctest
+    async def test_acquire(self) -> None:
+        pool = RTCPeerConnectionPool(size=2)
+        await pool.start()
+        await wait_for_idle(pool, 2)
+        self.assertEqual(pool.idle, 2)
+        self.assertEqual(pool.warmup_latency.count, 2)
+
+        # a warm connection has its candidates gathered
+        pc = pool.acquire()
+        self.assertEqual(pool.hits, 1)
+        self.assertEqual(pool.hit_rate, 1.0)
+        pc.createDataChannel("chat")
+        await pc.setLocalDescription(await pc.createOffer())
+        self.assertEqual(pc.iceGatheringState, "complete")
+        self.assertIn("a=candidate:", pc.localDescription.sdp)
+        await pc.close()
+
+        # the pool is refilled
+        await wait_for_idle(pool, 2)
+        self.assertEqual(pool.idle, 2)
+        self.assertEqual(pool.warmup_latency.count, 3)
+
+        await pool.stop()
+        self.assertEqual(pool.idle, 0)
+
+    @asynctest
+    async def test_acquire_empty(self) -> None:
+        pool = RTCPeerConnectionPool(size=1)
+
+        # the pool was not started, a new connection is created
+        pc = pool.acquire()
+        self.assertIsInstance(pc, RTCPeerConnection)
+        self.assertEqual(pool.misses, 1)
+        self.assertEqual(pool.hit_rate, 0.0)
+        self.assertEqual(pool.acquire_latency.count, 1)
+        await pc.close()
+
+    @asynctest
+    async def test_ttl(self) -> None:
+        pool = RTCPeerConnectionPool(size=1, ttl=0.2)
+        await pool.start()
+        await wait_for_idle(pool, 1)
+
+        # expired connections are replaced
+        await asyncio.sleep(0.5)
+        self.assertGreaterEqual(pool.recycled, 1)
+        await wait_for_idle(pool, 1)
+        self.assertEqual(pool.idle, 1)
+
+        await pool.stop()
+
+    @asynctest
+    async def test_stop_waits_for_recycled(self) -> None:
+        closed = asyncio.Event()
+        close = RTCPeerConnection.close
+
+        async def slow_close(pc: RTCPeerConnection) -> None:
+            await asyncio.sleep(0.1)
+            await close(pc)
+            closed.set()
+
+        pool = RTCPeerConnectionPool(size=1, ttl=0.1)
+        await pool.start()
+        await wait_for_idle(pool, 1)
+
+        # the expired connection is still closing when the pool stops
+        with patch.object(RTCPeerConnection, "close", slow_close):
+            await asyncio.sleep(0.15)
+            pc = pool.acquire()
+            self.assertGreaterEqual(pool.recycled, 1)
+            await pool.stop()
+            self.assertTrue(closed.is_set())
+        await pc.close()
+
+    @asynctest
+    async def test_warm_error(self) -> None:
+        pool = RTCPeerConnectionPool(size=1)
+        with patch.object(
+            RTCPeerConnection, "_prewarm", side_effect=OSError("no network")
+        ):
+            with patch("vsaiortc.contrib.pool.RETRY_DELAY", 0.05):
+                await pool.start()
+                await asyncio.sleep(0.2)
+                self.assertEqual(pool.idle, 0)
+        await wait_for_idle(pool, 1)
+        self.assertEqual(pool.idle, 1)
+        await pool.stop()
@@ -0,0 +1,135 @@
+import asyncio
+import errno
+import socket
+from typing import Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from vsaiortc.datagram import DatagramSender, _gso_runs, receive_datagrams
+
+from .utils import asynctest
+
+
+class DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self) -> None:
+        self.received: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self.received.put_nowait(data)
+
+
+class DatagramTest(TestCase):
+    def test_gso_runs(self) -> None:
+        self.assertEqual(_gso_runs([]), [])
+        self.assertEqual(_gso_runs([bytes(100)]), [(0, 1)])
+
+        # the last packet of a run may be shorter
+        self.assertEqual(
+            _gso_runs([bytes(100), bytes(100), bytes(50), bytes(100)]),
+            [(0, 3), (3, 4)],
+        )
+
+        # a longer packet starts a new run
+        self.assertEqual(
+            _gso_runs([bytes(100), bytes(200), bytes(200)]), [(0, 1), (1, 3)]
+        )
+
+        # runs are limited in number of segments and size
+        self.assertEqual(_gso_runs([bytes(10)] * 100), [(0, 64), (64, 100)])
+        self.assertEqual(_gso_runs([bytes(20000)] * 5), [(0, 3), (3, 5)])
+
+    async def run_send(
+        self, packets: list[bytes], gso_enabled: Optional[bool] = None
+    ) -> tuple[DatagramSender, list[bytes]]:
+        loop = asyncio.get_running_loop()
+        receiver_transport, receiver = await loop.create_datagram_endpoint(
+            DatagramProtocol, local_addr=("127.0.0.1", 0)
+        )
+        sender_transport, _ = await loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, local_addr=("127.0.0.1", 0)
+        )
+        sender = DatagramSender(
+            sender_transport, receiver_transport.get_extra_info("sockname")
+        )
+        if gso_enabled is not None:
+            sender.gso_enabled = gso_enabled
+        try:
+            sender.send(packets)
+            return sender, [
+                await asyncio.wait_for(receiver.received.get(), 1) for data in packets
+            ]
+        finally:
+            sender.close()
+            sender_transport.close()
+            receiver_transport.close()
+
+    @asynctest
+    async def test_send_datagrams(self) -> None:
+        packets = [bytes([i]) * 1200 for i in range(10)] + [b"short", bytes(1300)]
+        _, received = await self.run_send(packets)
+        self.assertEqual(received, packets)
+
+    @asynctest
+    async def test_send_datagrams_without_gso(self) -> None:
+        packets = [bytes([i]) * 1200 for i in range(10)] + [b"short", bytes(1300)]
+        with patch.object(DatagramSender, "_sendmsg_gso") as mock_sendmsg_gso:
+            _, received = await self.run_send(packets, gso_enabled=False)
+        self.assertEqual(received, packets)
+        self.assertEqual(mock_sendmsg_gso.call_count, 0)
+
+    @asynctest
+    async def test_send_datagrams_gso_unsupported(self) -> None:
+        packets = [bytes([i]) * 1200 for i in range(10)]
+        with patch.object(
+            DatagramSender,
+            "_sendmsg_gso",
+            side_effect=OSError(errno.EIO, "Input/output error"),
+        ) as mock_sendmsg_gso:
+            sender, received = await self.run_send(packets, gso_enabled=True)
+        self.assertEqual(received, packets)
+        self.assertEqual(mock_sendmsg_gso.call_count, 1)
+
+        # only this sender stops using segmentation offload
+        self.assertFalse(sender.gso_enabled)
+
+    def test_close(self) -> None:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            transport = type(
+                "Transport", (), {"get_extra_info": lambda self, name: sock}
+            )()
+            sender = DatagramSender(transport, ("127.0.0.1", 1234))
+            sender.close()
+            self.assertFalse(sender.gso_enabled)
+
+            # the transport's own socket is left open
+            self.assertNotEqual(sock.fileno(), -1)
+        finally:
+            sock.close()
+
+    def test_receive_datagrams(self) -> None:
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            receiver.bind(("127.0.0.1", 0))
+            receiver.setblocking(False)
+            sender.bind(("127.0.0.1", 0))
+
+            # nothing is waiting
+            self.assertEqual(receive_datagrams(receiver, 10), [])
+
+            packets = [bytes([i]) * 1200 for i in range(5)]
+            for data in packets:
+                sender.sendto(data, receiver.getsockname())
+
+            # reading is limited to the requested count
+            addr = sender.getsockname()
+            self.assertEqual(
+                receive_datagrams(receiver, 3), [(data, addr) for data in packets[:3]]
+            )
+            self.assertEqual(
+                receive_datagrams(receiver, 10), [(data, addr) for data in packets[3:]]
+            )
+        finally:
+            sender.close()
+            receiver.close()
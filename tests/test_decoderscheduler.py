@@ -0,0 +1,178 @@
+import asyncio
+import threading
+from unittest import TestCase
+from unittest.mock import patch
+
+from vsaiortc.decoderscheduler import (
+    DecoderScheduler,
+    get_decoder_scheduler,
+    set_decoder_scheduler,
+)
+from vsaiortc.jitterbuffer import JitterFrame
+from vsaiortc.rtcrtpparameters import RTCRtpCodecParameters
+from vsaiortc.rtcrtpreceiver import RemoteStreamTrack
+
+from .utils import asynctest
+
+PCMU_CODEC = RTCRtpCodecParameters(
+    mimeType="audio/PCMU", clockRate=8000, channels=1, payloadType=0
+)
+
+
+class FakeDecoder:
+    """
+    A decoder which records the thread it runs in and can be held up.
+    """
+
+    def __init__(self, gate: threading.Event) -> None:
+        self.gate = gate
+        self.threads: set[str] = set()
+
+    def decode(self, encoded_frame: JitterFrame) -> list[int]:
+        self.gate.wait()
+        self.threads.add(threading.current_thread().name)
+        return [encoded_frame.timestamp]
+
+
+class DecoderSchedulerTest(TestCase):
+    def setUp(self) -> None:
+        self.gate = threading.Event()
+        self.gate.set()
+        self.decoders: list[FakeDecoder] = []
+
+        def get_decoder(codec: RTCRtpCodecParameters) -> FakeDecoder:
+            decoder = FakeDecoder(self.gate)
+            self.decoders.append(decoder)
+            return decoder
+
+        patcher = patch("vsaiortc.decoderscheduler.get_decoder", get_decoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def open_stream(self, scheduler: DecoderScheduler) -> tuple:
+        track = RemoteStreamTrack(kind="audio")
+        stream = scheduler.open_stream(track)
+        return stream, track._queue, track
+
+    def test_invalid_workers(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            DecoderScheduler(workers=0)
+        self.assertEqual(
+            str(cm.exception), "A decoder scheduler needs at least one worker"
+        )
+
+    def test_default_scheduler(self) -> None:
+        scheduler = get_decoder_scheduler()
+        self.assertIs(get_decoder_scheduler(), scheduler)
+
+        other = DecoderScheduler(workers=2)
+        set_decoder_scheduler(other)
+        self.assertIs(get_decoder_scheduler(), other)
+        set_decoder_scheduler(scheduler)
+
+    @asynctest
+    async def test_ordering(self) -> None:
+        scheduler = DecoderScheduler(workers=4)
+        streams = [self.open_stream(scheduler) for i in range(3)]
+
+        for timestamp in range(20):
+            for stream, _, _ in streams:
+                stream.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=timestamp))
+        for stream, _, _ in streams:
+            stream.close()
+
+        for _, output_q, _ in streams:
+            frames = []
+            while True:
+                frame = await output_q.get()
+                if frame is None:
+                    break
+                frames.append(frame)
+            self.assertEqual(frames, list(range(20)))
+
+        # each stream has a decoder, workers are only started when needed
+        self.assertEqual(len(self.decoders), 3)
+        self.assertLessEqual(len(scheduler._workers), 3)
+
+        # frames are no longer accepted once the stream is closed
+        stream, output_q, _ = streams[0]
+        stream.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=20))
+        self.assertEqual(stream.queue_depth, 0)
+
+    @asynctest
+    async def test_pinned_stream(self) -> None:
+        """
+        A stream with frames in flight stays on the same worker.
+        """
+        scheduler = DecoderScheduler(workers=2)
+        self.gate.clear()
+
+        stream1, output_q1, _ = self.open_stream(scheduler)
+        stream2, output_q2, _ = self.open_stream(scheduler)
+        for timestamp in range(5):
+            stream1.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=timestamp))
+        stream2.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=0))
+
+        # the streams are spread across the workers
+        self.assertIsNot(stream1._worker, stream2._worker)
+        self.assertEqual(len(scheduler._workers), 2)
+        await asyncio.sleep(0.1)
+        self.assertEqual(stream1.queue_depth, 4)
+        self.assertEqual(stream2.queue_depth, 0)
+        self.assertEqual(scheduler.queue_depth, 4)
+
+        self.gate.set()
+        for timestamp in range(5):
+            self.assertEqual(await output_q1.get(), timestamp)
+        self.assertEqual(await output_q2.get(), 0)
+        self.assertEqual(len(self.decoders[0].threads), 1)
+        self.assertEqual(stream1.frames_decoded, 5)
+        self.assertGreater(stream1.total_decode_time, 0)
+
+        # once idle, the stream is no longer pinned
+        await asyncio.sleep(0.1)
+        self.assertIsNone(stream1._worker)
+        self.assertEqual(scheduler.queue_depth, 0)
+
+    @asynctest
+    async def test_fairness(self) -> None:
+        """
+        Streams sharing a worker take turns.
+        """
+        scheduler = DecoderScheduler(workers=1)
+        self.gate.clear()
+
+        # hold up the worker
+        stream0, output_q0, _ = self.open_stream(scheduler)
+        stream0.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=0))
+        await asyncio.sleep(0.1)
+
+        # a busy stream and a quiet stream
+        order: list[str] = []
+        stream1, output_q1, _ = self.open_stream(scheduler)
+        stream2, output_q2, _ = self.open_stream(scheduler)
+        for timestamp in range(10):
+            stream1.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=timestamp))
+        stream2.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=0))
+        output_q1.put = lambda item: order.append("stream1")
+        output_q2.put = lambda item: order.append("stream2")
+
+        self.gate.set()
+        self.assertEqual(await output_q0.get(), 0)
+        while len(order) < 11:
+            await asyncio.sleep(0.01)
+
+        # the quiet stream does not wait for the busy one
+        self.assertEqual(order[:2], ["stream1", "stream2"])
+
+    @asynctest
+    async def test_decoder_error(self) -> None:
+        scheduler = DecoderScheduler(workers=1)
+        stream, output_q, _ = self.open_stream(scheduler)
+
+        with patch.object(FakeDecoder, "decode", side_effect=ValueError("bad")):
+            stream.put(PCMU_CODEC, JitterFrame(data=b"", timestamp=0))
+            stream.close()
+
+            # the worker survives and the track ends
+            self.assertIsNone(await output_q.get())
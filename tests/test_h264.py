@@ -4,7 +4,13 @@ from contextlib import redirect_stderr
 from unittest import TestCase
 
 from vsaiortc.codecs import get_decoder, get_encoder
-from vsaiortc.codecs.h264 import H264Decoder, H264Encoder, H264PayloadDescriptor
+from vsaiortc.codecs.h264 import (
+    H264Decoder,
+    H264Encoder,
+    H264PayloadDescriptor,
+    h264_depayload_with_boundaries,
+    h264_is_keyframe,
+)
 from vsaiortc.jitterbuffer import JitterFrame
 from vsaiortc.rtcrtpparameters import RTCRtpCodecParameters
 
@@ -54,6 +60,7 @@ class H264PayloadDescriptorTest(TestCase):
         payload = load("h264_0001.bin")
         descr, rest = H264PayloadDescriptor.parse(payload)
         self.assertEqual(descr.first_fragment, True)
+        self.assertEqual(descr.last_fragment, False)
         self.assertEqual(repr(descr), "H264PayloadDescriptor(FF=True)")
         self.assertEqual(rest[:4], b"\00\00\00\01")
         self.assertEqual(len(rest), 916)
@@ -62,10 +69,35 @@ class H264PayloadDescriptorTest(TestCase):
         payload = load("h264_0002.bin")
         descr, rest = H264PayloadDescriptor.parse(payload)
         self.assertEqual(descr.first_fragment, False)
+        self.assertEqual(descr.last_fragment, True)
         self.assertEqual(repr(descr), "H264PayloadDescriptor(FF=False)")
         self.assertNotEqual(rest[:4], b"\00\00\00\01")
         self.assertEqual(len(rest), 912)
 
+    def test_depayload_with_boundaries(self) -> None:
+        # first fragment of an FU-A, which may start a frame
+        data, frame_start, fragment_end = h264_depayload_with_boundaries(
+            load("h264_0001.bin")
+        )
+        self.assertEqual(len(data), 916)
+        self.assertIsNone(frame_start)
+        self.assertFalse(fragment_end)
+
+        # last fragment of an FU-A
+        data, frame_start, fragment_end = h264_depayload_with_boundaries(
+            load("h264_0002.bin")
+        )
+        self.assertEqual(len(data), 912)
+        self.assertFalse(frame_start)
+        self.assertTrue(fragment_end)
+
+        # single NAL unit
+        data, frame_start, fragment_end = h264_depayload_with_boundaries(
+            load("h264_0003.bin")
+        )
+        self.assertIsNone(frame_start)
+        self.assertTrue(fragment_end)
+
     def test_parse_fu_a_truncated(self) -> None:
         with self.assertRaises(ValueError) as cm:
             H264PayloadDescriptor.parse(b"\x7c")
@@ -202,6 +234,20 @@ class H264Test(CodecTestCase):
         )
         self.assertEqual(packages, [b"\xff\x00\x00\x00\x00\x00"])
 
+    def test_is_keyframe(self) -> None:
+        # SPS, PPS and IDR slice
+        self.assertTrue(
+            h264_is_keyframe(
+                b"\x00\x00\x00\x01\x67\x42"
+                b"\x00\x00\x00\x01\x68\xce"
+                b"\x00\x00\x00\x01\x65\x88"
+            )
+        )
+
+        # non-IDR slice
+        self.assertFalse(h264_is_keyframe(b"\x00\x00\x00\x01\x41\x9a"))
+        self.assertFalse(h264_is_keyframe(b""))
+
     def test_packetize_one_small(self) -> None:
         packages = [bytes([0xFF, 0xFF])]
         packetize_packages = H264Encoder._packetize(packages)
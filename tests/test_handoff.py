@@ -0,0 +1,128 @@
+import asyncio
+import threading
+from unittest import TestCase
+
+from vsaiortc.handoff import HandoffQueue
+
+from .utils import asynctest
+
+
+class HandoffQueueTest(TestCase):
+    def test_invalid_policy(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            HandoffQueue(policy="bogus")  # type: ignore
+        self.assertEqual(str(cm.exception), "Unknown drop policy 'bogus'")
+
+    def test_drop_oldest(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue(maxsize=2)
+        self.assertTrue(queue.put(1))
+        self.assertTrue(queue.put(2))
+        self.assertTrue(queue.full())
+        self.assertTrue(queue.put(3))
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get_nowait(), 2)
+        self.assertEqual(queue.get_nowait(), 3)
+        with self.assertRaises(asyncio.QueueEmpty):
+            queue.get_nowait()
+
+    def test_drop_newest(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue(maxsize=2, policy="drop-newest")
+        self.assertTrue(queue.put(1))
+        self.assertTrue(queue.put(2))
+        self.assertFalse(queue.put(3))
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get_nowait(), 1)
+        self.assertEqual(queue.get_nowait(), 2)
+
+    def test_resize(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue()
+        for i in range(5):
+            queue.put(i)
+
+        queue.resize(2)
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(queue.dropped, 3)
+        self.assertEqual(queue.get_nowait(), 3)
+
+        queue.resize(0)
+        for i in range(5):
+            queue.put(i)
+        self.assertEqual(queue.qsize(), 6)
+        self.assertEqual(queue.dropped, 3)
+
+    def test_close(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue()
+        queue.put(1)
+        queue.close()
+
+        # items put after closing are dropped
+        self.assertFalse(queue.put(2))
+        self.assertEqual(queue.get_nowait(), 1)
+        self.assertIsNone(queue.get_nowait())
+        self.assertIsNone(queue.get_nowait())
+
+    @asynctest
+    async def test_get_from_thread(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue()
+        loop = asyncio.get_running_loop()
+        wakeups = 0
+        call_soon_threadsafe = loop.call_soon_threadsafe
+
+        def counting_call_soon_threadsafe(*args):  # type: ignore
+            nonlocal wakeups
+            wakeups += 1
+            return call_soon_threadsafe(*args)
+
+        loop.call_soon_threadsafe = counting_call_soon_threadsafe  # type: ignore
+
+        def producer() -> None:
+            for i in range(1000):
+                queue.put(i)
+            queue.close()
+
+        thread = threading.Thread(target=producer)
+        thread.start()
+        items = []
+        while True:
+            item = await queue.get()
+            if item is None:
+                break
+            items.append(item)
+        thread.join()
+        del loop.call_soon_threadsafe
+
+        self.assertEqual(items, list(range(1000)))
+
+        # the loop is only woken up when the consumer waits
+        self.assertLessEqual(wakeups, len(items))
+
+    @asynctest
+    async def test_batch_single_wakeup(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue()
+        loop = asyncio.get_running_loop()
+        get_task = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+
+        handles_before = len(loop._ready)  # type: ignore
+        for i in range(10):
+            queue.put(i)
+        self.assertEqual(len(loop._ready) - handles_before, 1)  # type: ignore
+
+        self.assertEqual(await get_task, 0)
+        self.assertEqual(queue.qsize(), 9)
+
+    @asynctest
+    async def test_get_cancelled(self) -> None:
+        queue: HandoffQueue[int] = HandoffQueue()
+        get_task = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        get_task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await get_task
+
+        # a new consumer is still woken up
+        get_task = asyncio.ensure_future(queue.get())
+        await asyncio.sleep(0)
+        threading.Thread(target=queue.put, args=(1,)).start()
+        self.assertEqual(await asyncio.wait_for(get_task, 1), 1)
@@ -1,8 +1,94 @@
+import random
 from typing import Optional
 from unittest import TestCase
 
-from vsaiortc.jitterbuffer import JitterBuffer
+from vsaiortc.jitterbuffer import (
+    AudioJitterBuffer,
+    JitterBuffer,
+    JitterFrame,
+    PlayoutDelayEstimator,
+)
 from vsaiortc.rtp import RtpPacket
+from vsaiortc.utils import uint16_add
+
+
+class RescanningJitterBuffer(JitterBuffer):
+    """
+    A jitter buffer which finds frames by scanning the packets from the origin
+    each time, as it used to, to check the incremental tracking against.
+    """
+
+    def _remove_frame(self) -> Optional[JitterFrame]:
+        # each frame is [count, timestamp, start_known, complete]
+        frames: list[list] = []
+        for count in range(self._capacity):
+            pos = (self._origin + count) % self._capacity
+            packet = self._packets[pos]
+            if packet is None:
+                break
+            last = frames[-1] if frames else None
+            if last is None or last[3] or packet.timestamp != last[1]:
+                if last is None:
+                    frame_start = self._frame_starts[pos]
+                    start_known = bool(
+                        frame_start
+                        or (frame_start is None and self._origin_starts_frame)
+                    )
+                else:
+                    last[3] = True
+                    start_known = True
+                last = [0, packet.timestamp, start_known, False]
+                frames.append(last)
+            last[0] += 1
+            if self._frame_ends[pos] and last[2]:
+                last[3] = True
+
+        complete = len(frames) - (0 if frames and frames[-1][3] else 1)
+        if complete < max(self._prefetch, 1):
+            return None
+
+        count, timestamp = frames[0][0], frames[0][1]
+        data = []
+        for i in range(count):
+            pos = (self._origin + i) % self._capacity
+            data.append(self._packets[pos].depayloaded)
+            self._packets[pos] = None
+        self._origin = uint16_add(self._origin, count)
+        self._origin_starts_frame = True
+        return JitterFrame(data=b"".join(data), timestamp=timestamp)
+
+
+def lossy_stream(rng: random.Random) -> list[tuple[RtpPacket, Optional[bool]]]:
+    """
+    Build a stream of video packets with losses, reordering, duplicates and
+    jumps, along with whether each packet is known to start a frame.
+    """
+    packets = []
+    sequence_number = rng.randrange(65536)
+    for frame in range(200):
+        if rng.random() < 0.02:
+            sequence_number = uint16_add(sequence_number, rng.randrange(20, 200))
+        count = rng.randrange(1, 6)
+        for i in range(count):
+            packet = RtpPacket(
+                marker=int(i == count - 1),
+                sequence_number=sequence_number,
+                timestamp=3000 * frame,
+            )
+            packet.depayloaded = sequence_number.to_bytes(2, "big")
+            frame_start = (i == 0) if rng.random() < 0.5 else None
+            if rng.random() >= 0.1:
+                packets.append((packet, frame_start))
+            if rng.random() < 0.02:
+                packets.append((packet, frame_start))
+            sequence_number = uint16_add(sequence_number, 1)
+
+    # move some packets a little later
+    for i in range(len(packets) - 5):
+        if rng.random() < 0.1:
+            j = i + rng.randrange(1, 5)
+            packets[i], packets[j] = packets[j], packets[i]
+    return packets
 
 
 class JitterBufferTest(TestCase):
@@ -225,34 +311,34 @@ class JitterBufferTest(TestCase):
         jbuffer = JitterBuffer(capacity=16, prefetch=4)
 
         packet = RtpPacket(sequence_number=0, timestamp=1234)
-        packet._data = b"0000"  # type: ignore
+        packet.depayloaded = b"0000"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=1, timestamp=1235)
-        packet._data = b"0001"  # type: ignore
+        packet.depayloaded = b"0001"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=2, timestamp=1236)
-        packet._data = b"0002"  # type: ignore
+        packet.depayloaded = b"0002"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=3, timestamp=1237)
-        packet._data = b"0003"  # type: ignore
+        packet.depayloaded = b"0003"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=4, timestamp=1238)
-        packet._data = b"0003"  # type: ignore
+        packet.depayloaded = b"0003"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNotNone(frame)
         self.assertEqual(frame.data, b"0000")
         self.assertEqual(frame.timestamp, 1234)
 
         packet = RtpPacket(sequence_number=5, timestamp=1239)
-        packet._data = b"0004"  # type: ignore
+        packet.depayloaded = b"0004"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNotNone(frame)
         self.assertEqual(frame.data, b"0001")
@@ -265,27 +351,221 @@ class JitterBufferTest(TestCase):
         jbuffer = JitterBuffer(capacity=128, is_video=True)
 
         packet = RtpPacket(sequence_number=0, timestamp=1234)
-        packet._data = b"0000"  # type: ignore
+        packet.depayloaded = b"0000"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=1, timestamp=1234)
-        packet._data = b"0001"  # type: ignore
+        packet.depayloaded = b"0001"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=2, timestamp=1234)
-        packet._data = b"0002"  # type: ignore
+        packet.depayloaded = b"0002"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNone(frame)
 
         packet = RtpPacket(sequence_number=3, timestamp=1235)
-        packet._data = b"0003"  # type: ignore
+        packet.depayloaded = b"0003"
         pli_flag, frame = jbuffer.add(packet)
         self.assertIsNotNone(frame)
         self.assertEqual(frame.data, b"000000010002")
         self.assertEqual(frame.timestamp, 1234)
 
+    def test_remove_video_frame_marker(self) -> None:
+        """
+        Video jitter buffer, frames end with the marker bit.
+        """
+        jbuffer = JitterBuffer(capacity=128, is_video=True)
+
+        # the first packet of the first frame is not known
+        packet = RtpPacket(sequence_number=0, timestamp=1234)
+        packet.depayloaded = b"0000"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNone(frame)
+
+        packet = RtpPacket(sequence_number=1, timestamp=1234, marker=1)
+        packet.depayloaded = b"0001"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNone(frame)
+
+        # the next frame completes the first one, and starts right after it
+        packet = RtpPacket(sequence_number=2, timestamp=1235)
+        packet.depayloaded = b"0002"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00000001")
+        self.assertEqual(frame.timestamp, 1234)
+
+        # the marker bit completes the frame
+        packet = RtpPacket(sequence_number=3, timestamp=1235, marker=1)
+        packet.depayloaded = b"0003"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00020003")
+        self.assertEqual(frame.timestamp, 1235)
+        self.assertEqual(jbuffer._origin, 4)
+
+        # a frame with a missing packet waits for it
+        packet = RtpPacket(sequence_number=5, timestamp=1236, marker=1)
+        packet.depayloaded = b"0005"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNone(frame)
+
+        packet = RtpPacket(sequence_number=4, timestamp=1236)
+        packet.depayloaded = b"0004"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00040005")
+        self.assertEqual(frame.timestamp, 1236)
+
+    def test_remove_video_frame_start(self) -> None:
+        """
+        Video jitter buffer, the codec tells which packets start a frame.
+        """
+        jbuffer = JitterBuffer(capacity=128, is_video=True)
+
+        # a frame which does not start at its first received packet is
+        # only complete once the next frame arrives
+        packet = RtpPacket(sequence_number=10, timestamp=1234)
+        packet.depayloaded = b"0010"
+        pli_flag, frame = jbuffer.add(packet, frame_start=False)
+        self.assertIsNone(frame)
+
+        packet = RtpPacket(sequence_number=11, timestamp=1234, marker=1)
+        packet.depayloaded = b"0011"
+        pli_flag, frame = jbuffer.add(packet, frame_start=False)
+        self.assertIsNone(frame)
+
+        packet = RtpPacket(sequence_number=12, timestamp=1235)
+        packet.depayloaded = b"0012"
+        pli_flag, frame = jbuffer.add(packet, frame_start=True)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00100011")
+
+        # a frame which starts at its first packet completes on its own
+        packet = RtpPacket(sequence_number=13, timestamp=1235, marker=1)
+        packet.depayloaded = b"0013"
+        pli_flag, frame = jbuffer.add(packet, frame_start=False)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00120013")
+
+        # the marker bit does not end a frame if the codec says otherwise
+        packet = RtpPacket(sequence_number=14, timestamp=1236, marker=1)
+        packet.depayloaded = b"0014"
+        pli_flag, frame = jbuffer.add(packet, frame_start=True, frame_end=False)
+        self.assertIsNone(frame)
+
+        # after a reset, the start of the frame is unknown
+        jbuffer = JitterBuffer(capacity=128, is_video=True)
+        packet = RtpPacket(sequence_number=20, timestamp=1237)
+        packet.depayloaded = b"0020"
+        pli_flag, frame = jbuffer.add(packet, frame_start=True)
+        self.assertIsNone(frame)
+
+        packet = RtpPacket(sequence_number=21, timestamp=1237, marker=1)
+        packet.depayloaded = b"0021"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"00200021")
+
+    def test_remove_audio_frame_marker(self) -> None:
+        """
+        Audio jitter buffer, the marker bit does not end frames.
+        """
+        jbuffer = JitterBuffer(capacity=16, prefetch=4)
+
+        packet = RtpPacket(sequence_number=0, timestamp=1234, marker=1)
+        packet.depayloaded = b"0000"
+        pli_flag, frame = jbuffer.add(packet, frame_start=True)
+        self.assertIsNone(frame)
+
+    def test_frame_descriptors(self) -> None:
+        """
+        Frames are tracked as packets extend the run starting at the origin.
+        """
+        jbuffer = JitterBuffer(capacity=128, is_video=True)
+
+        for sequence_number, timestamp in [(0, 1234), (2, 1234), (3, 1235)]:
+            packet = RtpPacket(sequence_number=sequence_number, timestamp=timestamp)
+            packet.depayloaded = b"%04d" % sequence_number
+            pli_flag, frame = jbuffer.add(packet)
+            self.assertIsNone(frame)
+        self.assertEqual(jbuffer._run_length, 1)
+        self.assertEqual(len(jbuffer._run_frames), 1)
+
+        # the missing packet completes the run
+        packet = RtpPacket(sequence_number=1, timestamp=1234)
+        packet.depayloaded = b"0001"
+        pli_flag, frame = jbuffer.add(packet)
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"000000010002")
+        self.assertEqual(frame.timestamp, 1234)
+
+        self.assertEqual(jbuffer._origin, 3)
+        self.assertEqual(jbuffer._run_length, 1)
+        descriptor = jbuffer._run_frames[0]
+        self.assertEqual((descriptor.first, descriptor.last), (3, 3))
+        self.assertEqual(descriptor.timestamp, 1235)
+        self.assertFalse(descriptor.complete)
+        self.assertTrue(descriptor.start_known)
+
+    def test_frame_descriptors_fuzz(self) -> None:
+        """
+        Tracking frames incrementally gives the same frames as scanning the
+        buffer for each packet.
+        """
+
+        def frame_key(frame: Optional[JitterFrame]) -> Optional[tuple[bytes, int]]:
+            return None if frame is None else (frame.data, frame.timestamp)
+
+        rng = random.Random(1234)
+        for capacity, prefetch, is_video in [
+            (16, 0, True),
+            (16, 2, True),
+            (32, 0, False),
+            (128, 0, True),
+        ]:
+            jbuffer = JitterBuffer(
+                capacity=capacity, prefetch=prefetch, is_video=is_video
+            )
+            reference = RescanningJitterBuffer(
+                capacity=capacity, prefetch=prefetch, is_video=is_video
+            )
+            for packet, frame_start in lossy_stream(rng):
+                pli_flag, frame = jbuffer.add(packet, frame_start=frame_start)
+                expected_pli_flag, expected = reference.add(
+                    packet, frame_start=frame_start
+                )
+                self.assertEqual(pli_flag, expected_pli_flag)
+                self.assertEqual(frame_key(frame), frame_key(expected))
+                while expected is not None:
+                    frame, expected = jbuffer.pop(), reference.pop()
+                    self.assertEqual(frame_key(frame), frame_key(expected))
+
+    def test_remove_video_frame_large(self) -> None:
+        """
+        Video jitter buffer with a frame larger than 128 packets.
+        """
+        jbuffer = JitterBuffer(capacity=1024, is_video=True)
+
+        for sequence_number in range(65000, 65600):
+            packet = RtpPacket(
+                sequence_number=sequence_number & 0xFFFF,
+                timestamp=1234,
+                marker=int(sequence_number == 65599),
+            )
+            packet.depayloaded = b"x"
+            pli_flag, frame = jbuffer.add(packet, frame_start=sequence_number == 65000)
+            self.assertFalse(pli_flag)
+            if sequence_number < 65599:
+                self.assertIsNone(frame)
+
+        self.assertIsNotNone(frame)
+        self.assertEqual(frame.data, b"x" * 600)
+        self.assertEqual(jbuffer._origin, 64)
+        self.assertEqual(jbuffer._run_length, 0)
+
     def test_pli_flag(self) -> None:
         """
         Video jitter buffer.
@@ -319,3 +599,121 @@ class JitterBufferTest(TestCase):
         self.assertIsNone(frame)
         self.assertEqual(jbuffer._origin, 2000)
         self.assertTrue(pli_flag)
+
+    def test_pop(self) -> None:
+        """
+        A packet which fills a gap completes several frames.
+        """
+        jbuffer = JitterBuffer(capacity=16, is_video=True)
+        for sequence_number in [0, 2, 3]:
+            packet = RtpPacket(
+                sequence_number=sequence_number, timestamp=sequence_number, marker=1
+            )
+            packet.depayloaded = bytes([sequence_number])
+            pli_flag, frame = jbuffer.add(packet, frame_start=True)
+        self.assertIsNone(jbuffer.pop())
+
+        packet = RtpPacket(sequence_number=1, timestamp=1, marker=1)
+        packet.depayloaded = b"\x01"
+        pli_flag, frame = jbuffer.add(packet, frame_start=True)
+        self.assertEqual(frame.data, b"\x01")
+        self.assertEqual(jbuffer.pop().data, b"\x02")
+        self.assertEqual(jbuffer.pop().data, b"\x03")
+        self.assertIsNone(jbuffer.pop())
+
+
+def audio_packet(sequence_number: int) -> RtpPacket:
+    packet = RtpPacket(sequence_number=sequence_number, timestamp=960 * sequence_number)
+    packet.depayloaded = sequence_number.to_bytes(2, "big")
+    return packet
+
+
+class AudioJitterBufferTest(TestCase):
+    def add(
+        self, jbuffer: AudioJitterBuffer, sequence_number: int, arrival_time_ms: int
+    ) -> list[int]:
+        """
+        Add a packet and return the frames which are complete.
+        """
+        pli_flag, frame = jbuffer.add(
+            audio_packet(sequence_number),
+            arrival_time_ms=arrival_time_ms,
+            clock_rate=48000,
+        )
+        self.assertFalse(pli_flag)
+        frames = []
+        while frame is not None:
+            frames.append(int.from_bytes(frame.data, "big"))
+            frame = jbuffer.pop()
+        return frames
+
+    def test_in_order(self) -> None:
+        """
+        Frames are returned as soon as they arrive.
+        """
+        jbuffer = AudioJitterBuffer(capacity=64)
+        for i in range(100):
+            self.assertEqual(self.add(jbuffer, i, arrival_time_ms=20 * i), [i])
+        self.assertEqual(jbuffer.target_delay, 0)
+
+    def test_loss(self) -> None:
+        """
+        A missing packet is given up on once the next packet arrives.
+        """
+        jbuffer = AudioJitterBuffer(capacity=64)
+        for i in range(10):
+            self.assertEqual(self.add(jbuffer, i, arrival_time_ms=20 * i), [i])
+
+        self.assertEqual(self.add(jbuffer, 11, arrival_time_ms=220), [11])
+        self.assertEqual(jbuffer.packets_skipped, 1)
+
+        # the late packet is discarded
+        self.assertEqual(self.add(jbuffer, 10, arrival_time_ms=230), [])
+        self.assertEqual(self.add(jbuffer, 12, arrival_time_ms=240), [12])
+
+    def test_reordered(self) -> None:
+        """
+        On a link which reorders packets, the buffer waits for them.
+        """
+        jbuffer = AudioJitterBuffer(capacity=64)
+        frames = []
+        for i in range(0, 200, 2):
+            # each even packet arrives after the next odd packet
+            frames += self.add(jbuffer, i + 1, arrival_time_ms=20 * i + 20)
+            frames += self.add(jbuffer, i, arrival_time_ms=20 * i + 30)
+        self.assertEqual(jbuffer.target_delay, 1)
+        self.assertEqual(jbuffer.packets_skipped, 0)
+
+        # the stream starts with the first packet received
+        self.assertEqual(frames, list(range(1, 200)))
+
+        # the delay shrinks once the link recovers
+        for i in range(200, 400):
+            frames += self.add(jbuffer, i, arrival_time_ms=20 * i)
+        self.assertEqual(jbuffer.target_delay, 0)
+        self.assertEqual(frames[-100:], list(range(300, 400)))
+
+
+class PlayoutDelayEstimatorTest(TestCase):
+    def test_late_loss_rate(self) -> None:
+        estimator = PlayoutDelayEstimator(max_delay=10)
+        for i in range(1000):
+            # one packet in ten is three frames late
+            delay = 60 if i % 10 == 0 else 0
+            estimator.add(audio_packet(i), 20 * i + delay, clock_rate=48000)
+        self.assertEqual(estimator.target_delay, 3)
+
+        estimator = PlayoutDelayEstimator(max_delay=10, late_loss_rate=0.2)
+        for i in range(1000):
+            delay = 60 if i % 10 == 0 else 0
+            estimator.add(audio_packet(i), 20 * i + delay, clock_rate=48000)
+        self.assertEqual(estimator.target_delay, 0)
+
+    def test_timestamp_wrap(self) -> None:
+        estimator = PlayoutDelayEstimator(max_delay=10)
+        for i in range(100):
+            packet = RtpPacket(
+                sequence_number=i, timestamp=(0xFFFFFFFF - 4800 + 960 * i) & 0xFFFFFFFF
+            )
+            estimator.add(packet, 20 * i, clock_rate=48000)
+        self.assertEqual(estimator.target_delay, 0)
@@ -1,3 +1,7 @@
+from unittest.mock import patch
+
+from av import AudioFrame
+
 from vsaiortc.codecs import get_decoder, get_encoder
 from vsaiortc.codecs.opus import OpusDecoder, OpusEncoder
 from vsaiortc.jitterbuffer import JitterFrame
@@ -94,4 +98,77 @@ class OpusTest(CodecTestCase):
         self.roundtrip_audio(OPUS_CODEC, layout="stereo", sample_rate=48000)
 
     def test_roundtrip_with_loss(self) -> None:
-        self.roundtrip_audio(OPUS_CODEC, layout="stereo", sample_rate=48000, drop=[1])
+        """
+        Missing frames are concealed by the decoder.
+        """
+        encoder = get_encoder(OPUS_CODEC)
+        decoder = get_decoder(OPUS_CODEC)
+        assert isinstance(decoder, OpusDecoder)
+
+        output = []
+        for i, frame in enumerate(
+            self.create_audio_frames(layout="stereo", sample_rate=48000, count=10)
+        ):
+            payloads, timestamp = encoder.encode(frame)
+            if i not in [1, 4, 5]:
+                for decoded in decoder.decode(
+                    JitterFrame(data=payloads[0], timestamp=timestamp)
+                ):
+                    audio_frame = self.ensureIsInstance(decoded, AudioFrame)
+                    self.assertEqual(audio_frame.samples, 960)
+                    output.append(audio_frame.pts)
+        self.assertEqual(output, [i * 960 for i in range(10)])
+        self.assertEqual(decoder.concealed_samples, 3 * 960)
+
+        # long gaps are only partially concealed
+        frames = decoder.decode(JitterFrame(data=payloads[0], timestamp=30 * 960))
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(frames[-1].pts, 30 * 960)
+
+    def test_encoder_packet_loss(self) -> None:
+        encoder = get_encoder(OPUS_CODEC)
+        assert isinstance(encoder, OpusEncoder)
+        frames = self.create_audio_frames(layout="stereo", sample_rate=48000, count=6)
+        self.assertEqual(encoder.packet_loss, 0)
+
+        encoder.packet_loss = 200
+        self.assertEqual(encoder.packet_loss, 100)
+
+        # in-band FEC is enabled when packets are lost
+        encoder.packet_loss = 10
+        encoder.encode(frames[0])
+        codec = encoder.codec
+        self.assertEqual(encoder.codec_packet_loss, 10)
+
+        # small fluctuations do not reconfigure the encoder
+        for i, packet_loss in enumerate([8, 12, 0, 25], 1):
+            encoder.packet_loss = packet_loss
+            payloads, timestamp = encoder.encode(frames[i])
+            self.assertIs(encoder.codec, codec)
+            self.assertEqual(encoder.codec_packet_loss, 10)
+        self.assertEqual(timestamp, 3840)
+
+        # in-band FEC is disabled when packets are no longer lost
+        encoder.packet_loss = 0
+        with patch("vsaiortc.codecs.opus.RECONFIGURE_MIN_INTERVAL", 0):
+            payloads, timestamp = encoder.encode(frames[5])
+        self.assertIsNot(encoder.codec, codec)
+        self.assertEqual(encoder.codec_packet_loss, 0)
+        self.assertEqual(timestamp, 4800)
+
+    def test_encoder_packet_loss_buckets(self) -> None:
+        encoder = get_encoder(OPUS_CODEC)
+        assert isinstance(encoder, OpusEncoder)
+        frames = self.create_audio_frames(layout="stereo", sample_rate=48000, count=2)
+
+        # the packet loss is rounded up, so FEC is enabled for any loss
+        encoder.packet_loss = 1
+        encoder.encode(frames[0])
+        codec = encoder.codec
+        self.assertEqual(encoder.codec_packet_loss, 5)
+
+        # a loss within the same bucket keeps the encoder
+        encoder.packet_loss = 4
+        with patch("vsaiortc.codecs.opus.RECONFIGURE_MIN_INTERVAL", 0):
+            encoder.encode(frames[1])
+        self.assertIs(encoder.codec, codec)
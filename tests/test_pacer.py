@@ -0,0 +1,193 @@
+import asyncio
+from typing import Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from vsaiortc.pacer import PacketPacer, PacketPriority
+
+from .utils import asynctest
+
+
+class PacketPacerTest(TestCase):
+    def setUp(self) -> None:
+        self.batches: list[list[bytes]] = []
+        self.offsets: list[Optional[int]] = []
+        self.sent: list[bytes] = []
+
+    async def mock_send(self, packets: list[tuple[bytes, Optional[int]]]) -> None:
+        self.batches.append([data for data, offset in packets])
+        self.offsets.extend(offset for data, offset in packets)
+        self.sent.extend(data for data, offset in packets)
+
+    @asynctest
+    async def test_priority(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.enqueue(b"video1", PacketPriority.VIDEO)
+        pacer.enqueue(b"video2", PacketPriority.VIDEO)
+        pacer.enqueue(b"rtx", PacketPriority.RETRANSMISSION)
+        pacer.enqueue(b"audio", PacketPriority.AUDIO)
+        self.assertEqual(pacer.queue_size, 4)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.batches, [[b"audio", b"rtx", b"video1", b"video2"]])
+        self.assertEqual(pacer.packets_sent, 4)
+        self.assertEqual(pacer.queue_size, 0)
+        self.assertEqual(pacer.queue_delay, 0.0)
+        pacer.stop()
+
+    @asynctest
+    async def test_enqueue_batch(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.enqueue_batch([b"video1", b"video2"], PacketPriority.VIDEO)
+        pacer.enqueue_batch([b"audio1", b"audio2"], PacketPriority.AUDIO)
+        self.assertEqual(pacer.queue_size, 4)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.batches, [[b"audio1", b"audio2", b"video1", b"video2"]])
+        self.assertEqual(pacer.packets_sent, 4)
+        pacer.stop()
+
+    @asynctest
+    async def test_transport_sequence_number_offset(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.enqueue(b"rtx", PacketPriority.RETRANSMISSION, 20)
+        pacer.enqueue_batch([b"video1", b"video2"], PacketPriority.VIDEO, 24)
+        pacer.enqueue(b"audio", PacketPriority.AUDIO)
+
+        # the offsets are handed back with the packets
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.sent, [b"audio", b"rtx", b"video1", b"video2"])
+        self.assertEqual(self.offsets, [None, 20, 24, 24])
+        pacer.stop()
+
+    @asynctest
+    async def test_pacing(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.bitrate = 320000
+        pacer.multiplier = 1.0
+
+        # 20 packets of 1000 bytes take 500ms at 320kbps
+        for i in range(20):
+            pacer.enqueue(bytes(1000), PacketPriority.VIDEO)
+
+        await asyncio.sleep(0.1)
+        self.assertGreater(len(self.sent), 0)
+        self.assertLess(len(self.sent), 10)
+        self.assertGreater(pacer.queue_delay, 0.0)
+
+        # audio skips the queue
+        pacer.enqueue(b"audio", PacketPriority.AUDIO)
+        await asyncio.sleep(0.02)
+        self.assertIn(b"audio", self.sent)
+        self.assertLess(len(self.sent), 20)
+
+        await asyncio.sleep(0.6)
+        self.assertEqual(len(self.sent), 21)
+        self.assertGreater(pacer.total_queue_delay, 0.0)
+        pacer.stop()
+
+    @asynctest
+    async def test_max_queue_time(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.bitrate = 1000
+
+        with patch("vsaiortc.pacer.MAX_QUEUE_TIME", 0.1):
+            for i in range(20):
+                pacer.enqueue(bytes(1000), PacketPriority.VIDEO)
+
+            await asyncio.sleep(0.2)
+            self.assertEqual(len(self.sent), 20)
+        pacer.stop()
+
+    @asynctest
+    async def test_padding(self) -> None:
+        requested: list[int] = []
+
+        def padding_generator(size: int) -> list[bytes]:
+            requested.append(size)
+            return [bytes(size)]
+
+        pacer = PacketPacer(self.mock_send)
+        pacer.padding_generator = padding_generator
+
+        # no padding unless asked for
+        pacer.enqueue(b"video", PacketPriority.VIDEO)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.sent, [b"video"])
+        self.assertEqual(requested, [])
+
+        # probe
+        pacer.probe(bitrate=800000, duration=0.05)
+        await asyncio.sleep(0.1)
+        self.assertGreater(len(requested), 0)
+        padding_sent = sum(len(data) for data in self.sent[1:])
+        self.assertGreater(padding_sent, 0)
+        self.assertLess(padding_sent, 10000)
+
+        # the probe is over
+        sent = len(self.sent)
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(self.sent), sent)
+        pacer.stop()
+
+    @asynctest
+    async def test_send_error(self) -> None:
+        async def mock_send(packets: list[tuple[bytes, Optional[int]]]) -> None:
+            raise ConnectionError
+
+        pacer = PacketPacer(mock_send)
+        pacer.enqueue(b"video", PacketPriority.VIDEO)
+        await asyncio.sleep(0.05)
+        self.assertEqual(pacer.packets_sent, 1)
+        self.assertEqual(pacer.queue_size, 0)
+
+        pacer.enqueue(b"video", PacketPriority.VIDEO)
+        await asyncio.sleep(0.05)
+        self.assertEqual(pacer.packets_sent, 2)
+        pacer.stop()
+
+    @asynctest
+    async def test_send_unexpected_error(self) -> None:
+        async def mock_send(packets: list[tuple[bytes, Optional[int]]]) -> None:
+            if packets == [(b"bad", None)]:
+                raise ValueError("bad packet")
+            await self.mock_send(packets)
+
+        pacer = PacketPacer(mock_send)
+        with self.assertLogs("vsaiortc.pacer", level="ERROR"):
+            pacer.enqueue(b"bad", PacketPriority.VIDEO)
+            await asyncio.sleep(0.05)
+
+        # later packets still go out
+        pacer.enqueue(b"video", PacketPriority.VIDEO)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.sent, [b"video"])
+        pacer.stop()
+
+    @asynctest
+    async def test_padding_error(self) -> None:
+        def padding_generator(size: int) -> list[bytes]:
+            raise ValueError("no padding")
+
+        pacer = PacketPacer(self.mock_send)
+        pacer.padding_generator = padding_generator
+        with self.assertLogs("vsaiortc.pacer", level="ERROR"):
+            pacer.probe(bitrate=800000, duration=0.02)
+            await asyncio.sleep(0.05)
+
+        pacer.enqueue(b"video", PacketPriority.VIDEO)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.sent, [b"video"])
+        pacer.stop()
+
+    @asynctest
+    async def test_stop(self) -> None:
+        pacer = PacketPacer(self.mock_send)
+        pacer.bitrate = 1000
+        for i in range(5):
+            pacer.enqueue(bytes(1000), PacketPriority.VIDEO)
+        pacer.stop()
+        self.assertEqual(pacer.queue_size, 0)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.sent, [])
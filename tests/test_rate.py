@@ -1,4 +1,5 @@
 from collections.abc import Iterator
+from typing import Optional
 from unittest import TestCase
 
 from numpy import random
@@ -13,7 +14,9 @@ from vsaiortc.rate import (
     RateControlState,
     RateCounter,
     RemoteBitrateEstimator,
+    SendSideBandwidthEstimator,
 )
+from vsaiortc.rtcdtlstransport import TransportFeedbackGenerator
 
 TIMESTAMP_GROUP_LENGTH_US = 5000
 MIN_STEP_US = 20
@@ -936,6 +939,7 @@ class Stream:
         self.capacity = capacity
         self.framerate = 30
         self.payload_size = 1500
+        self.sequence_number = 0
 
         self.send_time_us = 0
         self.arrival_time_us = 0
@@ -984,3 +988,59 @@ class RemoteBitrateEstimatorTest(TestCase):
             if res is not None:
                 target_bitrate = res[0]
         self.assertEqual(target_bitrate, 214200)
+
+
+class SendSideBandwidthEstimatorTest(TestCase):
+    def run_stream(
+        self,
+        estimator: SendSideBandwidthEstimator,
+        generator: TransportFeedbackGenerator,
+        stream: Stream,
+        count: int,
+        loss_every: int = 0,
+    ) -> Optional[int]:
+        target_bitrate = None
+        for i in range(count):
+            sequence_number = stream.sequence_number
+            stream.sequence_number = (sequence_number + 1) & 0xFFFF
+            send_time_ms = stream.send_time_us // 1000
+            _, arrival_time_ms, payload_size = next(stream.generate_frames(1))
+            estimator.add_sent_packet(sequence_number, send_time_ms, payload_size)
+
+            if loss_every and i % loss_every == 0:
+                continue
+            if generator.add(sequence_number, arrival_time_ms, ssrc=1234):
+                for packet in generator.feedback(ssrc=1, now_ms=arrival_time_ms):
+                    res = estimator.add_feedback(packet, now_ms=arrival_time_ms)
+                    if res is not None:
+                        target_bitrate = res
+        return target_bitrate
+
+    def test_capacity_drop(self) -> None:
+        estimator = SendSideBandwidthEstimator()
+        generator = TransportFeedbackGenerator()
+        stream = Stream(capacity=500000)
+
+        self.assertEqual(self.run_stream(estimator, generator, stream, 1000), 550000)
+
+        # reduce capacity
+        stream.capacity = 250000
+        self.assertEqual(self.run_stream(estimator, generator, stream, 1000), 214200)
+
+    def test_loss(self) -> None:
+        estimator = SendSideBandwidthEstimator()
+        generator = TransportFeedbackGenerator()
+        stream = Stream(capacity=5000000)
+
+        self.assertEqual(self.run_stream(estimator, generator, stream, 300), 550000)
+
+        # 25% loss
+        target_bitrate = self.run_stream(
+            estimator, generator, stream, 300, loss_every=4
+        )
+        self.assertEqual(target_bitrate, 75593)
+        self.assertEqual(estimator.loss_bitrate, 75593)
+
+        # no more loss
+        self.assertEqual(self.run_stream(estimator, generator, stream, 600), 550000)
+        self.assertIsNone(estimator.loss_bitrate)
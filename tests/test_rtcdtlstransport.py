@@ -1,29 +1,38 @@
 import asyncio
 import datetime
+import time
+from collections.abc import Coroutine
+from typing import Any
 from unittest import TestCase
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, PropertyMock, patch
 
 from OpenSSL import SSL
 
+from vsaiortc.pacer import PacketPriority
 from vsaiortc.rtcdtlstransport import (
     SRTP_AEAD_AES_256_GCM,
     SRTP_AES128_CM_SHA1_80,
+    CertificateCache,
     RTCCertificate,
     RTCDtlsFingerprint,
     RTCDtlsParameters,
     RTCDtlsTransport,
     RtpRouter,
+    TransportFeedbackGenerator,
 )
 from vsaiortc.rtcrtpparameters import (
     RTCRtpCodecParameters,
     RTCRtpDecodingParameters,
+    RTCRtpHeaderExtensionParameters,
     RTCRtpReceiveParameters,
+    RTCRtpSendParameters,
 )
 from vsaiortc.rtp import (
     RTCP_PSFB_APP,
     RTCP_PSFB_PLI,
     RTCP_RTPFB_NACK,
     AnyRtcpPacket,
+    HeaderExtensionsMap,
     RtcpByePacket,
     RtcpPsfbPacket,
     RtcpReceiverInfo,
@@ -31,6 +40,7 @@ from vsaiortc.rtp import (
     RtcpRtpfbPacket,
     RtcpSenderInfo,
     RtcpSrPacket,
+    RtcpTransportFeedbackPacket,
     RtpPacket,
     pack_remb_fci,
 )
@@ -40,6 +50,11 @@ from .utils import asynctest, dummy_ice_transport_pair, load, set_loss_pattern
 RTP = load("rtp.bin")
 RTCP = load("rtcp_sr.bin")
 
+TRANSPORT_CC_EXTENSION = RTCRtpHeaderExtensionParameters(
+    id=4,
+    uri="http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01",
+)
+
 
 class BrokenDataReceiver:
     async def _handle_data(self, data: bytes) -> None:
@@ -65,16 +80,29 @@ class DummyRtpReceiver:
     async def _handle_rtp_packet(self, packet: RtpPacket, arrival_time_ms: int) -> None:
         self.rtp_packets.append(packet)
 
+    def _receive_rtp_packet(
+        self, packet: RtpPacket, arrival_time_ms: int
+    ) -> list[Coroutine[Any, Any, None]]:
+        self.rtp_packets.append(packet)
+        return []
+
     async def _handle_rtcp_packet(self, packet: AnyRtcpPacket) -> None:
         self.rtcp_packets.append(packet)
 
 
 class DummyRtpSender:
     _ssrc = 0
+    kind = "video"
+
+    def __init__(self) -> None:
+        self.target_bitrates: list[int] = []
 
     async def _handle_rtcp_packet(self, packet: AnyRtcpPacket) -> None:
         pass
 
+    def _handle_target_bitrate(self, bitrate: int) -> None:
+        self.target_bitrates.append(bitrate)
+
 
 class RTCCertificateTest(TestCase):
     def test_generate(self) -> None:
@@ -94,6 +122,72 @@ class RTCCertificateTest(TestCase):
         self.assertEqual(fingerprints[2].algorithm, "sha-512")
         self.assertEqual(len(fingerprints[2].value), 191)
 
+    def test_ssl_context(self) -> None:
+        certificate = RTCCertificate.generateCertificate()
+        ctx = certificate._create_ssl_context([SRTP_AES128_CM_SHA1_80])
+
+        # contexts are reused for the same SRTP profiles
+        self.assertIs(certificate._create_ssl_context([SRTP_AES128_CM_SHA1_80]), ctx)
+        self.assertIsNot(
+            certificate._create_ssl_context([SRTP_AEAD_AES_256_GCM]),
+            ctx,
+        )
+
+
+class CertificateCacheTest(TestCase):
+    def test_get(self) -> None:
+        cache = CertificateCache()
+        certificate = cache.get()
+        self.assertIs(cache.get(), certificate)
+
+    def test_get_expired(self) -> None:
+        cache = CertificateCache()
+        certificate = cache.get()
+
+        past = datetime.datetime.now(tz=datetime.timezone.utc)
+        with patch.object(
+            RTCCertificate, "expires", new_callable=PropertyMock, return_value=past
+        ):
+            self.assertIsNot(cache.get(), certificate)
+
+    def assertRotates(self, cache: CertificateCache) -> None:
+        certificate = cache.get()
+
+        # the current certificate is used while the next one is generated
+        self.assertIs(cache.get(), certificate)
+        for i in range(100):
+            if not cache._rotating:
+                break
+            time.sleep(0.05)
+        self.assertIsNot(cache._certificate, certificate)
+
+    def test_get_rotation(self) -> None:
+        # every certificate is due for rotation
+        cache = CertificateCache(rotation_margin=datetime.timedelta(days=365))
+        self.assertRotates(cache)
+
+    def test_get_rotation_after_expired(self) -> None:
+        cache = CertificateCache()
+        certificate = cache.get()
+
+        # the expired certificate is replaced synchronously
+        past = datetime.datetime.now(tz=datetime.timezone.utc)
+        with patch.object(
+            RTCCertificate, "expires", new_callable=PropertyMock, return_value=past
+        ):
+            self.assertIsNot(cache.get(), certificate)
+        self.assertFalse(cache._rotating)
+
+        # the replacement is rotated once it reaches the margin
+        cache.rotation_margin = datetime.timedelta(days=365)
+        self.assertRotates(cache)
+
+    @asynctest
+    async def test_generate(self) -> None:
+        cache = CertificateCache()
+        certificate = await cache.generate()
+        self.assertIs(cache.get(), certificate)
+
 
 class RTCDtlsTransportTest(TestCase):
     def assertCounters(
@@ -241,10 +335,21 @@ class RTCDtlsTransportTest(TestCase):
         self.assertEqual(len(receiver1.rtcp_packets), 1)
         self.assertEqual(len(receiver1.rtp_packets), 0)
 
+        # send a batch of RTP and RTCP
+        batch = []
+        for i in range(2):
+            packet = RtpPacket.parse(RTP)
+            packet.sequence_number += i + 1
+            batch.append(packet.serialize())
+        await session1._send_rtp_batch(batch + [RTCP])
+        await asyncio.sleep(0.1)
+        self.assertCounters(session1, session2, 6, 3)
+        self.assertEqual(len(receiver2.rtp_packets), 3)
+
         # shutdown
         await session1.stop()
         await asyncio.sleep(0.1)
-        self.assertCounters(session1, session2, 4, 3)
+        self.assertCounters(session1, session2, 7, 3)
         self.assertEqual(session1.state, "closed")
         self.assertEqual(session2.state, "closed")
 
@@ -255,6 +360,115 @@ class RTCDtlsTransportTest(TestCase):
         # try sending after close
         with self.assertRaises(ConnectionError):
             await session1._send_rtp(RTP)
+        with self.assertRaises(ConnectionError):
+            await session1._send_rtp_batch([RTP])
+
+    @asynctest
+    async def test_rtp_transport_feedback(self) -> None:
+        transport1, transport2 = dummy_ice_transport_pair()
+
+        certificate1 = RTCCertificate.generateCertificate()
+        session1 = RTCDtlsTransport(transport1, [certificate1])
+        sender1 = DummyRtpSender()
+        session1._register_rtp_sender(
+            sender1, RTCRtpSendParameters(headerExtensions=[TRANSPORT_CC_EXTENSION])
+        )
+
+        certificate2 = RTCCertificate.generateCertificate()
+        session2 = RTCDtlsTransport(transport2, [certificate2])
+        receiver2 = DummyRtpReceiver()
+        session2._register_rtp_receiver(
+            receiver2,
+            RTCRtpReceiveParameters(
+                codecs=[
+                    RTCRtpCodecParameters(
+                        mimeType="video/VP8", clockRate=90000, payloadType=96
+                    )
+                ],
+                encodings=[RTCRtpDecodingParameters(ssrc=1234, payloadType=96)],
+                headerExtensions=[TRANSPORT_CC_EXTENSION],
+            ),
+        )
+
+        # try queueing before connecting
+        with self.assertRaises(ConnectionError):
+            session1._queue_rtp(RTP, PacketPriority.VIDEO)
+
+        await asyncio.gather(
+            session1.start(session2.getLocalParameters()),
+            session2.start(session1.getLocalParameters()),
+        )
+
+        # send RTP with transport-wide sequence numbers
+        with patch.object(
+            session1._transport_bandwidth_estimator, "add_feedback", return_value=300000
+        ) as mock_add_feedback:
+            for i in range(2):
+                packet = RtpPacket(payload_type=96, sequence_number=i, ssrc=1234)
+                packet.extensions.transport_sequence_number = 0
+                data = packet.serialize(session1._rtp_header_extensions_map)
+                session1._queue_rtp(
+                    data,
+                    PacketPriority.VIDEO,
+                    session1._rtp_header_extensions_map.transport_sequence_number_offset(
+                        data
+                    ),
+                )
+
+            # the stream pauses, the timer reports the packets
+            await asyncio.sleep(0.2)
+
+            # the pacer assigns the sequence numbers as the packets leave
+            self.assertEqual(
+                [p.extensions.transport_sequence_number for p in receiver2.rtp_packets],
+                [0, 1],
+            )
+            self.assertEqual(mock_add_feedback.call_count, 1)
+            feedback = mock_add_feedback.call_args[0][0]
+            self.assertIsInstance(feedback, RtcpTransportFeedbackPacket)
+            self.assertEqual(feedback.ssrc, session2._rtcp_ssrc)
+            self.assertEqual(feedback.base_sequence_number, 0)
+            self.assertEqual(feedback.media_ssrc, 1234)
+            self.assertEqual(len(feedback.deltas), 2)
+            self.assertEqual(sender1.target_bitrates, [300000])
+            self.assertEqual(session1._pacer.bitrate, 300000)
+
+        # shutdown
+        await session1.stop()
+        await session2.stop()
+
+    @asynctest
+    async def test_rtp_without_transport_cc(self) -> None:
+        transport1, transport2 = dummy_ice_transport_pair()
+
+        certificate1 = RTCCertificate.generateCertificate()
+        session1 = RTCDtlsTransport(transport1, [certificate1])
+        receiver1 = DummyRtpReceiver()
+        session1._register_rtp_receiver(
+            receiver1,
+            RTCRtpReceiveParameters(
+                codecs=[
+                    RTCRtpCodecParameters(
+                        mimeType="video/VP8", clockRate=90000, payloadType=96
+                    )
+                ],
+                encodings=[RTCRtpDecodingParameters(ssrc=1234, payloadType=96)],
+            ),
+        )
+
+        # the packet carries a sequence number which was not negotiated
+        extensions_map = HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpReceiveParameters(headerExtensions=[TRANSPORT_CC_EXTENSION])
+        )
+        packet = RtpPacket(payload_type=96, sequence_number=1, ssrc=1234)
+        packet.extensions.transport_sequence_number = 5
+        session1._handle_rtp_data(packet.serialize(extensions_map), 0)
+
+        # it is ignored, and the header extensions are not decoded
+        self.assertEqual(len(receiver1.rtp_packets), 1)
+        self.assertIsNone(receiver1.rtp_packets[0]._extensions)
+        self.assertIsNone(session1._transport_feedback_handle)
 
     @asynctest
     async def test_rtp_malformed(self) -> None:
@@ -264,11 +478,60 @@ class RTCDtlsTransportTest(TestCase):
         session1 = RTCDtlsTransport(transport1, [certificate1])
 
         # receive truncated RTP
-        await session1._handle_rtp_data(RTP[0:8], 0)
+        session1._handle_rtp_data(RTP[0:8], 0)
 
         # receive truncated RTCP
         await session1._handle_rtcp_data(RTCP[0:8])
 
+    @asynctest
+    async def test_datagram_received(self) -> None:
+        transport1, transport2 = dummy_ice_transport_pair()
+
+        certificate1 = RTCCertificate.generateCertificate()
+        session1 = RTCDtlsTransport(transport1, [certificate1])
+
+        certificate2 = RTCCertificate.generateCertificate()
+        session2 = RTCDtlsTransport(transport2, [certificate2])
+        receiver2 = DummyRtpReceiver()
+        session2._register_rtp_receiver(
+            receiver2,
+            RTCRtpReceiveParameters(
+                codecs=[
+                    RTCRtpCodecParameters(
+                        mimeType="audio/PCMU", clockRate=8000, payloadType=0
+                    )
+                ],
+                encodings=[RTCRtpDecodingParameters(ssrc=4028317929, payloadType=0)],
+            ),
+        )
+
+        await asyncio.gather(
+            session1.start(session2.getLocalParameters()),
+            session2.start(session1.getLocalParameters()),
+        )
+
+        # SRTP is handled immediately
+        self.assertTrue(session2._datagram_received(session1._tx_srtp.protect(RTP)))
+        self.assertEqual(len(receiver2.rtp_packets), 1)
+
+        # SRTCP is handled in the background
+        self.assertTrue(
+            session2._datagram_received(session1._tx_srtp.protect_rtcp(RTCP))
+        )
+        self.assertEqual(len(session2._tasks), 1)
+        await asyncio.sleep(0.1)
+        self.assertEqual(len(session2._tasks), 0)
+
+        # DTLS is left to the receive loop
+        self.assertFalse(session2._datagram_received(b"\x17\xfe\xfd"))
+
+        stats = session2._get_stats()[session2._stats_id]
+        self.assertEqual(stats.packetsReceived, 4)
+
+        # shutdown
+        await session1.stop()
+        await session2.stop()
+
     @asynctest
     async def test_srtp_unprotect_error(self) -> None:
         transport1, transport2 = dummy_ice_transport_pair()
@@ -601,3 +864,39 @@ class RtpRouterTest(TestCase):
         # unknown SSRC, ambiguous payload type
         self.assertEqual(router.route_rtp(RtpPacket(ssrc=5678, payload_type=96)), None)
         self.assertEqual(router.route_rtp(RtpPacket(ssrc=5678, payload_type=97)), None)
+
+    def test_transport_feedback_generator(self) -> None:
+        generator = TransportFeedbackGenerator()
+        self.assertFalse(generator.add(65534, 1000, ssrc=1234))
+        self.assertFalse(generator.add(65535, 1010, ssrc=1234))
+        self.assertFalse(generator.add(1, 1030, ssrc=1234))
+        self.assertTrue(generator.add(2, 1100, ssrc=1234))
+
+        packets = generator.feedback(ssrc=1, now_ms=1100)
+        self.assertEqual(
+            packets,
+            [
+                RtcpTransportFeedbackPacket(
+                    ssrc=1,
+                    media_ssrc=1234,
+                    base_sequence_number=65534,
+                    reference_time=15,
+                    feedback_packet_count=0,
+                    deltas=[160, 40, None, 80, 280],
+                )
+            ],
+        )
+
+        # late packets which were already reported are ignored
+        self.assertFalse(generator.add(0, 1110, ssrc=1234))
+        self.assertEqual(generator.feedback(ssrc=1, now_ms=1110), [])
+
+        # a large gap in arrival times splits the feedback
+        generator.add(3, 2000, ssrc=1234)
+        generator.add(4, 12000, ssrc=1234)
+        packets = generator.feedback(ssrc=1, now_ms=12000)
+        self.assertEqual(len(packets), 2)
+        self.assertEqual(packets[0].base_sequence_number, 3)
+        self.assertEqual(packets[0].feedback_packet_count, 1)
+        self.assertEqual(packets[1].base_sequence_number, 4)
+        self.assertEqual(packets[1].feedback_packet_count, 2)
@@ -1,5 +1,6 @@
 import asyncio
 from typing import Optional
+from unittest.mock import patch
 
 import aioice.ice
 import aioice.stun
@@ -13,6 +14,7 @@ from vsaiortc.rtcicetransport import (
     RTCIceParameters,
     RTCIceTransport,
     connection_kwargs,
+    nominated_stun_pair,
     parse_stun_turn_uri,
 )
 
@@ -312,7 +314,7 @@ class RTCIceTransportTest(TestCase):
         transport_1 = RTCIceTransport(gatherer_1)
 
         gatherer_2 = RTCIceGatherer()
-        transport_2 = RTCIceTransport(gatherer_2)
+        transport_2 = RTCIceTransport(gatherer_2, receiveBatching=True)
 
         # gather candidates
         await asyncio.gather(gatherer_1.gather(), gatherer_2.gather())
@@ -330,12 +332,61 @@ class RTCIceTransportTest(TestCase):
         )
         self.assertEqual(transport_1.state, "completed")
         self.assertEqual(transport_2.state, "completed")
+        self.assertIsNotNone(nominated_stun_pair(transport_1._connection))
+
+        # send a batch of datagrams
+        packets = [bytes([i]) * 1200 for i in range(5)] + [b"last"]
+        await transport_1._send_batch(packets)
+        for data in packets:
+            self.assertEqual(await transport_2._recv(), data)
+
+        # send a batch without access to the nominated pair
+        with patch("vsaiortc.rtcicetransport.nominated_stun_pair", return_value=None):
+            await transport_1._send_batch(packets)
+        for data in packets:
+            self.assertEqual(await transport_2._recv(), data)
+
+        # hand datagrams to a handler, which lets some through
+        handled: list[bytes] = []
+
+        def handler(data: bytes) -> bool:
+            if data == b"last":
+                return False
+            handled.append(data)
+            return True
+
+        # the handler is ignored unless receive batching is enabled
+        transport_1._set_datagram_handler(handler)
+        await transport_2._send_batch(packets)
+        for data in packets:
+            self.assertEqual(await transport_1._recv(), data)
+        self.assertEqual(handled, [])
+
+        transport_2._set_datagram_handler(handler)
+        await transport_1._send_batch(packets)
+        self.assertEqual(await transport_2._recv(), b"last")
+        self.assertEqual(handled, packets[:-1])
+
+        # restore the default behaviour
+        transport_2._set_datagram_handler(None)
+        await transport_1._send_batch(packets)
+        for data in packets:
+            self.assertEqual(await transport_2._recv(), data)
+        self.assertEqual(len(handled), 5)
 
         # cleanup
         await asyncio.gather(transport_1.stop(), transport_2.stop())
         self.assertEqual(transport_1.state, "closed")
         self.assertEqual(transport_2.state, "closed")
 
+        # try sending after close
+        self.assertIsNone(nominated_stun_pair(transport_1._connection))
+        with self.assertRaises(ConnectionError):
+            await transport_1._send_batch(packets)
+
+    def test_nominated_stun_pair_without_private_state(self) -> None:
+        self.assertIsNone(nominated_stun_pair(object()))  # type: ignore[arg-type]
+
     @asynctest
     async def test_connect_fail(self) -> None:
         gatherer_1 = RTCIceGatherer()
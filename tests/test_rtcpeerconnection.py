@@ -1,13 +1,17 @@
 import asyncio
+import datetime
 import re
+import threading
 from collections.abc import Callable
 from typing import Optional, Union
 from unittest import TestCase
+from unittest.mock import patch
 
 import aioice.stun
 
 from vsaiortc import (
     RTCBundlePolicy,
+    RTCCertificate,
     RTCConfiguration,
     RTCDataChannel,
     RTCIceCandidate,
@@ -22,6 +26,7 @@ from vsaiortc.exceptions import (
     OperationError,
 )
 from vsaiortc.mediastreams import AudioStreamTrack, MediaStreamTrack, VideoStreamTrack
+from vsaiortc.rtcdtlstransport import get_certificate_cache
 from vsaiortc.rtcpeerconnection import (
     filter_preferred_codecs,
     find_common_codecs,
@@ -31,6 +36,7 @@ from vsaiortc.rtcrtpparameters import (
     RTCRtcpFeedback,
     RTCRtpCodecCapability,
     RTCRtpCodecParameters,
+    RTCRtpEncodingParameters,
 )
 from vsaiortc.rtcrtpsender import RTCRtpSender
 from vsaiortc.sdp import SessionDescription
@@ -47,6 +53,7 @@ H264_SDP = lf2crlf(
 a=rtcp-fb:99 nack
 a=rtcp-fb:99 nack pli
 a=rtcp-fb:99 goog-remb
+a=rtcp-fb:99 transport-cc
 a=fmtp:99 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42001f
 a=rtpmap:100 rtx/90000
 a=fmtp:100 apt=99
@@ -54,6 +61,7 @@ a=rtpmap:101 H264/90000
 a=rtcp-fb:101 nack
 a=rtcp-fb:101 nack pli
 a=rtcp-fb:101 goog-remb
+a=rtcp-fb:101 transport-cc
 a=fmtp:101 level-asymmetry-allowed=1;packetization-mode=1;profile-level-id=42e01f
 a=rtpmap:102 rtx/90000
 a=fmtp:102 apt=101
@@ -64,6 +72,7 @@ VP8_SDP = lf2crlf(
 a=rtcp-fb:97 nack
 a=rtcp-fb:97 nack pli
 a=rtcp-fb:97 goog-remb
+a=rtcp-fb:97 transport-cc
 a=rtpmap:98 rtx/90000
 a=fmtp:98 apt=97
 """
@@ -1000,6 +1009,112 @@ a=rtpmap:8 PCMA/8000
         pc2 = RTCPeerConnection()
         await self._test_connect_audio_bidirectional(pc1, pc2)
 
+    @asynctest
+    async def test_certificates(self) -> None:
+        certificate = await RTCPeerConnection.generateCertificate()
+        self.assertIsInstance(certificate, RTCCertificate)
+        fingerprint = certificate.getFingerprints()[0].value
+
+        pc = RTCPeerConnection(RTCConfiguration(certificates=[certificate]))
+        pc.createDataChannel("chat")
+        await pc.setLocalDescription(await pc.createOffer())
+        self.assertIn(f"a=fingerprint:sha-256 {fingerprint}", pc.localDescription.sdp)
+        await pc.close()
+
+        # connections without certificates generate their own
+        pc1 = RTCPeerConnection()
+        pc2 = RTCPeerConnection()
+        await pc1._prewarm()
+        for pc in [pc1, pc2]:
+            pc.createDataChannel("chat")
+            await pc.setLocalDescription(await pc.createOffer())
+        fingerprints = [
+            re.findall("a=fingerprint:sha-256 (.+)", pc.localDescription.sdp)
+            for pc in [pc1, pc2]
+        ]
+        self.assertNotEqual(fingerprints[0], fingerprints[1])
+        self.assertNotIn(fingerprint, fingerprints[0][0])
+        await pc1.close()
+        await pc2.close()
+
+        # connections can opt into sharing a certificate
+        shared = await get_certificate_cache().generate()
+        pc1 = RTCPeerConnection(RTCConfiguration(certificates=[shared]))
+        pc2 = RTCPeerConnection(RTCConfiguration(certificates=[shared]))
+        for pc in [pc1, pc2]:
+            pc.createDataChannel("chat")
+            await pc.setLocalDescription(await pc.createOffer())
+        fingerprint = shared.getFingerprints()[0].value
+        for pc in [pc1, pc2]:
+            self.assertIn(
+                f"a=fingerprint:sha-256 {fingerprint}", pc.localDescription.sdp
+            )
+        await pc1.close()
+        await pc2.close()
+
+    @asynctest
+    async def test_certificates_off_loop(self) -> None:
+        released = []
+        release = threading.Event()
+        threads = []
+        generate = RTCCertificate.generateCertificate
+
+        def generate_certificate() -> RTCCertificate:
+            threads.append(threading.get_ident())
+            released.append(release.wait(1))
+            return generate()
+
+        with patch.object(
+            RTCCertificate, "generateCertificate", side_effect=generate_certificate
+        ):
+            # adding media does not wait for the certificate
+            pc = RTCPeerConnection()
+            pc.addTransceiver("audio")
+            pc.createDataChannel("chat")
+            release.set()
+
+            await pc.setLocalDescription(await pc.createOffer())
+            await pc.close()
+
+        # the certificate is generated once, outside the event loop
+        self.assertEqual(released, [True])
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+        self.assertIn("a=fingerprint:sha-256 ", pc.localDescription.sdp)
+
+    def test_certificates_without_loop(self) -> None:
+        # without a running loop the certificate is generated when needed
+        pc = RTCPeerConnection()
+        threads = []
+        generate = RTCCertificate.generateCertificate
+
+        def generate_certificate() -> RTCCertificate:
+            threads.append(threading.get_ident())
+            return generate()
+
+        async def create_offer() -> None:
+            pc.addTransceiver("audio")
+            await pc.setLocalDescription(await pc.createOffer())
+            await pc.close()
+
+        with patch.object(
+            RTCCertificate, "generateCertificate", side_effect=generate_certificate
+        ):
+            asyncio.run(create_offer())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+        self.assertIn("a=fingerprint:sha-256 ", pc.localDescription.sdp)
+
+    def test_certificates_expired(self) -> None:
+        certificate = RTCCertificate.generateCertificate()
+        with patch(
+            "vsaiortc.clock.current_datetime",
+            return_value=certificate.expires + datetime.timedelta(seconds=1),
+        ):
+            with self.assertRaises(InvalidAccessError) as cm:
+                RTCPeerConnection(RTCConfiguration(certificates=[certificate]))
+        self.assertEqual(str(cm.exception), "Certificate has expired")
+
     async def _test_connect_audio_bidirectional_trickle(self, with_mid: bool) -> None:
         pc1 = RTCPeerConnection()
         pc1_states = track_states(pc1)
@@ -2186,6 +2301,46 @@ a=rtpmap:0 PCMU/8000
         pc2 = RTCPeerConnection()
         await self._test_connect_audio_and_video(pc1, pc2)
 
+    @asynctest
+    async def test_connect_audio_and_video_and_data_channel_unbundled(self) -> None:
+        def strip_bundle(description: RTCSessionDescription) -> RTCSessionDescription:
+            return RTCSessionDescription(
+                sdp=re.sub("a=group:BUNDLE.*\r\n", "", description.sdp),
+                type=description.type,
+            )
+
+        pc1 = RTCPeerConnection(
+            RTCConfiguration(bundlePolicy=RTCBundlePolicy.MAX_COMPAT)
+        )
+        pc2 = RTCPeerConnection(
+            RTCConfiguration(bundlePolicy=RTCBundlePolicy.MAX_COMPAT)
+        )
+        pc1.addTransceiver("audio")
+        pc1.addTransceiver("video")
+        dc = pc1.createDataChannel("chat")
+
+        # the peers are not bundle-aware
+        await pc1.setLocalDescription(await pc1.createOffer())
+        await pc2.setRemoteDescription(strip_bundle(pc1.localDescription))
+        await pc2.setLocalDescription(await pc2.createAnswer())
+        await pc1.setRemoteDescription(strip_bundle(pc2.localDescription))
+
+        # all the transports are connected
+        await self.assertIceCompleted(pc1, pc2)
+        await self.assertDataChannelOpen(dc)
+        for pc in [pc1, pc2]:
+            transports = set(t.receiver.transport for t in pc.getTransceivers())
+            self.assertEqual(len(transports), 2)
+            self.assertNotIn(pc.sctp.transport, transports)
+            await self.sleepWhile(lambda: pc.connectionState != "connected")
+            self.assertEqual(pc.connectionState, "connected")
+
+        # close
+        await pc1.close()
+        await pc2.close()
+        self.assertClosed(pc1)
+        self.assertClosed(pc2)
+
     @asynctest
     async def test_connect_audio_and_video_bundlepolicy_max_bundle(self) -> None:
         pc1 = RTCPeerConnection(
@@ -2929,6 +3084,99 @@ a=rtpmap:0 PCMU/8000
             ["stable", "have-remote-offer", "stable", "closed"],
         )
 
+    @asynctest
+    async def test_connect_video_simulcast(self) -> None:
+        pc1 = RTCPeerConnection()
+        pc2 = RTCPeerConnection()
+
+        # create offer
+        transceiver = pc1.addTransceiver(
+            VideoStreamTrack(),
+            sendEncodings=[
+                RTCRtpEncodingParameters(rid="h"),
+                RTCRtpEncodingParameters(rid="q", scaleResolutionDownBy=2.0),
+            ],
+        )
+        offer = await pc1.createOffer()
+        self.assertTrue("a=rid:h send\r\n" in offer.sdp)
+        self.assertTrue("a=rid:q send\r\n" in offer.sdp)
+        self.assertTrue("a=simulcast:send h;q\r\n" in offer.sdp)
+
+        # only the first layer has SSRC lines
+        self.assertEqual(
+            [ssrc.ssrc for ssrc in SessionDescription.parse(offer.sdp).media[0].ssrc],
+            [transceiver.sender._ssrc, transceiver.sender._rtx_ssrc],
+        )
+
+        await pc1.setLocalDescription(offer)
+        await pc2.setRemoteDescription(pc1.localDescription)
+
+        # the answerer does not receive simulcast
+        pc2.addTrack(VideoStreamTrack())
+        answer = await pc2.createAnswer()
+        self.assertFalse("a=simulcast:" in answer.sdp)
+        await pc2.setLocalDescription(answer)
+        await pc1.setRemoteDescription(pc2.localDescription)
+        await self.assertIceCompleted(pc1, pc2)
+
+        # only the first layer is sent
+        await asyncio.sleep(0.5)
+        report = await transceiver.sender.getStats()
+        outbound_rtp = [s for s in report.values() if s.type == "outbound-rtp"]
+        self.assertEqual(len(outbound_rtp), 1)
+        self.assertEqual(outbound_rtp[0].rid, "h")
+        self.assertGreater(outbound_rtp[0].packetsSent, 0)
+
+        # close
+        await pc1.close()
+        await pc2.close()
+        self.assertClosed(pc1)
+        self.assertClosed(pc2)
+
+    @asynctest
+    async def test_connect_video_simulcast_negotiated(self) -> None:
+        pc1 = RTCPeerConnection()
+        pc2 = RTCPeerConnection()
+
+        # create offer
+        transceiver = pc1.addTransceiver(
+            VideoStreamTrack(),
+            sendEncodings=[
+                RTCRtpEncodingParameters(rid="h"),
+                RTCRtpEncodingParameters(rid="q", scaleResolutionDownBy=2.0),
+            ],
+        )
+        await pc1.setLocalDescription(await pc1.createOffer())
+        await pc2.setRemoteDescription(pc1.localDescription)
+        await pc2.setLocalDescription(await pc2.createAnswer())
+
+        # pretend the answerer receives simulcast, with the second layer paused
+        # then resumed
+        mangled = RTCSessionDescription(
+            sdp=pc2.localDescription.sdp.replace(
+                "a=rtcp-mux\r\n",
+                "a=rtcp-mux\r\na=rid:h recv\r\na=rid:q recv\r\n"
+                "a=simulcast:recv h;~q,q\r\n",
+            ),
+            type=pc2.localDescription.type,
+        )
+        await pc1.setRemoteDescription(mangled)
+        await self.assertIceCompleted(pc1, pc2)
+
+        # both layers are sent
+        await asyncio.sleep(0.5)
+        report = await transceiver.sender.getStats()
+        outbound_rtp = [s for s in report.values() if s.type == "outbound-rtp"]
+        self.assertEqual(sorted(s.rid for s in outbound_rtp), ["h", "q"])
+        for stats in outbound_rtp:
+            self.assertGreater(stats.packetsSent, 0)
+
+        # close
+        await pc1.close()
+        await pc2.close()
+        self.assertClosed(pc1)
+        self.assertClosed(pc2)
+
     @asynctest
     async def test_connect_video_no_ssrc(self) -> None:
         pc1 = RTCPeerConnection()
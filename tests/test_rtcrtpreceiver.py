@@ -7,6 +7,7 @@ from unittest.mock import MagicMock, patch
 
 import av
 
+from vsaiortc import clock
 from vsaiortc.codecs import PCMU_CODEC, get_encoder
 from vsaiortc.exceptions import InvalidStateError
 from vsaiortc.mediastreams import MediaStreamError
@@ -20,6 +21,7 @@ from vsaiortc.rtcrtpparameters import (
     RTCRtpRtxParameters,
 )
 from vsaiortc.rtcrtpreceiver import (
+    NACK_MAX_RETRIES,
     NackGenerator,
     RemoteStreamTrack,
     RTCRtpReceiver,
@@ -27,7 +29,13 @@ from vsaiortc.rtcrtpreceiver import (
     StreamStatistics,
     TimestampMapper,
 )
-from vsaiortc.rtp import RtcpPacket, RtpPacket
+from vsaiortc.rtp import (
+    RtcpPacket,
+    RtcpReceiverInfo,
+    RtcpSenderInfo,
+    RtcpSrPacket,
+    RtpPacket,
+)
 from vsaiortc.stats import RTCStatsReport
 from vsaiortc.utils import uint16_add
 
@@ -108,11 +116,13 @@ class NackGeneratorTest(TestCase):
             self.assertEqual(missed, packet.sequence_number == 2)
 
         self.assertEqual(generator.missing, set([1]))
+        self.assertTrue(generator.has_missing)
 
         # late arrival
         missed = generator.add(missing)
         self.assertEqual(missed, False)
         self.assertEqual(generator.missing, set())
+        self.assertFalse(generator.has_missing)
 
     def test_with_loss_truncate(self) -> None:
         generator = NackGenerator()
@@ -125,6 +135,55 @@ class NackGeneratorTest(TestCase):
         generator.add(packets[258])
         self.assertEqual(generator.missing, set(range(130, 258)))
 
+        # the packets which fell out of the history are given up on
+        self.assertTrue(generator.keyframe_needed)
+
+    def test_with_loss_wrap(self) -> None:
+        generator = NackGenerator()
+        packets = create_rtp_packets(10, 65530)
+
+        generator.add(packets[0])
+        generator.add(packets[9])
+        self.assertEqual(
+            generator.nacks(0.0), [65531, 65532, 65533, 65534, 65535, 0, 1, 2]
+        )
+
+    def test_nacks(self) -> None:
+        generator = NackGenerator()
+        packets = create_rtp_packets(10, 0)
+        generator.add(packets[0])
+        generator.add(packets[2])
+        generator.add(packets[4])
+
+        # missing packets are requested at once
+        self.assertEqual(generator.nacks(0.0), [1, 3])
+        self.assertEqual(generator.nacks(0.05), [])
+
+        # then once per round-trip time
+        generator.add(packets[3])
+        generator.add(packets[7])
+        self.assertEqual(generator.nacks(0.06), [5, 6])
+        self.assertEqual(generator.nacks(0.1), [1])
+
+        generator.rtt = 0.2
+        self.assertEqual(generator.nacks(0.2), [])
+        self.assertEqual(generator.nacks(0.31), [1, 5, 6])
+
+    def test_nacks_give_up(self) -> None:
+        generator = NackGenerator()
+        packets = create_rtp_packets(3, 0)
+        generator.add(packets[0])
+        generator.add(packets[2])
+        generator.rtt = 1.0
+
+        for i in range(10):
+            self.assertEqual(generator.nacks(float(i)), [1])
+            self.assertFalse(generator.keyframe_needed)
+
+        self.assertEqual(generator.nacks(10.0), [])
+        self.assertEqual(generator.missing, set())
+        self.assertTrue(generator.keyframe_needed)
+
 
 class StreamStatisticsTest(TestCase):
     def create_counter(self) -> StreamStatistics:
@@ -228,6 +287,138 @@ class StreamStatisticsTest(TestCase):
         self.assertEqual(counter.jitter, 4)
 
 
+class RemoteStreamTrackTest(CodecTestCase):
+    def create_frame(self, pts: int) -> av.VideoFrame:
+        frame = av.VideoFrame(width=32, height=32)
+        frame.pts = pts
+        frame.time_base = fractions.Fraction(1, 90000)
+        return frame
+
+    def test_invalid_mode(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            RemoteStreamTrack(kind="video", mode="bogus")  # type: ignore
+        self.assertEqual(str(cm.exception), "Unknown track mode 'bogus'")
+
+        with self.assertRaises(ValueError) as cm:
+            RemoteStreamTrack(kind="video", mode="max-fps")
+        self.assertEqual(
+            str(cm.exception), "The 'max-fps' mode requires a positive max_fps"
+        )
+
+        with self.assertRaises(ValueError) as cm:
+            RemoteStreamTrack(kind="audio", mode="max-fps", max_fps=10)
+        self.assertEqual(
+            str(cm.exception), "The 'max-fps' mode is only available for video"
+        )
+
+    @asynctest
+    async def test_mode_all(self) -> None:
+        track = RemoteStreamTrack(kind="video")
+        self.assertEqual(track.mode, "all")
+        for i in range(10):
+            track._put_frame(self.create_frame(i * 3000))
+        for i in range(10):
+            self.assertEqual((await track.recv()).pts, i * 3000)
+        self.assertEqual(track.frames_dropped, 0)
+
+    @asynctest
+    async def test_mode_bounded(self) -> None:
+        track = RemoteStreamTrack(kind="video", track_buffer_size=3, mode="bounded")
+        for i in range(10):
+            track._put_frame(self.create_frame(i * 3000))
+        for i in range(7, 10):
+            self.assertEqual((await track.recv()).pts, i * 3000)
+        self.assertEqual(track.frames_dropped, 7)
+
+    @asynctest
+    async def test_mode_latest(self) -> None:
+        track = RemoteStreamTrack(kind="video", mode="latest")
+        for i in range(10):
+            track._put_frame(self.create_frame(i * 3000))
+        self.assertEqual((await track.recv()).pts, 27000)
+        self.assertEqual(track.frames_dropped, 9)
+
+    @asynctest
+    async def test_mode_max_fps(self) -> None:
+        track = RemoteStreamTrack(
+            kind="video", track_buffer_size=100, mode="max-fps", max_fps=15
+        )
+
+        # 30 fps is sampled down to 15 fps
+        for i in range(30):
+            track._put_frame(self.create_frame(i * 3000))
+        for i in range(0, 30, 2):
+            self.assertEqual((await track.recv()).pts, i * 3000)
+        self.assertEqual(track.frames_dropped, 15)
+
+        # after a gap sampling restarts from the next frame
+        track._put_frame(self.create_frame(200000))
+        track._put_frame(self.create_frame(203000))
+        track._put_frame(self.create_frame(206000))
+        self.assertEqual((await track.recv()).pts, 200000)
+        self.assertEqual((await track.recv()).pts, 206000)
+        self.assertEqual(track.frames_dropped, 16)
+
+    @asynctest
+    async def test_current_frame(self) -> None:
+        track = RemoteStreamTrack(kind="video", track_buffer_size=2)
+        for i in range(5):
+            track._put_frame(self.create_frame(i * 3000))
+
+        # reading the current frame switches to the bounded mode
+        self.assertEqual((await track.current_frame()).pts, 9000)
+        self.assertEqual(track.mode, "bounded")
+        self.assertEqual((await track.current_frame()).pts, 12000)
+        self.assertEqual(track.frames_dropped, 3)
+
+        # the end of the track is reported
+        track._queue.close()
+        with self.assertRaises(MediaStreamError):
+            await track.current_frame()
+        self.assertEqual(track.readyState, "ended")
+
+    @asynctest
+    async def test_output(self) -> None:
+        track = RemoteStreamTrack(
+            kind="video", format="rgb24", width=16, height=8, ndarray=True
+        )
+        track._put_frame(self.create_frame(3000))
+        track._put_frame(self.create_frame(6000))
+
+        frame = self.ensureIsInstance(await track.recv(), av.VideoFrame)
+        self.assertEqual(frame.format.name, "rgb24")
+        self.assertEqual((frame.width, frame.height), (16, 8))
+        self.assertEqual(frame.pts, 3000)
+        self.assertIsNone(frame.opaque)
+
+        # arrays queued before conversion is turned off are still returned
+        track._put_frame(self.create_frame(9000))
+        track.set_output()
+        array = await track.recv_ndarray()
+        self.assertEqual(array.shape, (8, 16, 3))
+        array = await track.recv_ndarray()
+        self.assertEqual(array.shape, (8, 16, 3))
+
+        # conversion is turned off
+        track._put_frame(self.create_frame(12000))
+        frame = self.ensureIsInstance(await track.recv(), av.VideoFrame)
+        self.assertEqual(frame.format.name, "yuv420p")
+        self.assertEqual((frame.width, frame.height), (32, 32))
+
+    def test_output_invalid(self) -> None:
+        with self.assertRaises(ValueError) as cm:
+            RemoteStreamTrack(kind="audio", format="rgb24")
+        self.assertEqual(
+            str(cm.exception), "Frame conversion is only available for decoded video"
+        )
+
+        with self.assertRaises(ValueError) as cm:
+            RemoteStreamTrack(kind="video", decode=False, ndarray=True)
+        self.assertEqual(
+            str(cm.exception), "Frame conversion is only available for decoded video"
+        )
+
+
 class RTCRtpReceiverTest(CodecTestCase):
     def test_capabilities(self) -> None:
         # audio
@@ -299,6 +490,15 @@ class RTCRtpReceiverTest(CodecTestCase):
                 RTCRtpHeaderExtensionCapability(
                     uri="http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time"
                 ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01"
+                ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+                ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id"
+                ),
             ],
         )
 
@@ -379,6 +579,14 @@ class RTCRtpReceiverTest(CodecTestCase):
             self.assertEqual(frame.sample_rate, 8000)
             self.assertEqual(frame.time_base, fractions.Fraction(1, 8000))
 
+            # check decoding stats
+            report = await receiver.getStats()
+            inbound_rtp = report["inbound-rtp_" + str(id(receiver))]
+            self.assertGreaterEqual(inbound_rtp.framesDecoded, 2)
+            self.assertGreater(inbound_rtp.totalDecodeTime, 0)
+            self.assertGreaterEqual(inbound_rtp.decoderQueueDepth, 0)
+            self.assertEqual(inbound_rtp.framesDropped, 0)
+
             # shutdown
             await receiver.stop()
 
@@ -392,6 +600,70 @@ class RTCRtpReceiverTest(CodecTestCase):
             with self.assertRaises(MediaStreamError):
                 await receiver.track.recv()
 
+    @asynctest
+    async def test_rtp_video_encoded(self) -> None:
+        """
+        Receive encoded frames, without decoding them.
+        """
+        async with create_receiver("video") as receiver:
+            receiver._track = RemoteStreamTrack(kind="video", decode=False)
+
+            with patch(
+                "vsaiortc.decoderscheduler.get_decoder",
+                side_effect=AssertionError("decoder created"),
+            ):
+                await receiver.receive(RTCRtpReceiveParameters(codecs=[VP8_CODEC]))
+
+                # receive RTP
+                packets = create_rtp_video_packets(self, codec=VP8_CODEC, frames=3)
+                for packet in packets:
+                    await receiver._handle_rtp_packet(packet, arrival_time_ms=0)
+
+                # check remote track
+                for i in range(3):
+                    encoded = self.ensureIsInstance(
+                        await receiver.track.recv(), av.Packet
+                    )
+                    self.assertEqual(
+                        encoded.pts, packets[i].timestamp - packets[0].timestamp
+                    )
+                    self.assertEqual(encoded.time_base, fractions.Fraction(1, 90000))
+                    self.assertEqual(encoded.is_keyframe, i == 0)
+                    self.assertEqual(encoded.opaque, VP8_CODEC)
+
+                # nothing was decoded
+                report = await receiver.getStats()
+                inbound_rtp = report["inbound-rtp_" + str(id(receiver))]
+                self.assertEqual(inbound_rtp.framesDecoded, 0)
+
+                # shutdown
+                await receiver.stop()
+                with self.assertRaises(MediaStreamError):
+                    await receiver.track.recv()
+                self.assertEqual(receiver.track.readyState, "ended")
+
+    @asynctest
+    async def test_rtp_video_converted(self) -> None:
+        """
+        Receive video frames converted in the decoder thread.
+        """
+        async with create_receiver("video") as receiver:
+            track = RemoteStreamTrack(
+                kind="video", format="rgb24", width=320, height=240, ndarray=True
+            )
+            receiver._track = track
+
+            await receiver.receive(RTCRtpReceiveParameters(codecs=[VP8_CODEC]))
+
+            # receive RTP
+            for packet in create_rtp_video_packets(self, codec=VP8_CODEC, frames=3):
+                await receiver._handle_rtp_packet(packet, arrival_time_ms=0)
+
+            # check remote track
+            for i in range(3):
+                array = await track.recv_ndarray()
+                self.assertEqual(array.shape, (240, 320, 3))
+
     @asynctest
     async def test_rtp_missing_video_packet(self) -> None:
         nacks = []
@@ -411,19 +683,51 @@ class RTCRtpReceiverTest(CodecTestCase):
             await receiver.receive(RTCRtpReceiveParameters(codecs=[VP8_CODEC]))
 
             # generate some packets
-            packets = create_rtp_video_packets(self, codec=VP8_CODEC, frames=129)
+            packets = create_rtp_video_packets(self, codec=VP8_CODEC, frames=130)
 
-            # receive RTP with a with a gap
+            # receive RTP with a with a gap, the first frame is complete so
+            # the gap needs to exceed the jitter buffer's capacity
             await receiver._handle_rtp_packet(packets[0], arrival_time_ms=0)
-            await receiver._handle_rtp_packet(packets[128], arrival_time_ms=0)
+            await receiver._handle_rtp_packet(packets[129], arrival_time_ms=0)
 
             # check NACK was triggered
-            lost_packets = list(range(1, 128))
+            lost_packets = list(range(1, 129))
             self.assertEqual(nacks[0], (1234, lost_packets))
 
             # check PLI was triggered
             self.assertEqual(pli, [1234])
 
+    @asynctest
+    async def test_rtp_missing_video_packet_stalled(self) -> None:
+        nacks = []
+        pli = []
+
+        async def mock_send_rtcp_nack(media_ssrc: int, lost: list[int]) -> None:
+            nacks.append((media_ssrc, lost))
+
+        async def mock_send_rtcp_pli(media_ssrc: int) -> None:
+            pli.append(media_ssrc)
+
+        async with create_receiver("video") as receiver:
+            receiver._send_rtcp_nack = mock_send_rtcp_nack  # type: ignore
+            receiver._send_rtcp_pli = mock_send_rtcp_pli  # type: ignore
+            receiver._track = RemoteStreamTrack(kind="video")
+
+            await receiver.receive(RTCRtpReceiveParameters(codecs=[VP8_CODEC]))
+
+            # receive RTP with a gap, then nothing
+            packets = create_rtp_video_packets(self, codec=VP8_CODEC, frames=3)
+            with patch("vsaiortc.rtcrtpreceiver.NACK_DEFAULT_RTT", 0.02):
+                await receiver._handle_rtp_packet(packets[0], arrival_time_ms=0)
+                await receiver._handle_rtp_packet(packets[2], arrival_time_ms=0)
+                self.assertEqual(nacks, [(1234, [1])])
+                self.assertEqual(pli, [])
+
+                # the packet is requested again, then given up on
+                await asyncio.sleep(1.0)
+            self.assertEqual(nacks, [(1234, [1])] * NACK_MAX_RETRIES)
+            self.assertEqual(pli, [1234])
+
     @asynctest
     async def test_rtp_empty_video_packet(self) -> None:
         async with create_receiver("video") as receiver:
@@ -547,6 +851,38 @@ class RTCRtpReceiverTest(CodecTestCase):
             # send RTCP feedback NACK
             await receiver._send_rtcp_nack(5678, [7654])
 
+    @asynctest
+    async def test_rtt_from_sender_report(self) -> None:
+        async with create_receiver("video") as receiver:
+            receiver._set_rtcp_ssrc(1234)
+            receiver._track = RemoteStreamTrack(kind="video")
+
+            await receiver.receive(RTCRtpReceiveParameters(codecs=[VP8_CODEC]))
+
+            # our sender report was sent 300ms ago, and held for 200ms
+            now = (clock.current_ntp_time() >> 16) & 0xFFFFFFFF
+            await receiver._handle_rtcp_packet(
+                RtcpSrPacket(
+                    ssrc=5678,
+                    sender_info=RtcpSenderInfo(
+                        ntp_timestamp=0, rtp_timestamp=0, packet_count=0, octet_count=0
+                    ),
+                    reports=[
+                        RtcpReceiverInfo(
+                            ssrc=1234,
+                            fraction_lost=0,
+                            packets_lost=0,
+                            highest_sequence=0,
+                            jitter=0,
+                            lsr=now - int(0.3 * 65536),
+                            dlsr=int(0.2 * 65536),
+                        )
+                    ],
+                )
+            )
+            generator = receiver._RTCRtpReceiver__nack_generator  # type: ignore
+            self.assertAlmostEqual(generator.rtt, 0.1, delta=0.05)
+
     @asynctest
     async def test_send_rtcp_pli(self) -> None:
         async with create_receiver("video") as receiver:
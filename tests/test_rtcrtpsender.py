@@ -1,10 +1,11 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from struct import pack
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 from tests.test_mediastreams import VideoPacketStreamTrack
-from vsaiortc import MediaStreamTrack
+from vsaiortc import MediaStreamTrack, rtp
 from vsaiortc.codecs import PCMU_CODEC
 from vsaiortc.exceptions import InvalidStateError
 from vsaiortc.mediastreams import AudioStreamTrack, VideoStreamTrack
@@ -12,7 +13,9 @@ from vsaiortc.rtcrtpparameters import (
     RTCRtpCapabilities,
     RTCRtpCodecCapability,
     RTCRtpCodecParameters,
+    RTCRtpEncodingParameters,
     RTCRtpHeaderExtensionCapability,
+    RTCRtpHeaderExtensionParameters,
     RTCRtpSendParameters,
 )
 from vsaiortc.rtcrtpsender import RTCRtpSender
@@ -32,6 +35,9 @@ from vsaiortc.stats import RTCStatsReport
 
 from .utils import ClosedDtlsTransport, asynctest, dummy_dtls_transport_pair
 
+OPUS_CODEC = RTCRtpCodecParameters(
+    mimeType="audio/opus", clockRate=48000, channels=2, payloadType=96
+)
 VP8_CODEC = RTCRtpCodecParameters(
     mimeType="video/VP8", clockRate=90000, payloadType=100
 )
@@ -40,6 +46,15 @@ H264_CODEC = RTCRtpCodecParameters(
     mimeType="video/H264", clockRate=90000, payloadType=98
 )
 
+RID_HEADER_EXTENSIONS = [
+    RTCRtpHeaderExtensionParameters(
+        id=5, uri="urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+    ),
+    RTCRtpHeaderExtensionParameters(
+        id=6, uri="urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id"
+    ),
+]
+
 
 class BuggyStreamTrack(MediaStreamTrack):
     kind = "audio"
@@ -119,6 +134,15 @@ class RTCRtpSenderTest(TestCase):
                 RTCRtpHeaderExtensionCapability(
                     uri="http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time"
                 ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01"
+                ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+                ),
+                RTCRtpHeaderExtensionCapability(
+                    uri="urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id"
+                ),
             ],
         )
 
@@ -138,6 +162,62 @@ class RTCRtpSenderTest(TestCase):
         with self.assertRaises(InvalidStateError):
             RTCRtpSender("audio", dtlsTransport)  # type: ignore
 
+    @asynctest
+    async def test_construct_invalid_encode_queue_size(self) -> None:
+        async with dummy_dtls_transport_pair() as (local_transport, _):
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender("video", local_transport, encodeQueueSize=0)
+            self.assertEqual(str(cm.exception), "encodeQueueSize must be at least 1")
+
+    @asynctest
+    async def test_construct_invalid_send_encodings(self) -> None:
+        async with dummy_dtls_transport_pair() as (local_transport, _):
+            # simulcast is for video only
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender(
+                    "audio",
+                    local_transport,
+                    sendEncodings=[
+                        RTCRtpEncodingParameters(rid="a"),
+                        RTCRtpEncodingParameters(rid="b"),
+                    ],
+                )
+            self.assertEqual(str(cm.exception), "Simulcast is only supported for video")
+
+            # RIDs must be distinct
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender(
+                    "video",
+                    local_transport,
+                    sendEncodings=[
+                        RTCRtpEncodingParameters(rid="a"),
+                        RTCRtpEncodingParameters(rid="a"),
+                    ],
+                )
+            self.assertEqual(
+                str(cm.exception), "Simulcast encodings must have distinct RIDs"
+            )
+
+            # RIDs must be valid
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender(
+                    "video",
+                    local_transport,
+                    sendEncodings=[RTCRtpEncodingParameters(rid="a b")],
+                )
+            self.assertEqual(str(cm.exception), 'Invalid RID "a b"')
+
+            # layers cannot be scaled up
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender(
+                    "video",
+                    local_transport,
+                    sendEncodings=[RTCRtpEncodingParameters(scaleResolutionDownBy=0.5)],
+                )
+            self.assertEqual(
+                str(cm.exception), "scaleResolutionDownBy must be at least 1.0"
+            )
+
     @asynctest
     async def test_connection_error(self) -> None:
         """
@@ -248,6 +328,41 @@ class RTCRtpSenderTest(TestCase):
             # clean shutdown
             await sender.stop()
 
+    @asynctest
+    async def test_handle_rtcp_rr_packet_loss(self) -> None:
+        """
+        The packet loss reported by the receiver is passed to the encoder.
+        """
+        async with dummy_dtls_transport_pair() as (local_transport, _):
+            sender = RTCRtpSender(AudioStreamTrack(), local_transport)
+            await sender.send(RTCRtpSendParameters(codecs=[OPUS_CODEC]))
+
+            # wait for the encoder to be created
+            layer = sender._RTCRtpSender__layers[0]  # type: ignore
+            while layer.encoder is None:
+                await asyncio.sleep(0.01)
+
+            # receive RTCP RR
+            packet = RtcpRrPacket(
+                ssrc=1234,
+                reports=[
+                    RtcpReceiverInfo(
+                        ssrc=sender._ssrc,
+                        fraction_lost=64,
+                        packets_lost=10,
+                        highest_sequence=630,
+                        jitter=1906,
+                        lsr=0,
+                        dlsr=0,
+                    )
+                ],
+            )
+            await sender._handle_rtcp_packet(packet)
+            self.assertEqual(layer.encoder.packet_loss, 25)
+
+            # clean shutdown
+            await sender.stop()
+
     @patch("aiortc.rtcrtpsender.logger.isEnabledFor")
     @asynctest
     async def test_log_debug(self, mock_is_enabled_for: MagicMock) -> None:
@@ -267,12 +382,13 @@ class RTCRtpSenderTest(TestCase):
         """
         queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
 
-        async def mock_send_rtp(data: bytes) -> None:
-            if not is_rtcp(data):
-                await queue.put(RtpPacket.parse(data))
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
 
         async with dummy_dtls_transport_pair() as (local_transport, _):
-            local_transport._send_rtp = mock_send_rtp  # type: ignore
+            local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
 
             sender = RTCRtpSender(VideoStreamTrack(), local_transport)
             self.assertEqual(sender.kind, "video")
@@ -299,6 +415,42 @@ class RTCRtpSenderTest(TestCase):
             await asyncio.sleep(0.1)
             await sender.stop()
 
+    @asynctest
+    async def test_encode_executor(self) -> None:
+        queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
+
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            async with dummy_dtls_transport_pair() as (local_transport, _):
+                local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
+
+                sender = RTCRtpSender(
+                    VideoStreamTrack(),
+                    local_transport,
+                    encodeExecutor=executor,
+                    encodeQueueSize=2,
+                )
+                await sender.send(RTCRtpSendParameters(codecs=[VP8_CODEC]))
+
+                # wait for one packet to be transmitted
+                await queue.get()
+
+                # check stats
+                report = await sender.getStats()
+                outbound_rtp = report["outbound-rtp_" + str(id(sender))]
+                self.assertGreater(outbound_rtp.framesEncoded, 0)
+                self.assertGreater(outbound_rtp.totalEncodeTime, 0)
+
+                # clean shutdown
+                await sender.stop()
+
+            # the executor was not shut down by the sender
+            self.assertEqual(executor.submit(lambda: 42).result(), 42)
+
     @asynctest
     async def test_retransmit(self) -> None:
         """
@@ -306,12 +458,13 @@ class RTCRtpSenderTest(TestCase):
         """
         queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
 
-        async def mock_send_rtp(data: bytes) -> None:
-            if not is_rtcp(data):
-                await queue.put(RtpPacket.parse(data))
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
 
         async with dummy_dtls_transport_pair() as (local_transport, _):
-            local_transport._send_rtp = mock_send_rtp  # type: ignore
+            local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
 
             sender = RTCRtpSender(VideoStreamTrack(), local_transport)
             sender._ssrc = 1234
@@ -345,12 +498,13 @@ class RTCRtpSenderTest(TestCase):
         """
         queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
 
-        async def mock_send_rtp(data: bytes) -> None:
-            if not is_rtcp(data):
-                await queue.put(RtpPacket.parse(data))
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
 
         async with dummy_dtls_transport_pair() as (local_transport, _):
-            local_transport._send_rtp = mock_send_rtp  # type: ignore
+            local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
 
             sender = RTCRtpSender(VideoStreamTrack(), local_transport)
             sender._ssrc = 1234
@@ -390,6 +544,135 @@ class RTCRtpSenderTest(TestCase):
             self.assertEqual(found_rtx.payload_type, 101)
             self.assertEqual(found_rtx.ssrc, 2345)
             self.assertEqual(found_rtx.payload[0:2], pack("!H", packet.sequence_number))
+            self.assertEqual(found_rtx.payload[2:], packet.payload)
+
+            # check stats
+            report = await sender.getStats()
+            outbound_rtp = report["outbound-rtp_" + str(id(sender))]
+            self.assertEqual(outbound_rtp.rtpHistoryHits, 1)
+            self.assertEqual(outbound_rtp.rtpHistoryMisses, 0)
+
+    @asynctest
+    async def test_simulcast(self) -> None:
+        """
+        Send two simulcast layers, and ask for a retransmission on the second.
+        """
+        queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
+
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data, extensions_map))
+
+        async with dummy_dtls_transport_pair() as (local_transport, _):
+            local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
+
+            sender = RTCRtpSender(
+                VideoStreamTrack(),
+                local_transport,
+                sendEncodings=[
+                    RTCRtpEncodingParameters(rid="h"),
+                    RTCRtpEncodingParameters(rid="q", scaleResolutionDownBy=2.0),
+                ],
+            )
+            encodings = sender._encodings
+            self.assertEqual(len(encodings), 2)
+            self.assertNotEqual(encodings[0].ssrc, encodings[1].ssrc)
+            self.assertNotEqual(encodings[0].rtx.ssrc, encodings[1].rtx.ssrc)
+            self.assertEqual(sender._ssrc, encodings[0].ssrc)
+
+            parameters = RTCRtpSendParameters(
+                codecs=[
+                    VP8_CODEC,
+                    RTCRtpCodecParameters(
+                        mimeType="video/rtx",
+                        clockRate=90000,
+                        payloadType=101,
+                        parameters={"apt": 100},
+                    ),
+                ],
+                encodings=encodings,
+                headerExtensions=RID_HEADER_EXTENSIONS,
+            )
+            extensions_map = rtp.HeaderExtensionsMap()
+            extensions_map.configure(parameters)
+            await sender.send(parameters)
+
+            # wait for both layers to be transmitted
+            packets: dict[int, RtpPacket] = {}
+            while len(packets) < 2:
+                packet = await queue.get()
+                packets.setdefault(packet.ssrc, packet)
+            self.assertEqual(packets[encodings[0].ssrc].extensions.rtp_stream_id, "h")
+            self.assertEqual(packets[encodings[1].ssrc].extensions.rtp_stream_id, "q")
+
+            # ask to retransmit a packet of the second layer
+            packet = packets[encodings[1].ssrc]
+            await sender._retransmit(packet.sequence_number, ssrc=packet.ssrc)
+            await asyncio.sleep(0.1)
+
+            # check stats
+            report = await sender.getStats()
+            outbound_rtp = report["outbound-rtp_" + str(id(sender))]
+            self.assertEqual(outbound_rtp.rid, "h")
+            self.assertEqual(outbound_rtp.ssrc, encodings[0].ssrc)
+            outbound_rtp = report["outbound-rtp_" + str(id(sender)) + "_q"]
+            self.assertEqual(outbound_rtp.rid, "q")
+            self.assertEqual(outbound_rtp.ssrc, encodings[1].ssrc)
+            self.assertGreater(outbound_rtp.framesEncoded, 0)
+
+            await sender.stop()
+
+            # check packet was retransmitted with the repaired RID
+            found_rtx = None
+            while not queue.empty():
+                queue_packet = queue.get_nowait()
+                if queue_packet.payload_type == 101:
+                    found_rtx = queue_packet
+                    break
+            self.assertIsNotNone(found_rtx)
+            self.assertEqual(found_rtx.ssrc, encodings[1].rtx.ssrc)
+            self.assertEqual(found_rtx.extensions.repaired_rtp_stream_id, "q")
+            self.assertEqual(found_rtx.payload[0:2], pack("!H", packet.sequence_number))
+
+    @asynctest
+    async def test_simulcast_not_negotiated(self) -> None:
+        """
+        Only send the first layer if the remote party does not want simulcast.
+        """
+        queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
+
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
+
+        async with dummy_dtls_transport_pair() as (local_transport, _):
+            local_transport._send_rtp_batch = mock_send_rtp_batch  # type: ignore
+
+            sender = RTCRtpSender(
+                VideoStreamTrack(),
+                local_transport,
+                sendEncodings=[
+                    RTCRtpEncodingParameters(rid="h"),
+                    RTCRtpEncodingParameters(rid="q", scaleResolutionDownBy=2.0),
+                ],
+            )
+            await sender.send(
+                RTCRtpSendParameters(
+                    codecs=[VP8_CODEC], encodings=sender._encodings[:1]
+                )
+            )
+
+            # wait for some packets, then shutdown
+            await queue.get()
+            await asyncio.sleep(0.1)
+            await sender.stop()
+
+            ssrcs = set()
+            while not queue.empty():
+                ssrcs.add(queue.get_nowait().ssrc)
+            self.assertEqual(ssrcs, {sender._ssrc})
 
     @asynctest
     async def test_disabled(self) -> None:
@@ -34,6 +34,7 @@ from vsaiortc.rtcsctptransport import (
     StreamResetResponseParam,
     parse_packet,
     serialize_packet,
+    serialize_packets,
     tsn_minus_one,
     tsn_plus_one,
 )
@@ -308,6 +309,33 @@ class SctpPacketTest(TestCase):
         self.assertEqual(chunk.flags, 0)
         self.assertEqual(chunk.cumulative_tsn, 2696426712)
 
+    def test_serialize_packets(self) -> None:
+        chunks: list[Chunk] = []
+        for tsn in range(3):
+            chunk = DataChunk(flags=SCTP_DATA_FIRST_FRAG | SCTP_DATA_LAST_FRAG)
+            chunk.tsn = tsn
+            chunk.user_data = b"ping"
+            chunks.append(chunk)
+        big = DataChunk(flags=SCTP_DATA_FIRST_FRAG | SCTP_DATA_LAST_FRAG)
+        big.tsn = 3
+        big.user_data = b"M" * 100
+        chunks.append(big)
+
+        # all chunks fit in a single packet
+        packets = serialize_packets(5000, 5000, 1234, chunks)
+        self.assertEqual(len(packets), 1)
+        self.assertEqual(packets[0], serialize_packet(5000, 5000, 1234, *chunks))
+        _, _, verification_tag, parsed = parse_packet(packets[0])
+        self.assertEqual(verification_tag, 1234)
+        self.assertEqual([cast(DataChunk, c).tsn for c in parsed], [0, 1, 2, 3])
+
+        # two small chunks per packet, the large chunk is alone
+        packets = serialize_packets(5000, 5000, 1234, chunks, max_length=60)
+        self.assertEqual(
+            [len(parse_packet(packet)[3]) for packet in packets], [2, 1, 1]
+        )
+        self.assertEqual(len(packets[2]), 128)
+
 
 class ChunkFactory:
     def __init__(self, tsn: int = 1) -> None:
@@ -1717,6 +1745,94 @@ class RTCSctpTransportTest(TestCase):
             self.assertEqual(queued_tsns(client), [])
             self.assertEqual(client._outbound_stream_seq, {123: 1})
 
+    @asynctest
+    async def test_send_data_bundled(self) -> None:
+        packets: list[bytes] = []
+
+        async def mock_send_data(data: bytes) -> None:
+            packets.append(data)
+
+        async with client_standalone() as client:
+            client._last_received_tsn = 123
+            client._local_tsn = 0
+            client._remote_port = 5000
+            client.transport._send_data = mock_send_data  # type: ignore
+
+            async def send_messages_and_sack() -> None:
+                for i in range(10):
+                    await client._send(123, 456, b"ping")
+                await client._send_sack()
+
+            # small messages and a SACK share a packet
+            await client._bundle(send_messages_and_sack())
+            self.assertEqual(outstanding_tsns(client), list(range(10)))
+            self.assertEqual(len(packets), 1)
+            _, _, _, chunks = parse_packet(packets[0])
+            self.assertEqual(len(chunks), 11)
+            self.assertIsInstance(chunks[0], SackChunk)
+            self.assertEqual(
+                [cast(DataChunk, c).tsn for c in chunks[1:]], list(range(10))
+            )
+
+            # full-sized chunks are sent in separate packets
+            packets.clear()
+            await client._send(123, 456, b"M" * 2 * USERDATA_MAX_LENGTH)
+            self.assertEqual(len(packets), 2)
+
+    @asynctest
+    async def test_send_data_bundled_error(self) -> None:
+        packets: list[bytes] = []
+
+        async def mock_send_data(data: bytes) -> None:
+            packets.append(data)
+
+        async with client_standalone() as client:
+            client._last_received_tsn = 123
+            client._remote_port = 5000
+            client.transport._send_data = mock_send_data  # type: ignore
+
+            async def send_sack_and_fail() -> None:
+                await client._send_sack()
+                raise ValueError("bad")
+
+            # the held back chunks are dropped
+            with self.assertRaises(ValueError):
+                await client._bundle(send_sack_and_fail())
+            self.assertEqual(client._bundles, {})
+            self.assertEqual(packets, [])
+
+            # the next chunks are sent right away
+            await client._send_sack()
+            self.assertEqual(len(packets), 1)
+
+    @asynctest
+    async def test_send_data_bundled_other_task(self) -> None:
+        packets: list[bytes] = []
+
+        async def mock_send_data(data: bytes) -> None:
+            packets.append(data)
+
+        async with client_standalone() as client:
+            client._last_received_tsn = 123
+            client._remote_port = 5000
+            client.transport._send_data = mock_send_data  # type: ignore
+
+            async def send_sack_and_wait() -> None:
+                await client._send_sack()
+                await asyncio.sleep(0.1)
+
+            # a chunk sent by another task, as on a timer expiry, is not
+            # held back by the bundle
+            bundle = asyncio.ensure_future(client._bundle(send_sack_and_wait()))
+            await asyncio.sleep(0)
+            await asyncio.ensure_future(client._send_chunk(ShutdownAckChunk()))
+            self.assertEqual(len(packets), 1)
+            _, _, _, chunks = parse_packet(packets[0])
+            self.assertIsInstance(chunks[0], ShutdownAckChunk)
+
+            await bundle
+            self.assertEqual(len(packets), 2)
+
     @asynctest
     async def test_send_data_unordered(self) -> None:
         async with client_standalone() as client:
@@ -2,6 +2,8 @@ import fractions
 import math
 import sys
 from collections.abc import Callable
+from typing import Optional
+from unittest.mock import patch
 
 from av import AudioFrame
 
@@ -15,7 +17,9 @@ from vsaiortc.rtp import (
     RtcpRtpfbPacket,
     RtcpSdesPacket,
     RtcpSrPacket,
+    RtcpTransportFeedbackPacket,
     RtpPacket,
+    RtpPacketHistory,
     clamp_packets_lost,
     pack_header_extensions,
     pack_packets_lost,
@@ -25,6 +29,7 @@ from vsaiortc.rtp import (
     unpack_remb_fci,
     unwrap_rtx,
     wrap_rtx,
+    wrap_rtx_data,
 )
 
 from .utils import TestCase, load
@@ -50,6 +55,10 @@ def create_audio_frame(
     return frame
 
 
+def pack_sample(sample: int) -> bytes:
+    return int.to_bytes(sample, 2, sys.byteorder, signed=True)
+
+
 class RtcpPacketTest(TestCase):
     def test_bye(self) -> None:
         data = load("rtcp_bye.bin")
@@ -226,6 +235,17 @@ class RtcpPacketTest(TestCase):
         )
         self.assertEqual(bytes(packet), data)
 
+    def test_rtpfb_wrap(self) -> None:
+        packet = RtcpRtpfbPacket(
+            fmt=1, ssrc=1234, media_ssrc=5678, lost=[65534, 65535, 0, 3, 40]
+        )
+        data = bytes(packet)
+        self.assertEqual(len(data), 20)
+
+        packets = RtcpPacket.parse(data)
+        packet = self.ensureIsInstance(packets[0], RtcpRtpfbPacket)
+        self.assertEqual(packet.lost, [65534, 65535, 0, 3, 40])
+
     def test_rtpfb_invalid(self) -> None:
         data = load("rtcp_rtpfb_invalid.bin")
 
@@ -233,6 +253,44 @@ class RtcpPacketTest(TestCase):
             RtcpPacket.parse(data)
         self.assertEqual(str(cm.exception), "RTCP RTP feedback length is invalid")
 
+    def test_transport_feedback(self) -> None:
+        data = bytes.fromhex("8fcd000600000001000000020005000412345607d24004012c080000")
+        packets = RtcpPacket.parse(data)
+        self.assertEqual(len(packets), 1)
+
+        packet = self.ensureIsInstance(packets[0], RtcpTransportFeedbackPacket)
+        self.assertEqual(packet.ssrc, 1)
+        self.assertEqual(packet.media_ssrc, 2)
+        self.assertEqual(packet.base_sequence_number, 5)
+        self.assertEqual(packet.reference_time, 0x123456)
+        self.assertEqual(packet.feedback_packet_count, 7)
+        self.assertEqual(packet.deltas, [4, None, 300, 8])
+        self.assertEqual(bytes(packet), data)
+
+    def test_transport_feedback_chunks(self) -> None:
+        deltas: list[Optional[int]] = (
+            [4] * 20 + [None] * 3 + [1, 2] * 5 + [-4, None] * 4 + [1000] * 8
+        )
+        packet = RtcpTransportFeedbackPacket(
+            ssrc=1,
+            media_ssrc=2,
+            base_sequence_number=65530,
+            reference_time=1,
+            feedback_packet_count=255,
+            deltas=deltas,
+        )
+        data = bytes(packet)
+        self.assertEqual(len(data) % 4, 0)
+
+        packets = RtcpPacket.parse(data)
+        self.assertEqual(packets, [packet])
+
+    def test_transport_feedback_truncated(self) -> None:
+        data = bytes.fromhex("8fcd000500000001000000020005000412345607d2400401")
+        with self.assertRaises(ValueError) as cm:
+            RtcpPacket.parse(data)
+        self.assertEqual(str(cm.exception), "RTCP transport feedback is truncated")
+
     def test_compound(self) -> None:
         data = load("rtcp_sr.bin") + load("rtcp_sdes.bin")
 
@@ -386,6 +444,46 @@ class RtpPacketTest(TestCase):
         self.assertEqual(len(packet.payload), 54)
         self.assertEqual(packet.serialize(extensions_map), data)
 
+    def test_with_sdes_mid_lazy(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=9, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                    )
+                ]
+            )
+        )
+
+        data = load("rtp_with_sdes_mid.bin")
+        packet = RtpPacket.parse(data, extensions_map)
+        self.assertIsNone(packet._extensions)
+        self.assertIsInstance(packet.payload, memoryview)
+        self.assertEqual(packet.payload, data[-54:])
+
+        # extensions are decoded on first access
+        self.assertEqual(packet.extensions, rtp.HeaderExtensions(mid="0"))
+        self.assertIs(packet.extensions, packet._extensions)
+
+    def test_with_sdes_mid_invalid_extension(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=9, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                    )
+                ]
+            )
+        )
+
+        # announce a one-byte extension which is longer than the extension block
+        data = bytearray(load("rtp_with_sdes_mid.bin"))
+        data[16] = 0x9F
+        packet = RtpPacket.parse(bytes(data), extensions_map)
+        self.assertEqual(packet.extensions, rtp.HeaderExtensions())
+
     def test_with_sdes_mid_truncated(self) -> None:
         data = load("rtp_with_sdes_mid.bin")
 
@@ -654,6 +752,138 @@ class RtpUtilTest(TestCase):
         # TODO: check
         packet.serialize(extensions_map)
 
+    def test_header_template(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=1, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                    ),
+                    RTCRtpHeaderExtensionParameters(
+                        id=2, uri="urn:ietf:params:rtp-hdrext:ssrc-audio-level"
+                    ),
+                    RTCRtpHeaderExtensionParameters(
+                        id=3,
+                        uri="http://www.webrtc.org/experiments/rtp-hdrext/abs-send-time",
+                    ),
+                ]
+            )
+        )
+        template = rtp.RtpHeaderTemplate(
+            extensions_map,
+            payload_type=96,
+            ssrc=0x12345678,
+            extensions=rtp.HeaderExtensions(mid="audio"),
+        )
+
+        for marker, audio_level in [(0, None), (1, (False, 42)), (0, (True, 3))]:
+            packet = RtpPacket(
+                payload_type=96,
+                marker=marker,
+                sequence_number=0xABCD,
+                timestamp=0x89ABCDEF,
+                ssrc=0x12345678,
+                payload=b"\x01\x02\x03",
+            )
+            packet.extensions.abs_send_time = 0x123456
+            packet.extensions.audio_level = audio_level
+            packet.extensions.mid = "audio"
+
+            self.assertEqual(
+                template.serialize(
+                    sequence_number=0xABCD,
+                    timestamp=0x89ABCDEF,
+                    marker=marker,
+                    payload=b"\x01\x02\x03",
+                    abs_send_time=0x123456,
+                    audio_level=audio_level,
+                ),
+                packet.serialize(extensions_map),
+            )
+
+        # offsets of the extension values
+        extension_profile, extension_value = extensions_map.set(
+            rtp.HeaderExtensions(mid="audio", abs_send_time=0, audio_level=(False, 0))
+        )
+        self.assertEqual(
+            extensions_map.offsets(extension_profile, extension_value),
+            rtp.HeaderExtensionOffsets(abs_send_time=7, audio_level=11, mid=1),
+        )
+        self.assertEqual(
+            extensions_map.offsets(extension_profile, extension_value, base=16),
+            rtp.HeaderExtensionOffsets(abs_send_time=23, audio_level=27, mid=17),
+        )
+
+    def test_header_template_transport_sequence_number(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=4,
+                        uri="http://www.ietf.org/id/draft-holmer-rmcat-transport-wide-cc-extensions-01",
+                    ),
+                ]
+            )
+        )
+        template = rtp.RtpHeaderTemplate(
+            extensions_map,
+            payload_type=96,
+            ssrc=1234,
+            extensions=rtp.HeaderExtensions(),
+        )
+
+        for transport_sequence_number in [0, 0xCEAB]:
+            data = template.serialize(
+                sequence_number=1,
+                timestamp=2,
+                marker=0,
+                payload=b"\x00",
+                transport_sequence_number=transport_sequence_number,
+            )
+            packet = RtpPacket.parse(data, extensions_map)
+            self.assertEqual(
+                packet.extensions.transport_sequence_number, transport_sequence_number
+            )
+            self.assertEqual(extensions_map.transport_sequence_number_offset(data), 17)
+        self.assertEqual(template.transport_sequence_number_offset(), 17)
+
+        # packets without the extension
+        self.assertIsNone(extensions_map.transport_sequence_number_offset(b""))
+        self.assertIsNone(
+            extensions_map.transport_sequence_number_offset(load("rtp.bin"))
+        )
+        self.assertIsNone(
+            rtp.HeaderExtensionsMap().transport_sequence_number_offset(data)
+        )
+
+    def test_header_template_no_extensions(self) -> None:
+        template = rtp.RtpHeaderTemplate(
+            rtp.HeaderExtensionsMap(),
+            payload_type=0,
+            ssrc=1234,
+            extensions=rtp.HeaderExtensions(mid="0"),
+        )
+        data = template.serialize(
+            sequence_number=1, timestamp=2, marker=1, payload=b"\x00" * 160
+        )
+        packet = RtpPacket.parse(data)
+        self.assertEqual(packet.marker, 1)
+        self.assertEqual(packet.payload_type, 0)
+        self.assertEqual(packet.sequence_number, 1)
+        self.assertEqual(packet.timestamp, 2)
+        self.assertEqual(packet.ssrc, 1234)
+        self.assertEqual(packet.extensions, rtp.HeaderExtensions())
+        self.assertEqual(len(packet.payload), 160)
+        self.assertIsNone(template.transport_sequence_number_offset())
+
+        # a shorter payload does not leak data from the previous packet
+        data = template.serialize(
+            sequence_number=2, timestamp=3, marker=0, payload=b"\x01"
+        )
+        self.assertEqual(len(data), 13)
+
     def test_rtx(self) -> None:
         extensions_map = rtp.HeaderExtensionsMap()
         extensions_map.configure(
@@ -684,6 +914,101 @@ class RtpUtilTest(TestCase):
         self.assertEqual(recovered.extensions, packet.extensions)
         self.assertEqual(recovered.payload, packet.payload)
 
+    def test_rtx_data(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=9, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                    )
+                ]
+            )
+        )
+
+        data = load("rtp_with_sdes_mid.bin")
+        packet = RtpPacket.parse(data, extensions_map)
+
+        # wrap serialized packet, same result as wrapping the parsed packet
+        rtx_data = wrap_rtx_data(
+            data, payload_type=112, sequence_number=12345, ssrc=1234
+        )
+        rtx = RtpPacket.parse(rtx_data, extensions_map)
+        expected = wrap_rtx(packet, payload_type=112, sequence_number=12345, ssrc=1234)
+        self.assertEqual(rtx.marker, expected.marker)
+        self.assertEqual(rtx.payload_type, 112)
+        self.assertEqual(rtx.sequence_number, 12345)
+        self.assertEqual(rtx.timestamp, expected.timestamp)
+        self.assertEqual(rtx.ssrc, 1234)
+        self.assertEqual(rtx.csrc, expected.csrc)
+        self.assertEqual(rtx.extensions, expected.extensions)
+        self.assertEqual(rtx.payload, expected.payload)
+
+        # check roundtrip
+        recovered = unwrap_rtx(rtx, payload_type=111, ssrc=4084547440)
+        self.assertEqual(recovered.sequence_number, packet.sequence_number)
+        self.assertEqual(recovered.payload, packet.payload)
+
+    def test_rtx_data_with_padding(self) -> None:
+        packet = RtpPacket(
+            payload_type=96, sequence_number=1, ssrc=1234, payload=b"\x01\x02"
+        )
+        packet.padding_size = 4
+        rtx = RtpPacket.parse(
+            wrap_rtx_data(
+                packet.serialize(), payload_type=97, sequence_number=2, ssrc=2345
+            )
+        )
+        self.assertEqual(rtx.padding_size, 0)
+        self.assertEqual(rtx.payload, b"\x00\x01\x01\x02")
+
+    def test_rtx_data_with_rtp_stream_id(self) -> None:
+        extensions_map = rtp.HeaderExtensionsMap()
+        extensions_map.configure(
+            RTCRtpParameters(
+                headerExtensions=[
+                    RTCRtpHeaderExtensionParameters(
+                        id=1, uri="urn:ietf:params:rtp-hdrext:sdes:mid"
+                    ),
+                    RTCRtpHeaderExtensionParameters(
+                        id=5, uri="urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id"
+                    ),
+                    RTCRtpHeaderExtensionParameters(
+                        id=6,
+                        uri="urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id",
+                    ),
+                ]
+            )
+        )
+
+        packet = RtpPacket(
+            payload_type=96, sequence_number=1, ssrc=1234, payload=b"\x01\x02"
+        )
+        packet.extensions.mid = "0"
+        packet.extensions.rtp_stream_id = "h"
+        data = packet.serialize(extensions_map)
+
+        rtx = RtpPacket.parse(
+            wrap_rtx_data(
+                data,
+                payload_type=97,
+                sequence_number=2,
+                ssrc=2345,
+                extensions_map=extensions_map,
+            ),
+            extensions_map,
+        )
+        self.assertEqual(
+            rtx.extensions,
+            rtp.HeaderExtensions(mid="0", repaired_rtp_stream_id="h"),
+        )
+        self.assertEqual(rtx.payload, b"\x00\x01\x01\x02")
+
+        # the original packet is left untouched
+        self.assertEqual(
+            RtpPacket.parse(data, extensions_map).extensions.rtp_stream_id, "h"
+        )
+
     def test_compute_audio_level_dbov(self) -> None:
         num_samples = 960  # 20ms @ 48kHz
         # test a frame of all zeroes (-127 dBov, the minimum value)
@@ -699,3 +1024,102 @@ class RtpUtilTest(TestCase):
             lambda n: math.sin(2 * math.pi * n / num_samples), num_samples, 0
         )
         self.assertEqual(rtp.compute_audio_level_dbov(sine_frame), -3)
+
+    def test_compute_audio_level_dbov_stereo(self) -> None:
+        num_samples = 960  # 20ms @ 48kHz
+
+        # packed: left channel is a full scale square wave, right channel is silent
+        frame = AudioFrame(format="s16", layout="stereo", samples=num_samples)
+        frame.planes[0].update(
+            b"".join(
+                pack_sample(32767 if n < num_samples / 2 else -32767) + pack_sample(0)
+                for n in range(num_samples)
+            )
+        )
+        self.assertEqual(rtp.compute_audio_level_dbov(frame), -3)
+
+        # planar: same signal
+        frame = AudioFrame(format="s16p", layout="stereo", samples=num_samples)
+        frame.planes[0].update(
+            b"".join(
+                pack_sample(32767 if n < num_samples / 2 else -32767)
+                for n in range(num_samples)
+            )
+        )
+        frame.planes[1].update(bytes(frame.planes[1].buffer_size))
+        self.assertEqual(rtp.compute_audio_level_dbov(frame), -3)
+
+    def test_compute_audio_level_dbov_without_numpy(self) -> None:
+        num_samples = 960  # 20ms @ 48kHz
+        sine_frame = create_audio_frame(
+            lambda n: math.sin(2 * math.pi * n / num_samples), num_samples, 0
+        )
+        with patch("vsaiortc.rtp.numpy", None):
+            self.assertEqual(rtp.compute_audio_level_dbov(sine_frame), -3)
+
+
+class RtpPacketHistoryTest(TestCase):
+    def test_get(self) -> None:
+        history = RtpPacketHistory(capacity=4)
+        self.assertEqual(len(history), 0)
+        self.assertIsNone(history.get(0))
+
+        history.add(65534, b"a", now_ms=0)
+        history.add(65535, b"bb", now_ms=0)
+        history.add(0, b"ccc", now_ms=0)
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history.size, 6)
+        self.assertEqual(history.get(65534), b"a")
+        self.assertEqual(history.get(65535), b"bb")
+        self.assertEqual(history.get(0), b"ccc")
+        self.assertIsNone(history.get(1))
+        self.assertIsNone(history.get(65533))
+        self.assertEqual(history.hits, 3)
+        self.assertEqual(history.misses, 3)
+
+    def test_capacity(self) -> None:
+        history = RtpPacketHistory(capacity=4)
+        for i in range(10):
+            history.add(i, bytes([i]), now_ms=0)
+        self.assertEqual(len(history), 4)
+        self.assertEqual(history.size, 4)
+        self.assertIsNone(history.get(5))
+        self.assertEqual(
+            [history.get(i) for i in range(6, 10)], [b"\x06", b"\x07", b"\x08", b"\x09"]
+        )
+
+    def test_max_age(self) -> None:
+        history = RtpPacketHistory(max_age_ms=100)
+        history.add(1, b"a", now_ms=0)
+        history.add(2, b"b", now_ms=50)
+        history.add(3, b"c", now_ms=120)
+        self.assertIsNone(history.get(1))
+        self.assertEqual(history.get(2), b"b")
+
+        # the newest packet is always kept
+        history.add(4, b"d", now_ms=1000)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history.get(4), b"d")
+
+    def test_max_bytes(self) -> None:
+        history = RtpPacketHistory(max_bytes=2500)
+        for i in range(5):
+            history.add(i, bytes(1000), now_ms=0)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history.size, 2000)
+        self.assertIsNone(history.get(2))
+        self.assertIsNotNone(history.get(3))
+
+    def test_discontinuity(self) -> None:
+        history = RtpPacketHistory()
+        history.add(1, b"a", now_ms=0)
+        history.add(2, b"b", now_ms=0)
+        history.add(10, b"c", now_ms=0)
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history.size, 1)
+        self.assertIsNone(history.get(1))
+        self.assertEqual(history.get(10), b"c")
+
+        history.clear()
+        self.assertEqual(len(history), 0)
+        self.assertIsNone(history.get(10))
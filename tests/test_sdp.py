@@ -12,7 +12,9 @@ from vsaiortc.sdp import (
     GroupDescription,
     H264Level,
     H264Profile,
+    RidDescription,
     SessionDescription,
+    SimulcastDescription,
     SsrcDescription,
     parse_h264_profile_level_id,
 )
@@ -1792,6 +1794,93 @@ a=setup:actpass
             ],
         )
 
+    def test_video_simulcast(self) -> None:
+        d = SessionDescription.parse(
+            lf2crlf(
+                """v=0
+o=- 863426017819471768 2 IN IP4 127.0.0.1
+s=-
+t=0 0
+a=group:BUNDLE 0
+a=msid-semantic:WMS *
+m=video 45076 UDP/TLS/RTP/SAVPF 96
+c=IN IP4 192.168.99.58
+a=rtcp:9 IN IP4 0.0.0.0
+a=candidate:2793285586 1 udp 2122260223 192.168.99.58 45076 typ host generation 0 network-id 1 network-cost 50
+a=ice-ufrag:1I2o
+a=ice-pwd:KfGxUtuuxJw4NBfpNfIWNHo9
+a=ice-options:trickle
+a=fingerprint:sha-256 6B:8B:5D:EA:59:04:20:23:29:C8:87:1C:CC:87:32:BE:DD:8C:66:A5:8E:50:55:EA:8C:D3:B6:5C:09:5E:D6:BC
+a=setup:actpass
+a=mid:0
+a=extmap:4 urn:ietf:params:rtp-hdrext:sdes:mid
+a=extmap:5 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id
+a=extmap:6 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id
+a=sendonly
+a=msid:- 2b2bbe3a-f0b4-4f68-8a31-1d0d2a3c8f7e
+a=rtcp-mux
+a=rtpmap:96 VP8/90000
+a=rtcp-fb:96 nack
+a=rtcp-fb:96 nack pli
+a=rid:f send
+a=rid:h send max-width=640
+a=rid:q send
+a=simulcast:send f;h;~q
+"""
+            )
+        )
+
+        self.assertEqual(
+            d.media[0].rid,
+            [
+                RidDescription(rid="f", direction="send"),
+                RidDescription(
+                    rid="h", direction="send", parameters={"max-width": "640"}
+                ),
+                RidDescription(rid="q", direction="send"),
+            ],
+        )
+        self.assertEqual(
+            d.media[0].simulcast, SimulcastDescription(send=["f", "h", "~q"], recv=[])
+        )
+        self.assertEqual(d.media[0].ssrc, [])
+
+        self.assertEqual(
+            str(d),
+            lf2crlf(
+                """v=0
+o=- 863426017819471768 2 IN IP4 127.0.0.1
+s=-
+t=0 0
+a=group:BUNDLE 0
+a=msid-semantic:WMS *
+m=video 45076 UDP/TLS/RTP/SAVPF 96
+c=IN IP4 192.168.99.58
+a=sendonly
+a=extmap:4 urn:ietf:params:rtp-hdrext:sdes:mid
+a=extmap:5 urn:ietf:params:rtp-hdrext:sdes:rtp-stream-id
+a=extmap:6 urn:ietf:params:rtp-hdrext:sdes:repaired-rtp-stream-id
+a=mid:0
+a=msid:- 2b2bbe3a-f0b4-4f68-8a31-1d0d2a3c8f7e
+a=rtcp:9 IN IP4 0.0.0.0
+a=rtcp-mux
+a=rtpmap:96 VP8/90000
+a=rtcp-fb:96 nack
+a=rtcp-fb:96 nack pli
+a=rid:f send
+a=rid:h send max-width=640
+a=rid:q send
+a=simulcast:send f;h;~q
+a=candidate:2793285586 1 udp 2122260223 192.168.99.58 45076 typ host
+a=ice-ufrag:1I2o
+a=ice-pwd:KfGxUtuuxJw4NBfpNfIWNHo9
+a=ice-options:trickle
+a=fingerprint:sha-256 6B:8B:5D:EA:59:04:20:23:29:C8:87:1C:CC:87:32:BE:DD:8C:66:A5:8E:50:55:EA:8C:D3:B6:5C:09:5E:D6:BC
+a=setup:actpass
+"""
+            ),
+        )
+
     def test_safari(self) -> None:
         d = SessionDescription.parse(
             lf2crlf(
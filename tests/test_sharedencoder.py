@@ -0,0 +1,251 @@
+import asyncio
+from typing import Optional
+from unittest import TestCase
+from unittest.mock import patch
+
+from av.frame import Frame
+
+from vsaiortc.codecs import PCMU_CODEC, depayload, vp8_is_keyframe
+from vsaiortc.codecs.base import Encoder
+from vsaiortc.mediastreams import AudioStreamTrack, MediaStreamError, VideoStreamTrack
+from vsaiortc.rtcrtpparameters import (
+    RTCRtpCodecParameters,
+    RTCRtpEncodingParameters,
+    RTCRtpSendParameters,
+)
+from vsaiortc.rtcrtpsender import RTCRtpSender
+from vsaiortc.rtp import RtpPacket, is_rtcp
+from vsaiortc.sharedencoder import SharedEncoderPool
+
+from .utils import asynctest, dummy_dtls_transport_pair
+
+VP8_CODEC = RTCRtpCodecParameters(
+    mimeType="video/VP8", clockRate=90000, payloadType=100
+)
+
+
+class SharedEncoderPoolTest(TestCase):
+    @asynctest
+    async def test_subscribe(self) -> None:
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool(bitrate=300000)
+
+        subscription1 = pool.subscribe(track, VP8_CODEC)
+        subscription2 = pool.subscribe(
+            track,
+            RTCRtpCodecParameters(
+                mimeType="video/VP8", clockRate=90000, payloadType=120
+            ),
+        )
+        self.assertIs(subscription1.encoder, subscription2.encoder)
+        self.assertEqual(len(pool.encoders), 1)
+        self.assertEqual(pool.encoders[0].subscriber_count, 2)
+
+        # both subscribers get the same frames
+        frame1, encode_time = await subscription1.recv()
+        frame2, _ = await subscription2.recv()
+        self.assertIs(frame1, frame2)
+        self.assertGreater(encode_time, 0)
+
+        # another track has its own encoder
+        subscription3 = pool.subscribe(VideoStreamTrack(), VP8_CODEC)
+        self.assertIsNot(subscription3.encoder, subscription1.encoder)
+        self.assertEqual(len(pool.encoders), 2)
+
+        # the encoders stop when nobody is subscribed
+        subscription1.unsubscribe()
+        subscription2.unsubscribe()
+        subscription3.unsubscribe()
+        self.assertEqual(pool.encoders, [])
+
+    @asynctest
+    async def test_keyframe_requests_coalesced(self) -> None:
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool()
+
+        subscription1 = pool.subscribe(track, VP8_CODEC)
+        subscription2 = pool.subscribe(track, VP8_CODEC)
+        encoder = subscription1.encoder
+
+        # the first frame is a keyframe for both subscribers
+        await subscription1.recv()
+        await subscription2.recv()
+        self.assertEqual(encoder.keyframes_forced, 1)
+
+        with patch("vsaiortc.sharedencoder.KEYFRAME_MIN_INTERVAL", 0):
+            # several requests result in a single keyframe
+            subscription1.request_keyframe()
+            subscription2.request_keyframe()
+            subscription1.request_keyframe()
+            for i in range(3):
+                await subscription1.recv()
+            self.assertEqual(encoder.keyframes_forced, 2)
+
+        # requests too close to the last keyframe are deferred
+        subscription2.request_keyframe()
+        for i in range(3):
+            await subscription1.recv()
+        self.assertEqual(encoder.keyframes_forced, 2)
+
+        subscription1.unsubscribe()
+        subscription2.unsubscribe()
+
+    @asynctest
+    async def test_keyframe_not_produced(self) -> None:
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool()
+
+        subscription1 = pool.subscribe(track, VP8_CODEC)
+        await subscription1.recv()
+
+        # the encoder ignores keyframe requests for a while
+        encode_frame = RTCRtpSender._encode_frame
+
+        def encode_frame_without_keyframe(
+            encoder: Encoder, frame: Frame, force_keyframe: bool
+        ) -> tuple[list[bytes], int, Optional[int], float]:
+            return encode_frame(encoder, frame, False)
+
+        with patch("vsaiortc.sharedencoder.KEYFRAME_MIN_INTERVAL", 0):
+            with patch.object(
+                RTCRtpSender, "_encode_frame", encode_frame_without_keyframe
+            ):
+                subscription2 = pool.subscribe(track, VP8_CODEC)
+                for i in range(3):
+                    await subscription1.recv()
+
+            # the second subscriber waits for an actual keyframe
+            self.assertEqual(subscription2._queue.qsize(), 3)
+            enc_frame, _ = await subscription2.recv()
+            self.assertTrue(
+                vp8_is_keyframe(depayload(VP8_CODEC, enc_frame.payloads[0]))
+            )
+
+        subscription1.unsubscribe()
+        subscription2.unsubscribe()
+
+    @asynctest
+    async def test_audio(self) -> None:
+        track = AudioStreamTrack()
+        pool = SharedEncoderPool()
+
+        # audio subscribers do not wait for keyframes
+        subscription = pool.subscribe(track, PCMU_CODEC)
+        self.assertFalse(subscription._waiting_keyframe)
+        await subscription.recv()
+
+        subscription.resync()
+        self.assertFalse(subscription._waiting_keyframe)
+        await subscription.recv()
+        self.assertEqual(subscription.encoder.keyframes_forced, 0)
+
+        subscription.unsubscribe()
+
+    @asynctest
+    async def test_resync(self) -> None:
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool()
+
+        with patch("vsaiortc.sharedencoder.SUBSCRIPTION_QUEUE_SIZE", 2):
+            subscription1 = pool.subscribe(track, VP8_CODEC)
+            subscription2 = pool.subscribe(track, VP8_CODEC)
+        encoder = subscription1.encoder
+
+        # the second subscriber falls behind and waits for a keyframe
+        with patch("vsaiortc.sharedencoder.KEYFRAME_MIN_INTERVAL", 0):
+            for i in range(4):
+                await subscription1.recv()
+            self.assertEqual(encoder.keyframes_forced, 2)
+
+            await subscription2.recv()
+            self.assertTrue(subscription2._queue.qsize() <= 2)
+
+        subscription1.unsubscribe()
+        subscription2.unsubscribe()
+
+    @asynctest
+    async def test_track_ended(self) -> None:
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool()
+        subscription = pool.subscribe(track, VP8_CODEC)
+
+        await subscription.recv()
+        track.stop()
+        with self.assertRaises(MediaStreamError):
+            while True:
+                await subscription.recv()
+        self.assertEqual(pool.encoders, [])
+
+
+class SharedEncoderSenderTest(TestCase):
+    @asynctest
+    async def test_senders(self) -> None:
+        """
+        Send a track to two peers, encoding it once.
+        """
+        queue: asyncio.Queue[RtpPacket] = asyncio.Queue()
+
+        async def mock_send_rtp_batch(packets: list[bytes]) -> None:
+            for data in packets:
+                if not is_rtcp(data):
+                    await queue.put(RtpPacket.parse(data))
+
+        track = VideoStreamTrack()
+        pool = SharedEncoderPool()
+
+        async with dummy_dtls_transport_pair() as (transport1, _):
+            async with dummy_dtls_transport_pair() as (transport2, _):
+                transport1._send_rtp_batch = mock_send_rtp_batch  # type: ignore
+                transport2._send_rtp_batch = mock_send_rtp_batch  # type: ignore
+
+                sender1 = RTCRtpSender(track, transport1, encoderPool=pool)
+                sender2 = RTCRtpSender(track, transport2, encoderPool=pool)
+                await sender1.send(RTCRtpSendParameters(codecs=[VP8_CODEC]))
+                await sender2.send(RTCRtpSendParameters(codecs=[VP8_CODEC]))
+
+                # wait for both senders to transmit
+                payloads: dict[int, bytes] = {}
+                while len(payloads) < 2:
+                    packet = await queue.get()
+                    payloads.setdefault(packet.ssrc, bytes(packet.payload))
+                self.assertEqual(set(payloads), {sender1._ssrc, sender2._ssrc})
+                self.assertEqual(payloads[sender1._ssrc], payloads[sender2._ssrc])
+                self.assertEqual(len(pool.encoders), 1)
+
+                # keyframe requests go to the shared encoder
+                encoder = pool.encoders[0]
+                with patch("vsaiortc.sharedencoder.KEYFRAME_MIN_INTERVAL", 0):
+                    sender1._send_keyframe()
+                    sender2._send_keyframe()
+                    await asyncio.sleep(0.1)
+                self.assertEqual(encoder.keyframes_forced, 2)
+
+                # stats are kept per sender
+                report = await sender1.getStats()
+                outbound_rtp = report["outbound-rtp_" + str(id(sender1))]
+                self.assertGreater(outbound_rtp.framesEncoded, 0)
+
+                # stopping one sender leaves the other one running
+                await sender1.stop()
+                self.assertEqual(track.readyState, "live")
+                self.assertEqual(encoder.subscriber_count, 1)
+
+                await sender2.stop()
+                self.assertEqual(pool.encoders, [])
+
+    @asynctest
+    async def test_simulcast(self) -> None:
+        async with dummy_dtls_transport_pair() as (transport, _):
+            with self.assertRaises(ValueError) as cm:
+                RTCRtpSender(
+                    VideoStreamTrack(),
+                    transport,
+                    sendEncodings=[
+                        RTCRtpEncodingParameters(rid="h"),
+                        RTCRtpEncodingParameters(rid="q"),
+                    ],
+                    encoderPool=SharedEncoderPool(),
+                )
+            self.assertEqual(
+                str(cm.exception), "Simulcast cannot be used with shared encoders"
+            )
@@ -9,6 +9,8 @@ from vsaiortc.codecs.vpx import (
     Vp8Encoder,
     VpxPayloadDescriptor,
     number_of_threads,
+    vp8_depayload_with_boundaries,
+    vp8_is_keyframe,
 )
 from vsaiortc.jitterbuffer import JitterFrame
 from vsaiortc.rtcrtpparameters import RTCRtpCodecParameters
@@ -125,6 +127,27 @@ class VpxPayloadDescriptorTest(TestCase):
 
         self.assertEqual(rest, b"")
 
+    def test_depayload_with_boundaries(self) -> None:
+        # start of partition 0
+        self.assertEqual(
+            vp8_depayload_with_boundaries(b"\x10\x01"), (b"\x01", True, True)
+        )
+
+        # start of partition 1
+        self.assertEqual(
+            vp8_depayload_with_boundaries(b"\x11\x01"), (b"\x01", False, True)
+        )
+
+        # continuation of partition 0
+        self.assertEqual(
+            vp8_depayload_with_boundaries(b"\x00\x01"), (b"\x01", False, True)
+        )
+
+    def test_is_keyframe(self) -> None:
+        self.assertTrue(vp8_is_keyframe(b"\x10\x02\x00\x9d\x01\x2a"))
+        self.assertFalse(vp8_is_keyframe(b"\x11\x02\x00"))
+        self.assertFalse(vp8_is_keyframe(b""))
+
     def test_truncated(self) -> None:
         with self.assertRaises(ValueError) as cm:
             VpxPayloadDescriptor.parse(b"")
@@ -35,6 +35,7 @@ class DummyConnection:
         tx_queue: asyncio.Queue[bytes],
     ) -> None:
         self.closed = False
+        self.datagram_handler: Optional[Callable[[bytes], bool]] = None
         self.loss_cursor = 0
         self.loss_pattern: Optional[list[bool]] = None
         self.rx_queue = rx_queue
@@ -49,10 +50,12 @@ class DummyConnection:
         if self.closed:
             raise ConnectionError
 
-        data = await self.rx_queue.get()
-        if data is None:
-            raise ConnectionError
-        return data
+        while True:
+            data = await self.rx_queue.get()
+            if data is None:
+                raise ConnectionError
+            if self.datagram_handler is None or not self.datagram_handler(data):
+                return data
 
     async def send(self, data: bytes) -> None:
         if self.closed:
@@ -81,6 +84,13 @@ class DummyIceTransport:
     async def _send(self, data: bytes) -> None:
         await self._connection.send(data)
 
+    async def _send_batch(self, packets: list[bytes]) -> None:
+        for data in packets:
+            await self._connection.send(data)
+
+    def _set_datagram_handler(self, handler: Optional[Callable[[bytes], bool]]) -> None:
+        self._connection.datagram_handler = handler
+
 
 class TestCase(unittest.TestCase):
     def ensureIsInstance(self, obj: object, cls: type[T]) -> T: